@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class GiftConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.gift'
+
+    def ready(self):
+        from utils.counting import count_cache
+        from .models import Gift
+        from .recommend import gift_index
+        count_cache.track(Gift)
+        gift_index.track()
@@ -0,0 +1,67 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.gift.recommend import GiftMatrix
+
+
+class Command(BaseCommand):
+    """
+    用随机生成的礼物矩阵测量推荐打分的延迟（不访问数据库）
+    示例：python manage.py benchmark_gift_recommendations --gifts 100000 --queries 1000
+    """
+    help = '生成合成的礼物×标签矩阵，统计单次推荐打分的p50/p95/p99延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gifts', type=int, default=100000, help='礼物数')
+        parser.add_argument('--tags', type=int, default=500, help='标签数')
+        parser.add_argument('--tags-per-gift', type=int, default=8, help='每个礼物的标签数')
+        parser.add_argument('--user-tags', type=int, default=10, help='每个用户的标签数')
+        parser.add_argument('--changes', type=int, default=1000, help='增量块中的礼物数')
+        parser.add_argument('--queries', type=int, default=1000, help='查询次数')
+        parser.add_argument('--limit', type=int, default=20, help='每次返回的礼物数')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('需要安装numpy和scipy: pip install numpy scipy')
+
+        rng = random.Random(options['seed'])
+        tag_ids = list(range(1, options['tags'] + 1))
+        per_gift = min(options['tags_per_gift'], len(tag_ids))
+        per_user = min(options['user_tags'], len(tag_ids))
+
+        started = time.monotonic()
+        rows = (
+            (gift_id, tag_id, rng.random())
+            for gift_id in range(1, options['gifts'] + 1)
+            for tag_id in rng.sample(tag_ids, per_gift)
+        )
+        matrix = GiftMatrix.build(rows, tag_ids)
+        changes = {
+            rng.randint(1, options['gifts']): [(tag_id, rng.random()) for tag_id in rng.sample(tag_ids, per_gift)]
+            for _ in range(options['changes'])
+        }
+        matrix = matrix.with_changes(changes, tag_ids)
+        self.stdout.write(
+            f'构建 {matrix.size} 个礼物（增量 {len(matrix.changes)}）耗时 {time.monotonic() - started:.2f} 秒'
+        )
+
+        users = [
+            {tag_id: rng.random() for tag_id in rng.sample(tag_ids, per_user)}
+            for _ in range(options['queries'])
+        ]
+        latencies = []
+        for user_weights in users:
+            query_started = time.perf_counter()
+            matrix.top_k(user_weights, options['limit'])
+            latencies.append((time.perf_counter() - query_started) * 1000)
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies)} 次查询：p50 {p50:.2f} ms，p95 {p95:.2f} ms，p99 {p99:.2f} ms，'
+            f'最大 {max(latencies):.2f} ms'
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:00
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tag', '0007_relatedtag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Gift',
+            fields=[
+                ('gift_id', models.AutoField(primary_key=True, serialize=False, verbose_name='礼物ID')),
+                ('gift_name', models.CharField(max_length=100, verbose_name='礼物名称')),
+                ('description', models.TextField(blank=True, max_length=500, null=True, verbose_name='礼物描述')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0)], verbose_name='价格')),
+                ('gift_image', models.CharField(blank=True, max_length=500, null=True, verbose_name='礼物图片')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否上架')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_time', models.DateTimeField(auto_now=True, db_index=True, verbose_name='修改时间')),
+            ],
+            options={
+                'verbose_name': '礼物',
+                'verbose_name_plural': '礼物',
+                'db_table': 'gift',
+                'ordering': ['-created_time'],
+                'indexes': [models.Index(fields=['created_time', 'gift_id'], name='gift_create_time_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='GiftTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField(default=1.0, help_text='0-1之间的数值，表示礼物与标签的契合程度', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)], verbose_name='关联权重')),
+                ('gift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gift_tags', to='gift.gift', verbose_name='礼物')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_gifts', to='tag.tag', verbose_name='标签')),
+            ],
+            options={
+                'verbose_name': '礼物-标签关联',
+                'verbose_name_plural': '礼物-标签关联',
+                'db_table': 'gift_tags',
+                'unique_together': {('gift', 'tag')},
+            },
+        ),
+        migrations.AddField(
+            model_name='gift',
+            name='tags',
+            field=models.ManyToManyField(related_name='gifts', through='gift.GiftTag', to='tag.tag', verbose_name='标签'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+
+from apps.tag.models import Tag
+
+
+class Gift(models.Model):
+    """礼物目录，通过GiftTag与用户使用同一套标签"""
+
+    gift_id = models.AutoField(primary_key=True, verbose_name='礼物ID')
+    gift_name = models.CharField(max_length=100, verbose_name='礼物名称')
+    description = models.TextField(max_length=500, blank=True, null=True, verbose_name='礼物描述')
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(0)],
+        verbose_name='价格'
+    )
+    # 图片引用：blob:<sha256>或外部URL
+    gift_image = models.CharField(max_length=500, null=True, blank=True, verbose_name='礼物图片')
+    is_active = models.BooleanField(default=True, verbose_name='是否上架')
+    created_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    # 最后修改时间（含标签变化），推荐索引据此增量刷新
+    updated_time = models.DateTimeField(auto_now=True, db_index=True, verbose_name='修改时间')
+    tags = models.ManyToManyField(Tag, through='GiftTag', related_name='gifts', verbose_name='标签')
+
+    class Meta:
+        db_table = 'gift'
+        verbose_name = '礼物'
+        verbose_name_plural = '礼物'
+        ordering = ['-created_time']
+        indexes = [
+            # 游标分页排序键
+            models.Index(fields=['created_time', 'gift_id'], name='gift_create_time_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.gift_name} (ID: {self.gift_id})"
+
+
+class GiftTag(models.Model):
+    """礼物-标签关联，weight表示礼物与标签的契合程度"""
+
+    gift = models.ForeignKey(Gift, on_delete=models.CASCADE, related_name='gift_tags', verbose_name='礼物')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='tagged_gifts', verbose_name='标签')
+    weight = models.FloatField(
+        default=1.0,
+        validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        verbose_name='关联权重',
+        help_text='0-1之间的数值，表示礼物与标签的契合程度'
+    )
+
+    class Meta:
+        db_table = 'gift_tags'
+        verbose_name = '礼物-标签关联'
+        verbose_name_plural = '礼物-标签关联'
+        unique_together = ['gift', 'tag']
+
+    def __str__(self):
+        return f"{self.gift_id} - {self.tag_id} ({self.weight})"
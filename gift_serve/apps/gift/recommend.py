@@ -0,0 +1,261 @@
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from apps.tag.models import Tag, UserTagRelationship
+from apps.tag.version import tag_version
+from utils.versioning import ChangeVersion
+from .models import Gift, GiftTag
+
+# 礼物或礼物标签修改后递增，触发增量刷新
+gift_version = ChangeVersion('gift_index_version')
+# 礼物被物理删除后递增，触发全量重建（增量刷新无法通过updated_time发现删除）
+gift_generation = ChangeVersion('gift_index_generation')
+
+_SYNC_MARGIN = timedelta(seconds=5)
+
+
+def _block(rows: Dict[int, List[Tuple[int, float]]], n_columns: int):
+    """{gift_id: [(列号, 权重)]} -> (gift_id数组, CSC矩阵)，按列切片只访问含有该标签的礼物"""
+    import numpy as np
+    from scipy import sparse
+
+    gift_ids = np.fromiter(rows, dtype=np.int64, count=len(rows))
+    lengths = np.fromiter((len(entries) for entries in rows.values()), dtype=np.int64, count=len(rows))
+    row_index = np.repeat(np.arange(len(rows), dtype=np.int64), lengths)
+    columns = np.fromiter((col for entries in rows.values() for col, _ in entries), dtype=np.int64,
+                          count=int(lengths.sum()))
+    weights = np.fromiter((weight for entries in rows.values() for _, weight in entries), dtype=np.float64,
+                          count=int(lengths.sum()))
+    matrix = sparse.csc_matrix((weights, (row_index, columns)), shape=(len(rows), n_columns))
+    return gift_ids, matrix
+
+
+class GiftMatrix:
+    """
+    不可变的 礼物×标签 权重矩阵
+    - 基础块在全量构建时生成；之后修改过的礼物放入增量块，基础块中的旧行用掩码屏蔽
+    - 打分：用户标签权重向量与礼物行做稀疏点积，只切出用户拥有的标签列参与计算
+    - 所有出现过的标签都有列（包括停用的），停用的标签通过列掩码排除，重新启用时只需更新掩码
+    """
+
+    def __init__(self, columns: Dict[int, int], tag_mask, base_ids, base, changes=None):
+        import numpy as np
+
+        self.columns = columns
+        self.tag_mask = tag_mask
+        self.base_ids = base_ids
+        self.base = base
+        # gift_id -> [(列号, 权重)]，下架或删除为None
+        self.changes: Dict[int, Optional[List[Tuple[int, float]]]] = changes or {}
+        live = {gift_id: entries for gift_id, entries in self.changes.items() if entries}
+        self.delta_ids, self.delta = _block(live, len(columns))
+        self.superseded = np.isin(base_ids, np.fromiter(self.changes, dtype=np.int64, count=len(self.changes)))
+
+    @staticmethod
+    def _extend_columns(columns: Dict[int, int], tag_ids: Iterable[int]) -> Dict[int, int]:
+        missing = [tag_id for tag_id in tag_ids if tag_id not in columns]
+        if not missing:
+            return columns
+        columns = dict(columns)
+        for tag_id in missing:
+            columns[tag_id] = len(columns)
+        return columns
+
+    @staticmethod
+    def _mask(columns: Dict[int, int], active_tag_ids) -> 'np.ndarray':
+        import numpy as np
+
+        mask = np.zeros(len(columns), dtype=np.float64)
+        for tag_id in active_tag_ids:
+            col = columns.get(tag_id)
+            if col is not None:
+                mask[col] = 1.0
+        return mask
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, int, float]], active_tag_ids: Iterable[int]) -> 'GiftMatrix':
+        """由 (gift_id, tag_id, weight) 构建；active_tag_ids为当前激活的标签，只影响掩码"""
+        active_tag_ids = list(active_tag_ids)
+        columns = {tag_id: i for i, tag_id in enumerate(active_tag_ids)}
+        gifts: Dict[int, List[Tuple[int, float]]] = {}
+        for gift_id, tag_id, weight in rows:
+            col = columns.setdefault(tag_id, len(columns))
+            gifts.setdefault(gift_id, []).append((col, weight))
+        base_ids, base = _block(gifts, len(columns))
+        return cls(columns, cls._mask(columns, active_tag_ids), base_ids, base)
+
+    def with_changes(self, changes: Dict[int, Optional[List[Tuple[int, float]]]],
+                     active_tag_ids: Iterable[int]) -> 'GiftMatrix':
+        """合并修改过的礼物（值为[(tag_id, 权重)]或None），返回新矩阵"""
+        active_tag_ids = list(active_tag_ids)
+        columns = self._extend_columns(
+            self.columns, (tag_id for entries in changes.values() if entries for tag_id, _ in entries)
+        )
+        merged = dict(self.changes)
+        for gift_id, entries in changes.items():
+            merged[gift_id] = [(columns[tag_id], weight) for tag_id, weight in entries] if entries else None
+        return GiftMatrix(columns, self._mask(columns, active_tag_ids), self.base_ids, self.base, merged)
+
+    def with_active_tags(self, active_tag_ids: Iterable[int]) -> 'GiftMatrix':
+        """只更新标签掩码（标签停用、启用）"""
+        matrix = object.__new__(GiftMatrix)
+        matrix.__dict__.update(self.__dict__)
+        matrix.tag_mask = self._mask(self.columns, active_tag_ids)
+        return matrix
+
+    @property
+    def size(self) -> int:
+        return int(len(self.base_ids) - self.superseded.sum() + len(self.delta_ids))
+
+    def top_k(self, user_weights: Dict[int, float], k: int) -> List[Tuple[int, float]]:
+        """按加权标签重合度返回得分最高的k个 (gift_id, 得分)"""
+        import numpy as np
+
+        cols = np.fromiter((self.columns.get(tag_id, -1) for tag_id in user_weights), dtype=np.int64,
+                           count=len(user_weights))
+        weights = np.fromiter(user_weights.values(), dtype=np.float64, count=len(user_weights))
+        known = cols >= 0
+        cols, weights = cols[known], weights[known]
+        weights = weights * self.tag_mask[cols]
+        if not len(cols) or k <= 0:
+            return []
+
+        scores = [self._score(self.base, cols, weights), self._score(self.delta, cols, weights)]
+        scores[0][self.superseded] = 0.0
+        scores = np.concatenate(scores)
+        gift_ids = np.concatenate([self.base_ids, self.delta_ids])
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            # 部分排序：O(n)选出前k个，再只对这k个排序
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(gift_ids[i]), float(scores[i])) for i in candidates]
+
+    @staticmethod
+    def _score(matrix, cols, weights):
+        import numpy as np
+
+        valid = cols < matrix.shape[1]
+        if not matrix.shape[0] or not valid.any():
+            return np.zeros(matrix.shape[0])
+        return np.asarray(matrix[:, cols[valid]] @ weights[valid]).ravel()
+
+
+class GiftIndex:
+    """
+    进程内的礼物推荐索引
+    - 首次使用时从数据库全量构建GiftMatrix
+    - gift_version变化：只读取updated_time之后修改过的礼物放入增量块；增量超过compact_threshold时全量重建
+    - gift_generation变化（物理删除）时全量重建；tag_version变化时只更新标签掩码
+    - 用户的标签权重每次请求按(user_id)索引读取，关联变化立即生效
+    """
+
+    def __init__(self, compact_threshold: int = 2000, max_limit: int = 100):
+        self.compact_threshold = compact_threshold
+        self.max_limit = max_limit
+        self._matrix: Optional[GiftMatrix] = None
+        self._versions = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self.build_seconds = 0.0
+
+    def track(self) -> None:
+        post_save.connect(self._on_gift_change, sender=Gift, weak=False, dispatch_uid='gift_index_gift_save')
+        post_delete.connect(self._on_gift_delete, sender=Gift, weak=False, dispatch_uid='gift_index_gift_delete')
+        post_save.connect(self._on_tag_change, sender=GiftTag, weak=False, dispatch_uid='gift_index_tag_save')
+        post_delete.connect(self._on_tag_change, sender=GiftTag, weak=False, dispatch_uid='gift_index_tag_delete')
+
+    def _on_gift_change(self, sender, **kwargs):
+        transaction.on_commit(gift_version.bump)
+
+    def _on_gift_delete(self, sender, **kwargs):
+        transaction.on_commit(gift_generation.bump)
+
+    def _on_tag_change(self, sender, instance, **kwargs):
+        # 礼物的标签变化记为礼物的修改，增量刷新时重新读取该礼物的全部标签
+        Gift.objects.filter(pk=instance.gift_id).update(updated_time=timezone.now())
+        transaction.on_commit(gift_version.bump)
+
+    @staticmethod
+    def _active_tag_ids() -> List[int]:
+        return list(Tag.objects.filter(is_active=True).order_by('tag_id').values_list('tag_id', flat=True))
+
+    def matrix(self) -> GiftMatrix:
+        versions = (gift_generation.current(), gift_version.current(), tag_version.current())
+        if self._matrix is not None and versions == self._versions:
+            return self._matrix
+        with self._lock:
+            # 等锁期间其他线程可能已经刷新
+            if self._matrix is not None and versions == self._versions:
+                return self._matrix
+            if self._matrix is None or versions[0] != self._versions[0]:
+                self.rebuild(versions)
+            elif versions[1] != self._versions[1]:
+                self.refresh(versions)
+            elif versions[2] != self._versions[2]:
+                self._matrix = self._matrix.with_active_tags(self._active_tag_ids())
+                self._versions = versions
+            return self._matrix
+
+    def rebuild(self, versions=None) -> None:
+        started = time.monotonic()
+        versions = versions or (gift_generation.current(), gift_version.current(), tag_version.current())
+        synced_at = timezone.now()
+        rows = (
+            GiftTag.objects.filter(gift__is_active=True)
+            .values_list('gift_id', 'tag_id', 'weight')
+            .iterator(chunk_size=10000)
+        )
+        self._matrix = GiftMatrix.build(rows, self._active_tag_ids())
+        self._versions, self._synced_at = versions, synced_at
+        self.build_seconds = time.monotonic() - started
+
+    def refresh(self, versions) -> None:
+        synced_at = timezone.now()
+        changed = dict(
+            Gift.objects.filter(updated_time__gte=self._synced_at - _SYNC_MARGIN).values_list('gift_id', 'is_active')
+        )
+        changes: Dict[int, Optional[List[Tuple[int, float]]]] = {gift_id: None for gift_id in changed}
+        active = [gift_id for gift_id, is_active in changed.items() if is_active]
+        for gift_id, tag_id, weight in GiftTag.objects.filter(gift_id__in=active).values_list(
+                'gift_id', 'tag_id', 'weight'):
+            if changes[gift_id] is None:
+                changes[gift_id] = []
+            changes[gift_id].append((tag_id, weight))
+
+        if len(self._matrix.changes) + len(changes) > self.compact_threshold:
+            self.rebuild(versions)
+            return
+        self._matrix = self._matrix.with_changes(changes, self._active_tag_ids())
+        self._versions, self._synced_at = versions, synced_at
+
+    @staticmethod
+    def user_weights(user_id: int) -> Dict[int, float]:
+        return dict(UserTagRelationship.active.filter(user_id=user_id).values_list('tag_id', 'weight'))
+
+    def recommend(self, user_id: int, limit: int = 20) -> List[Tuple[int, float]]:
+        limit = max(1, min(limit, self.max_limit))
+        return self.matrix().top_k(self.user_weights(user_id), limit)
+
+    def stats(self) -> Dict:
+        matrix = self._matrix
+        return {
+            'gifts': matrix.size if matrix else 0,
+            'pending_changes': len(matrix.changes) if matrix else 0,
+            'build_seconds': round(self.build_seconds, 3),
+        }
+
+
+_recommend_config = getattr(settings, 'GIFT_RECOMMEND', {})
+gift_index = GiftIndex(
+    compact_threshold=_recommend_config.get('COMPACT_THRESHOLD', 2000),
+    max_limit=_recommend_config.get('MAX_LIMIT', 100),
+)
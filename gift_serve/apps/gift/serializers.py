@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.tag.models import Tag
+from utils.fieldsets import SparseFieldsMixin
+from .models import Gift, GiftTag
+
+
+class GiftTagSerializer(serializers.ModelSerializer):
+    """
+    礼物的标签（嵌套在礼物中读写）
+    """
+    tag = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.filter(is_active=True))
+    tag_name = serializers.CharField(source='tag.tag_name', read_only=True)
+
+    class Meta:
+        model = GiftTag
+        fields = ['tag', 'tag_name', 'weight']
+
+
+class GiftSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    礼物序列化器（列表、详情、创建、修改共用）
+    tags 提交时整体替换礼物的标签
+    """
+    tags = GiftTagSerializer(source='gift_tags', many=True, required=False)
+    created_time = serializers.DateTimeField(
+        format='%Y-%m-%d %H:%M:%S',
+        read_only=True,
+        default=timezone.now
+    )
+
+    class Meta:
+        model = Gift
+        fields = ['gift_id', 'gift_name', 'description', 'price', 'gift_image', 'is_active', 'created_time', 'tags']
+        read_only_fields = ['gift_id', 'created_time']
+
+    def validate_tags(self, value):
+        tag_ids = [item['tag'].tag_id for item in value]
+        if len(tag_ids) != len(set(tag_ids)):
+            raise serializers.ValidationError("标签不能重复")
+        return value
+
+    def create(self, validated_data):
+        tags = validated_data.pop('gift_tags', [])
+        with transaction.atomic():
+            gift = Gift.objects.create(**validated_data)
+            self._replace_tags(gift, tags)
+        return gift
+
+    def update(self, instance, validated_data):
+        tags = validated_data.pop('gift_tags', None)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            if tags is not None:
+                self._replace_tags(instance, tags)
+            # 标签批量写入不触发信号，保存礼物本身更新updated_time并通知推荐索引
+            instance.save()
+        return instance
+
+    @staticmethod
+    def _replace_tags(gift, tags):
+        GiftTag.objects.filter(gift=gift).delete()
+        GiftTag.objects.bulk_create(
+            [GiftTag(gift=gift, tag=item['tag'], weight=item.get('weight', 1.0)) for item in tags]
+        )
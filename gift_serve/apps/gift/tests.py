@@ -0,0 +1,51 @@
+from django.test import SimpleTestCase
+
+from .recommend import GiftMatrix
+
+
+class GiftMatrixTests(SimpleTestCase):
+    """礼物×标签矩阵的打分、增量块和标签掩码（不访问数据库）"""
+
+    def setUp(self):
+        # 标签3在构建时未激活
+        self.matrix = GiftMatrix.build(
+            [
+                (1, 1, 1.0), (1, 2, 0.5),
+                (2, 2, 1.0),
+                (3, 1, 0.2),
+                (4, 3, 1.0),
+            ],
+            active_tag_ids=[1, 2],
+        )
+
+    def test_top_k_orders_by_weighted_overlap(self):
+        self.assertEqual(self.matrix.top_k({1: 1.0, 2: 1.0}, 10), [(1, 1.5), (2, 1.0), (3, 0.2)])
+        self.assertEqual(self.matrix.top_k({1: 1.0, 2: 1.0}, 2), [(1, 1.5), (2, 1.0)])
+        self.assertEqual(self.matrix.top_k({2: 0.5}, 10), [(2, 0.5), (1, 0.25)])
+
+    def test_unknown_and_inactive_tags_are_ignored(self):
+        self.assertEqual(self.matrix.top_k({99: 1.0}, 10), [])
+        self.assertEqual(self.matrix.top_k({3: 1.0}, 10), [])
+        self.assertEqual(self.matrix.top_k({1: 1.0}, 0), [])
+
+    def test_reenabled_tag_scores_without_rebuild(self):
+        matrix = self.matrix.with_active_tags([1, 2, 3])
+        self.assertEqual(matrix.top_k({3: 1.0}, 10), [(4, 1.0)])
+
+        matrix = matrix.with_active_tags([2, 3])
+        self.assertEqual(matrix.top_k({1: 1.0, 3: 1.0}, 10), [(4, 1.0)])
+
+    def test_changes_replace_and_remove_gifts(self):
+        matrix = self.matrix.with_changes(
+            {
+                1: None,  # 下架
+                2: [(1, 0.9)],  # 标签变化
+                5: [(2, 0.7), (4, 1.0)],  # 新礼物，带新标签
+            },
+            active_tag_ids=[1, 2, 4],
+        )
+        self.assertEqual(matrix.size, 4)
+        self.assertEqual(matrix.top_k({1: 1.0, 2: 1.0}, 10), [(2, 0.9), (5, 0.7), (3, 0.2)])
+        self.assertEqual(matrix.top_k({4: 1.0}, 10), [(5, 1.0)])
+        # 原矩阵不受影响
+        self.assertEqual(self.matrix.top_k({1: 1.0}, 1), [(1, 1.0)])
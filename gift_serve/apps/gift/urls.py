@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('gifts/', views.GiftListAPIView.as_view(), name='gift-list'),
+    path('gifts/<int:gift_id>/', views.GiftDetailAPIView.as_view(), name='gift-detail'),
+    # 按用户标签权重推荐礼物
+    path('users/<int:user_id>/recommendations/', views.GiftRecommendAPIView.as_view(), name='gift-recommendations'),
+]
@@ -0,0 +1,158 @@
+from django.db.models import Prefetch
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.user.models import User
+from utils.pagination import StandardPagination
+from .models import Gift, GiftTag
+from .recommend import gift_index
+from .serializers import GiftSerializer
+
+
+def _with_tags(queryset):
+    return queryset.prefetch_related(Prefetch('gift_tags', queryset=GiftTag.objects.select_related('tag')))
+
+
+class GiftListAPIView(APIView):
+    """
+    礼物列表接口
+    GET: 分页获取上架的礼物（?include_inactive=true 包含已下架）
+    POST: 创建礼物，tags为 [{"tag": 标签ID, "weight": 0-1}]
+    """
+    pagination_class = StandardPagination
+    cursor_ordering = ('-created_time', '-gift_id')  # 游标分页的排序键
+
+    def get(self, request):
+        queryset = Gift.objects.order_by('-created_time', '-gift_id')
+        if request.query_params.get('include_inactive', '').lower() not in ('true', '1'):
+            queryset = queryset.filter(is_active=True)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(_with_tags(queryset), request, view=self)
+        context = {'request': request}
+        if page is not None:
+            return paginator.get_paginated_response(GiftSerializer(page, many=True, context=context).data)
+
+        serializer = GiftSerializer(_with_tags(queryset), many=True, context=context)
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': {
+                'list': serializer.data,
+                'total_count': len(serializer.data)
+            }
+        })
+
+    def post(self, request):
+        serializer = GiftSerializer(data=request.data)
+        if serializer.is_valid():
+            gift = serializer.save()
+            return Response({
+                'code': 201,
+                'message': '礼物创建成功',
+                'data': GiftSerializer(gift).data
+            }, status=status.HTTP_201_CREATED)
+        return Response({
+            'code': 400,
+            'message': '数据验证失败',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+class GiftDetailAPIView(APIView):
+    """
+    礼物详情接口
+    """
+
+    @staticmethod
+    def get_object(gift_id):
+        return _with_tags(Gift.objects.all()).filter(gift_id=gift_id).first()
+
+    @staticmethod
+    def not_found():
+        return Response({
+            'code': 404,
+            'message': '礼物不存在'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    def get(self, request, gift_id):
+        gift = self.get_object(gift_id)
+        if gift is None:
+            return self.not_found()
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': GiftSerializer(gift, context={'request': request}).data
+        })
+
+    def put(self, request, gift_id):
+        return self._update(request, gift_id, partial=False)
+
+    def patch(self, request, gift_id):
+        return self._update(request, gift_id, partial=True)
+
+    def _update(self, request, gift_id, partial):
+        gift = self.get_object(gift_id)
+        if gift is None:
+            return self.not_found()
+        serializer = GiftSerializer(instance=gift, data=request.data, partial=partial)
+        if serializer.is_valid():
+            gift = serializer.save()
+            return Response({
+                'code': 200,
+                'message': '礼物更新成功',
+                'data': GiftSerializer(self.get_object(gift.gift_id)).data
+            })
+        return Response({
+            'code': 400,
+            'message': '数据验证失败',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, gift_id):
+        """下架礼物（软删除）"""
+        gift = Gift.objects.filter(gift_id=gift_id).first()
+        if gift is None:
+            return self.not_found()
+        gift.is_active = False
+        gift.save(update_fields=['is_active', 'updated_time'])
+        return Response({
+            'code': 200,
+            'message': '礼物删除成功'
+        })
+
+
+class GiftRecommendAPIView(APIView):
+    """
+    为用户推荐礼物：按用户标签权重与礼物标签权重的加权重合度打分
+    查询参数：?limit=20（最多GIFT_RECOMMEND['MAX_LIMIT']）
+    """
+
+    def get(self, request, user_id):
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except (TypeError, ValueError):
+            limit = 20
+        if not User.live.filter(pk=user_id).exists():
+            return Response({
+                'code': 404,
+                'message': '用户不存在'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        scored = gift_index.recommend(user_id, limit)
+        gifts = _with_tags(Gift.objects.filter(is_active=True)).in_bulk([gift_id for gift_id, _ in scored])
+        results = []
+        for gift_id, score in scored:
+            gift = gifts.get(gift_id)
+            # 索引刷新前刚下架的礼物跳过
+            if gift is not None:
+                results.append({**GiftSerializer(gift, context={'request': request}).data, 'score': round(score, 6)})
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': {
+                'user_id': user_id,
+                'list': results
+            }
+        })
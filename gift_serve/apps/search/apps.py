@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+
+    def ready(self):
+        from django.apps import apps
+        from django.conf import settings
+        from .index import search_index
+
+        for label, fields in settings.SEARCH_CONFIG.get('FIELDS', {}).items():
+            search_index.register(apps.get_model(label), fields)
@@ -0,0 +1,22 @@
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+
+from .index import search_index
+
+
+class SubstringFilter(django_filters.CharFilter):
+    """
+    子串过滤，参数与CharFilter相同（lookup_expr默认为contains）
+    字段已注册到search_index时走n-gram索引，否则等同于普通的contains过滤
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('lookup_expr', 'contains')
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.distinct:
+            qs = qs.distinct()
+        return search_index.filter(qs, value, [self.field_name], self.lookup_expr)
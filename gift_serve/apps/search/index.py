@@ -0,0 +1,146 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+
+from .models import NgramEntry
+
+
+class NgramIndex:
+    """
+    子串搜索后端
+    - ngram：在NgramEntry中查出包含全部片段的对象主键，再对这些行复核原始的contains条件，
+      避免对大表执行 LIKE '%x%' 全表扫描；少于n个字符的查询退回LIKE
+    - like：不使用索引，直接LIKE（数据量小或测试环境）
+    注册的模型保存、删除时自动维护索引，bulk_create/update等不触发信号的写入需调用index_objects或执行rebuild_search_index命令
+    """
+
+    def __init__(self, backend: str = 'ngram', default_size: int = 2, batch_size: int = 1000):
+        self.backend = backend
+        self.default_size = default_size
+        self.batch_size = batch_size
+        # source -> n-gram长度
+        self._sizes: Dict[str, int] = {}
+        # model -> [(字段名, source)]
+        self._fields: Dict[type, List[Tuple[str, str]]] = {}
+
+    @staticmethod
+    def source(model, field: str) -> str:
+        return f'{model._meta.label_lower}.{field}'
+
+    @staticmethod
+    def grams(value: Optional[str], size: int) -> Set[str]:
+        if not value:
+            return set()
+        value = str(value).lower()
+        return {value[i:i + size] for i in range(len(value) - size + 1)}
+
+    def register(self, model, fields) -> None:
+        """fields为字段名列表，或{字段名: n-gram长度}"""
+        if not isinstance(fields, dict):
+            fields = {name: self.default_size for name in fields}
+        entries = self._fields.setdefault(model, [])
+        for name, size in fields.items():
+            source = self.source(model, name)
+            self._sizes[source] = size
+            entries.append((name, source))
+
+        label = model._meta.label_lower
+        post_save.connect(self._on_save, sender=model, weak=False, dispatch_uid=f'ngram_save_{label}')
+        post_delete.connect(self._on_delete, sender=model, weak=False, dispatch_uid=f'ngram_delete_{label}')
+
+    def registered_models(self) -> List[type]:
+        return list(self._fields)
+
+    def sources(self, model) -> List[str]:
+        return [source for _, source in self._fields[model]]
+
+    def field_names(self, model) -> List[str]:
+        return [name for name, _ in self._fields[model]]
+
+    def _on_save(self, sender, instance, update_fields=None, raw=False, **kwargs):
+        if not raw:
+            self.index_objects(sender, [instance], update_fields)
+
+    def _on_delete(self, sender, instance, **kwargs):
+        NgramEntry.objects.filter(source__in=self.sources(sender), object_id=instance.pk).delete()
+
+    def index_objects(self, model, objects: Iterable, field_names: Optional[Iterable[str]] = None) -> int:
+        """重写一批对象的索引（field_names为None时为全部注册字段），返回写入的片段数"""
+        if field_names is not None:
+            field_names = set(field_names)
+        fields = [
+            (name, source) for name, source in self._fields[model]
+            if field_names is None or name in field_names
+        ]
+        objects = list(objects)
+        if not fields or not objects:
+            return 0
+
+        NgramEntry.objects.filter(
+            source__in=[source for _, source in fields],
+            object_id__in=[obj.pk for obj in objects],
+        ).delete()
+        entries = [
+            NgramEntry(source=source, gram=gram, object_id=obj.pk)
+            for obj in objects
+            for name, source in fields
+            for gram in self.grams(getattr(obj, name), self._sizes[source])
+        ]
+        NgramEntry.objects.bulk_create(entries, batch_size=self.batch_size)
+        return len(entries)
+
+    def resolve(self, model, path: str) -> Optional[Tuple[str, str]]:
+        """
+        将过滤路径解析为(主键路径前缀, source)，例如
+        UserTagRelationship + user__username -> ('user__', 'user.user.username')
+        路径指向的字段未注册时返回None
+        """
+        parts = path.split('__')
+        for part in parts[:-1]:
+            model = model._meta.get_field(part).related_model
+            if model is None:
+                return None
+        source = self.source(model, parts[-1])
+        if source not in self._sizes:
+            return None
+        prefix = '__'.join(parts[:-1])
+        return (f'{prefix}__' if prefix else ''), source
+
+    def candidates(self, source: str, grams: Set[str]):
+        """包含全部片段的对象主键子查询"""
+        return (
+            NgramEntry.objects
+            .filter(source=source, gram__in=grams)
+            .values('object_id')
+            .annotate(matched=Count('gram'))
+            .filter(matched=len(grams))
+            .values('object_id')
+        )
+
+    def filter(self, queryset, value: Optional[str], paths: Iterable[str], lookup: str = 'contains'):
+        """对一个或多个字段做子串匹配（多个字段之间为OR）"""
+        if not value:
+            return queryset
+
+        condition = Q()
+        for path in paths:
+            match = Q(**{f'{path}__{lookup}': value})
+            resolved = self.resolve(queryset.model, path) if self.backend == 'ngram' else None
+            if resolved is not None:
+                prefix, source = resolved
+                grams = self.grams(value, self._sizes[source])
+                if grams:
+                    # 先按主键缩小到候选行，再复核原条件（片段全部命中不代表连续出现）
+                    match &= Q(**{f'{prefix}pk__in': self.candidates(source, grams)})
+            condition |= match
+        return queryset.filter(condition)
+
+
+_search_config = getattr(settings, 'SEARCH_CONFIG', {})
+search_index = NgramIndex(
+    backend=_search_config.get('BACKEND', 'ngram'),
+    default_size=_search_config.get('NGRAM_SIZE', 2),
+    batch_size=_search_config.get('BATCH_SIZE', 1000),
+)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NgramEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100, verbose_name='索引来源')),
+                ('gram', models.CharField(max_length=8, verbose_name='片段')),
+                ('object_id', models.BigIntegerField(verbose_name='对象主键')),
+            ],
+            options={
+                'verbose_name': 'N-gram索引',
+                'verbose_name_plural': 'N-gram索引',
+                'db_table': 'search_ngram',
+                'indexes': [models.Index(fields=['source', 'object_id'], name='search_ngram_source_obj_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'gram', 'object_id'), name='search_ngram_source_gram_obj_uniq')],
+            },
+        ),
+    ]
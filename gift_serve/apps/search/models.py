@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class NgramEntry(models.Model):
+    """
+    n-gram倒排索引
+    每个被索引字段值（小写）切分为长度为n的片段，一个片段对应一行
+    """
+    # 索引来源，格式为 <app_label>.<model>.<field>，例如 user.user.username
+    source = models.CharField(max_length=100, verbose_name='索引来源')
+    gram = models.CharField(max_length=8, verbose_name='片段')
+    object_id = models.BigIntegerField(verbose_name='对象主键')
+
+    class Meta:
+        db_table = 'search_ngram'
+        verbose_name = 'N-gram索引'
+        verbose_name_plural = 'N-gram索引'
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'gram', 'object_id'], name='search_ngram_source_gram_obj_uniq'),
+        ]
+        indexes = [
+            # 重建或删除单个对象的索引
+            models.Index(fields=['source', 'object_id'], name='search_ngram_source_obj_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.gram} -> {self.object_id}"
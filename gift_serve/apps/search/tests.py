@@ -0,0 +1,63 @@
+from django.test import SimpleTestCase, TestCase
+
+from apps.tag.models import Tag, UserTagRelationship
+from apps.user.models import User
+from .index import NgramIndex, search_index
+from .models import NgramEntry
+
+
+class NgramTests(SimpleTestCase):
+
+    def test_grams(self):
+        self.assertEqual(NgramIndex.grams('AbCd', 2), {'ab', 'bc', 'cd'})
+        self.assertEqual(NgramIndex.grams('ab', 3), set())
+        self.assertEqual(NgramIndex.grams(None, 2), set())
+
+    def test_resolve(self):
+        self.assertEqual(search_index.resolve(Tag, 'tag_name'), ('', 'tag.tag.tag_name'))
+        self.assertEqual(search_index.resolve(UserTagRelationship, 'user__username'), ('user__', 'user.user.username'))
+        self.assertIsNone(search_index.resolve(Tag, 'tag_type'))
+
+
+class NgramIndexTests(TestCase):
+    """注册字段的n-gram索引随保存、删除维护，查询结果与LIKE一致"""
+
+    def setUp(self):
+        self.tags = {
+            name: Tag.objects.create(tag_name=name)
+            for name in ('数据分析', '分析数据', 'abxba', 'ababx', 'python')
+        }
+
+    def search(self, value):
+        queryset = search_index.filter(Tag.objects.all(), value, ['tag_name'])
+        return sorted(tag.tag_name for tag in queryset)
+
+    def test_matches_like(self):
+        for value in ('数据', '数据分', '分析数据', 'ab', 'abab', 'PYTHON', 'y', 'missing'):
+            expected = sorted(Tag.objects.filter(tag_name__contains=value).values_list('tag_name', flat=True))
+            self.assertEqual(self.search(value), expected, value)
+
+    def test_candidates_are_rechecked(self):
+        # abxba 含有 ab、ba 两个片段，但不含连续的 abab
+        self.assertEqual(self.search('abab'), ['ababx'])
+
+    def test_index_follows_updates_and_deletes(self):
+        tag = self.tags['python']
+        tag.tag_name = 'golang'
+        tag.save()
+        self.assertEqual(self.search('pyth'), [])
+        self.assertEqual(self.search('gola'), ['golang'])
+
+        tag.delete()
+        self.assertEqual(self.search('gola'), [])
+        self.assertFalse(NgramEntry.objects.filter(object_id=tag.pk, source='tag.tag.tag_name').exists())
+
+    def test_index_objects_after_bulk_update(self):
+        user = User.objects.create(user_id=20200, username='search_user', password='x', phone_number='13800000002')
+        User.objects.filter(pk=user.pk).update(username='renamed_user')
+        user.refresh_from_db()
+        queryset = User.objects.all()
+        self.assertFalse(search_index.filter(queryset, 'renamed', ['username']).exists())
+
+        search_index.index_objects(User, [user], ['username'])
+        self.assertEqual(list(search_index.filter(queryset, 'renamed', ['username'])), [user])
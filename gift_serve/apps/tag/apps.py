@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TagConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tag'
+
+    def ready(self):
+        from utils.counting import count_cache
+        from .models import Tag, UserTagRelationship
+        from .counters import tag_counters
+        from .version import tag_version
+        count_cache.track(Tag, UserTagRelationship)
+        tag_version.track(Tag)
+        tag_counters.track()
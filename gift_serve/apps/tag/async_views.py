@@ -0,0 +1,154 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from apps.user.models import User
+from utils.fieldsets import project_queryset
+from utils.pagination import StandardPagination
+from utils.token import ResponseHelper
+from .catalog import tag_catalog
+from .filters import TagFilter
+from .models import Tag, UserTagRelationship
+from .relationshipfilters import UserTagRelationshipFilter
+from .relationshioser import UserTagRelationshipListSerializer
+from .serializers import TagListSerializer
+from .views import TagListAPIView
+
+
+def async_json(data, status=200):
+    """与DRF JSONRenderer一致，不转义中文"""
+    return JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+class AsyncReadView(View):
+    """
+    原生异步只读视图基类
+    ASGI下查询、计数、序列化都在事件循环中完成，单个worker可同时挂起大量慢连接
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def paginate(self, request, queryset, serializer_class):
+        """异步分页并序列化，返回与StandardPagination一致的响应"""
+        paginator = StandardPagination()
+        try:
+            page = await paginator.apaginate_queryset(queryset, Request(request), view=self)
+        except NotFound:
+            return ResponseHelper.error('资源不存在', 404)
+
+        if page is None:
+            return None
+        serializer = serializer_class(page, many=True, context={'request': request})
+        return async_json(paginator.get_paginated_data(serializer.data))
+
+
+class TagListAsyncView(AsyncReadView):
+    """
+    标签列表接口（TagListAPIView.get的异步版本）
+    """
+    cursor_ordering = TagListAPIView.cursor_ordering
+
+    async def get(self, request):
+        try:
+            response = await sync_to_async(tag_catalog.respond)(Request(request), self)
+            if response is not None:
+                return response
+
+            filtered_queryset = TagFilter(request.GET, queryset=Tag.objects.all()).qs
+
+            ordering = request.GET.get('ordering', '-created_time')
+            if ordering.lstrip('-') in ['tag_id', 'tag_name', 'created_time', 'tag_type']:
+                filtered_queryset = filtered_queryset.order_by(ordering)
+            elif ordering.lstrip('-') == 'user_count':
+                # 按冗余计数排序，与(user_count, tag_id)索引一致
+                filtered_queryset = filtered_queryset.order_by(ordering, ordering.replace('user_count', 'tag_id'))
+            filtered_queryset = project_queryset(filtered_queryset, TagListSerializer, request, self.cursor_ordering)
+
+            response = await self.paginate(request, filtered_queryset, TagListSerializer)
+            if response is not None:
+                return response
+
+            tags = [tag async for tag in filtered_queryset]
+            return async_json({
+                'code': 200,
+                'message': '获取成功',
+                'data': {
+                    'list': TagListSerializer(tags, many=True, context={'request': request}).data,
+                    'total_count': len(tags)
+                }
+            })
+
+        except Exception as e:
+            return async_json({
+                'code': 500,
+                'message': f'服务器错误: {str(e)}'
+            }, status=500)
+
+    async def post(self, request):
+        """创建标签为写操作，沿用同步视图"""
+        return await sync_to_async(TagListAPIView.as_view())(request)
+
+
+class UserTagsAsyncView(AsyncReadView):
+    """
+    获取用户的所有标签关联（UserTagsView的异步版本）
+    """
+    cursor_ordering = ('-relation_time', '-relation_id')
+
+    async def get(self, request, user_id):
+        user = await User.objects.filter(user_id=user_id).afirst()
+        if user is None:
+            return ResponseHelper.error('资源不存在', 404)
+
+        user_relationships = UserTagRelationship.active.filter(user_id=user_id).select_related('user', 'tag')
+        filtered_queryset = UserTagRelationshipFilter(request.GET, queryset=user_relationships).qs
+        filtered_queryset = project_queryset(
+            filtered_queryset, UserTagRelationshipListSerializer, request, self.cursor_ordering
+        )
+
+        response = await self.paginate(request, filtered_queryset, UserTagRelationshipListSerializer)
+        if response is not None:
+            return response
+
+        relationships = [obj async for obj in filtered_queryset]
+        return async_json({
+            'user_id': user_id,
+            'username': user.username,
+            'count': len(relationships),
+            'tags': UserTagRelationshipListSerializer(relationships, many=True, context={'request': request}).data
+        })
+
+
+class TagUsersAsyncView(AsyncReadView):
+    """
+    获取标签的所有用户关联（TagUsersView的异步版本）
+    """
+    cursor_ordering = ('-relation_time', '-relation_id')
+
+    async def get(self, request, tag_id):
+        tag = await Tag.objects.filter(tag_id=tag_id).afirst()
+        if tag is None:
+            return ResponseHelper.error('资源不存在', 404)
+
+        tag_relationships = UserTagRelationship.active.filter(tag_id=tag_id).select_related('user', 'tag')
+        filtered_queryset = UserTagRelationshipFilter(request.GET, queryset=tag_relationships).qs
+        filtered_queryset = project_queryset(
+            filtered_queryset, UserTagRelationshipListSerializer, request, self.cursor_ordering
+        )
+
+        response = await self.paginate(request, filtered_queryset, UserTagRelationshipListSerializer)
+        if response is not None:
+            return response
+
+        relationships = [obj async for obj in filtered_queryset]
+        return async_json({
+            'tag_id': tag_id,
+            'tag_name': tag.tag_name,
+            'count': len(relationships),
+            'users': UserTagRelationshipListSerializer(relationships, many=True, context={'request': request}).data
+        })
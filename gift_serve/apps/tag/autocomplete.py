@@ -0,0 +1,159 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Tag
+from .version import tag_version
+
+# 前缀上界：任何以prefix开头的字符串都小于 prefix + _MAX_CHAR
+_MAX_CHAR = '\U0010ffff'
+# 增量刷新时把上次同步时间往前放宽，覆盖进程间的时钟误差和未提交的事务
+_SYNC_MARGIN = timedelta(seconds=5)
+
+
+class TagEntry(NamedTuple):
+    key: str
+    tag_id: int
+    tag_name: str
+    tag_type: str
+    popularity: int
+
+    def to_dict(self) -> Dict:
+        return {
+            'tag_id': self.tag_id,
+            'tag_name': self.tag_name,
+            'tag_type': self.tag_type,
+            'user_count': self.popularity,
+        }
+
+
+class _Snapshot(NamedTuple):
+    keys: List[str]  # 按key排序，二分查找前缀区间
+    entries: List[TagEntry]  # 与keys一一对应
+    top: Dict[str, List[TagEntry]]  # 短前缀的热门结果
+
+
+def _rank(entry: TagEntry):
+    return -entry.popularity, entry.key, entry.tag_id
+
+
+class TagAutocomplete:
+    """
+    标签名前缀补全（进程内有序数组 + 二分查找）
+    - 只包含激活的标签，按名称小写排序；查询时二分得到前缀区间，再按热度（Tag.user_count）取前limit个
+    - 1~2个字符的短前缀区间很大，结果在内存中记住，同一快照内不重复计算
+    - 标签版本号（tag_version）变化时只读取updated_time之后修改过的标签做增量刷新；
+      计数变化不更新版本号，热度每popularity_ttl秒整体刷新一次
+    - 查询不访问数据库，版本号每check_interval秒才读一次Redis
+    """
+
+    def __init__(self, popularity_ttl: int = 300, prefix_cache_length: int = 2, max_limit: int = 50):
+        self.popularity_ttl = popularity_ttl
+        self.prefix_cache_length = prefix_cache_length
+        self.max_limit = max_limit
+        self._tags: Dict[int, TagEntry] = {}
+        self._snapshot: Optional[_Snapshot] = None
+        self._version = None
+        self._synced_at = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return value.strip().casefold()
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[TagEntry]:
+        key = self.normalize(prefix or '')
+        if not key:
+            return []
+        limit = max(1, min(limit, self.max_limit))
+        snapshot = self._fresh_snapshot()
+
+        if len(key) <= self.prefix_cache_length:
+            top = snapshot.top.get(key)
+            if top is None:
+                top = self._top(snapshot, key, self.max_limit)
+                snapshot.top[key] = top
+            return top[:limit]
+        return self._top(snapshot, key, limit)
+
+    @staticmethod
+    def _top(snapshot: _Snapshot, key: str, limit: int) -> List[TagEntry]:
+        lo = bisect_left(snapshot.keys, key)
+        hi = bisect_left(snapshot.keys, key + _MAX_CHAR, lo)
+        if hi - lo <= limit:
+            return sorted(snapshot.entries[lo:hi], key=_rank)
+        return heapq.nsmallest(limit, snapshot.entries[lo:hi], key=_rank)
+
+    def _fresh_snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        version = tag_version.current()
+        expired = time.monotonic() - self._built_at >= self.popularity_ttl
+        if snapshot is not None and version == self._version and not expired:
+            return snapshot
+        with self._lock:
+            # 等锁期间其他线程可能已经刷新
+            expired = time.monotonic() - self._built_at >= self.popularity_ttl
+            if self._snapshot is not None and version == self._version and not expired:
+                return self._snapshot
+            if self._snapshot is None or expired:
+                self.rebuild(version)
+            else:
+                self.refresh(version)
+            return self._snapshot
+
+    @staticmethod
+    def _rows(queryset):
+        return queryset.filter(is_active=True).values_list('tag_id', 'tag_name', 'tag_type', 'user_count')
+
+    def rebuild(self, version=None) -> None:
+        """全量加载激活的标签和热度"""
+        version = tag_version.current() if version is None else version
+        synced_at = timezone.now()
+        self._tags = {
+            tag_id: TagEntry(self.normalize(tag_name), tag_id, tag_name, tag_type, user_count)
+            for tag_id, tag_name, tag_type, user_count in self._rows(Tag.objects.all())
+        }
+        self._publish(version, synced_at)
+        self._built_at = time.monotonic()
+
+    def refresh(self, version) -> None:
+        """增量刷新：只读取上次同步之后修改过的标签，停用、删除的标签从数组中移除"""
+        synced_at = timezone.now()
+        changed = list(self._rows(Tag.objects.filter(updated_time__gte=self._synced_at - _SYNC_MARGIN)))
+        active_ids = set(Tag.objects.filter(is_active=True).values_list('tag_id', flat=True))
+
+        tags = {tag_id: entry for tag_id, entry in self._tags.items() if tag_id in active_ids}
+        for tag_id, tag_name, tag_type, user_count in changed:
+            tags[tag_id] = TagEntry(self.normalize(tag_name), tag_id, tag_name, tag_type, user_count)
+        self._tags = tags
+        self._publish(version, synced_at)
+
+    def _publish(self, version, synced_at) -> None:
+        entries = sorted(self._tags.values(), key=lambda entry: (entry.key, entry.tag_id))
+        # 整体替换引用，读线程看到的要么是旧快照要么是新快照
+        self._snapshot = _Snapshot([entry.key for entry in entries], entries, {})
+        self._version = version
+        self._synced_at = synced_at
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'size': len(snapshot.entries) if snapshot else 0,
+            'version': self._version,
+            'cached_prefixes': len(snapshot.top) if snapshot else 0,
+        }
+
+
+_autocomplete_config = getattr(settings, 'TAG_AUTOCOMPLETE', {})
+tag_autocomplete = TagAutocomplete(
+    popularity_ttl=_autocomplete_config.get('POPULARITY_TTL', 300),
+    prefix_cache_length=_autocomplete_config.get('PREFIX_CACHE_LENGTH', 2),
+    max_limit=_autocomplete_config.get('MAX_LIMIT', 50),
+)
@@ -0,0 +1,197 @@
+import threading
+from datetime import timedelta
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from utils.pagination import StandardPagination
+from .models import Tag
+from .serializers import TagListSerializer
+from .version import tag_version
+
+# 可由快照直接回答的查询参数，出现其他参数（名称搜索、时间范围、游标、fields等）时走数据库
+SUPPORTED_PARAMS = {'tag_type', 'tag_type_in', 'is_active', 'ordering', 'page', 'page_size', 'count'}
+ORDERING_FIELDS = ('tag_id', 'tag_name', 'created_time', 'tag_type')
+# 计数随关联写入变化、不更新快照，按计数排序走数据库
+COUNTER_ORDERING_FIELDS = ('user_count',)
+DEFAULT_ORDERING = '-created_time'
+_BOOLEANS = {'true': True, '1': True, 'false': False, '0': False}
+_TAG_TYPES = {value for value, _ in Tag.TAG_TYPE_CHOICES}
+_SYNC_MARGIN = timedelta(seconds=5)
+# 渲染分页外壳时list的占位，渲染后替换为预序列化的标签
+_LIST_PLACEHOLDER = b'"list":[]'
+
+
+class TagRow(NamedTuple):
+    tag_id: int
+    tag_name: str
+    tag_type: str
+    created_time: object
+    is_active: bool
+
+
+class _Snapshot(NamedTuple):
+    items: Dict[int, bytes]  # tag_id -> TagListSerializer输出的JSON
+    rows: Dict[int, TagRow]  # 排序、过滤用的字段
+    by_type: Dict[str, FrozenSet[int]]
+    by_active: Dict[bool, FrozenSet[int]]
+    results: Dict[Tuple, List[int]]  # (排序, 过滤条件) -> 有序tag_id，同一快照内复用
+
+
+class TagCatalog:
+    """
+    标签目录快照（进程内）
+    - 全部标签预先经TagListSerializer序列化为JSON字节，并按id、类型、激活状态建立索引
+    - 列表接口只带 tag_type / tag_type_in / is_active / ordering / 页码参数时直接由快照分页返回，
+      不访问数据库，也不再逐条序列化
+    - 标签版本号（tag_version）变化时只重新读取、序列化updated_time之后修改过的标签
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._version = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._renderer = JSONRenderer()
+
+    def snapshot(self) -> _Snapshot:
+        version = tag_version.current()
+        if self._snapshot is not None and version == self._version:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None:
+                self.rebuild(version)
+            elif version != self._version:
+                self.refresh(version)
+            return self._snapshot
+
+    def _load(self, queryset) -> Tuple[Dict[int, bytes], Dict[int, TagRow]]:
+        items, rows = {}, {}
+        for tag in queryset:
+            items[tag.tag_id] = self._renderer.render(TagListSerializer(tag).data)
+            rows[tag.tag_id] = TagRow(tag.tag_id, tag.tag_name, tag.tag_type, tag.created_time, tag.is_active)
+        return items, rows
+
+    def rebuild(self, version=None) -> None:
+        version = tag_version.current() if version is None else version
+        synced_at = timezone.now()
+        items, rows = self._load(Tag.objects.all())
+        self._publish(items, rows, version, synced_at)
+
+    def refresh(self, version) -> None:
+        """增量刷新：重新序列化修改过的标签，移除已删除的标签"""
+        synced_at = timezone.now()
+        changed_items, changed_rows = self._load(
+            Tag.objects.filter(updated_time__gte=self._synced_at - _SYNC_MARGIN)
+        )
+        existing = set(Tag.objects.values_list('tag_id', flat=True))
+        items = {tag_id: item for tag_id, item in self._snapshot.items.items() if tag_id in existing}
+        rows = {tag_id: row for tag_id, row in self._snapshot.rows.items() if tag_id in existing}
+        items.update(changed_items)
+        rows.update(changed_rows)
+        self._publish(items, rows, version, synced_at)
+
+    def _publish(self, items, rows, version, synced_at) -> None:
+        by_type: Dict[str, set] = {}
+        by_active: Dict[bool, set] = {True: set(), False: set()}
+        for row in rows.values():
+            by_type.setdefault(row.tag_type, set()).add(row.tag_id)
+            by_active[row.is_active].add(row.tag_id)
+        self._snapshot = _Snapshot(
+            items,
+            rows,
+            {tag_type: frozenset(ids) for tag_type, ids in by_type.items()},
+            {active: frozenset(ids) for active, ids in by_active.items()},
+            {},
+        )
+        self._version = version
+        self._synced_at = synced_at
+
+    @staticmethod
+    def parse(params) -> Optional[Tuple]:
+        """把查询参数解析为(排序, 类型集合或None, 激活状态或None)，快照无法回答时返回None"""
+        if not set(params).issubset(SUPPORTED_PARAMS):
+            return None
+        types = None
+        tag_type = params.get('tag_type')
+        if tag_type:
+            if tag_type not in _TAG_TYPES:
+                return None
+            types = frozenset([tag_type])
+        tag_types = [value for value in params.getlist('tag_type_in') if value]
+        if tag_types:
+            if not _TAG_TYPES.issuperset(tag_types):
+                return None
+            types = frozenset(tag_types) if types is None else types & frozenset(tag_types)
+
+        active = None
+        is_active = params.get('is_active')
+        if is_active:
+            active = _BOOLEANS.get(is_active.lower())
+            if active is None:
+                return None
+
+        ordering = params.get('ordering', DEFAULT_ORDERING)
+        if ordering.lstrip('-') in COUNTER_ORDERING_FIELDS:
+            return None
+        if ordering.lstrip('-') not in ORDERING_FIELDS:
+            ordering = DEFAULT_ORDERING
+        return ordering, types, active
+
+    def lookup(self, params) -> Optional[List[int]]:
+        """按查询参数返回有序的tag_id列表"""
+        parsed = self.parse(params)
+        if parsed is None:
+            return None
+        snapshot = self.snapshot()
+        result = snapshot.results.get(parsed)
+        if result is not None:
+            return result
+
+        ordering, types, active = parsed
+        candidates = set(snapshot.rows)
+        if types is not None:
+            candidates = set().union(*(snapshot.by_type.get(tag_type, ()) for tag_type in types))
+        if active is not None:
+            candidates &= snapshot.by_active[active]
+        name = ordering.lstrip('-')
+        result = [
+            row.tag_id for row in sorted(
+                (snapshot.rows[tag_id] for tag_id in candidates),
+                key=lambda row: (getattr(row, name), row.tag_id),
+                reverse=ordering.startswith('-'),
+            )
+        ]
+        snapshot.results[parsed] = result
+        return result
+
+    def respond(self, request, view, pagination_class=StandardPagination) -> Optional[HttpResponse]:
+        """
+        由快照生成与数据库查询相同结构的分页响应，无法由快照回答时返回None
+        request为DRF的Request
+        """
+        paginator = pagination_class()
+        if paginator.use_cursor(request, view):
+            return None
+        tag_ids = self.lookup(request.query_params)
+        if tag_ids is None:
+            return None
+
+        page = paginator.paginate_queryset(tag_ids, request, view=view)
+        items = self.snapshot().items
+        body = self._renderer.render(paginator.get_paginated_data([]))
+        listing = b'"list":[' + b','.join(items[tag_id] for tag_id in page if tag_id in items) + b']'
+        return HttpResponse(body.replace(_LIST_PLACEHOLDER, listing, 1), content_type='application/json')
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'size': len(snapshot.items) if snapshot else 0,
+            'version': self._version,
+            'cached_queries': len(snapshot.results) if snapshot else 0,
+        }
+
+
+tag_catalog = TagCatalog()
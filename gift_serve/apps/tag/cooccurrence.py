@@ -0,0 +1,154 @@
+"""
+标签共现（"拥有标签X的用户也拥有标签Y"）的离线计算
+
+- 按user_id区间分块读取激活的关联，每块构造 用户×标签 稀疏矩阵B（0/1）和W（权重），
+  用 B.T @ B 得到共现用户数、W.T @ W 得到权重乘积之和；各块可在多个进程中并行计算后相加
+- 相关度 = NPMI × 共现用户的平均权重乘积：
+  PMI = log(N·c_xy / (n_x·n_y))，NPMI = PMI / -log(c_xy / N)，N为有标签的用户数
+- 每个标签只保存相关度为正的前k个近邻到RelatedTag，接口按(tag, rank)索引读取
+- 依赖numpy/scipy，只在计算时导入
+"""
+import multiprocessing
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from .models import RelatedTag, Tag, UserTagRelationship
+
+# 计算进程中的 tag_id -> 列号
+_tag_columns: Optional[Dict[int, int]] = None
+
+
+def _init_worker(tag_ids: List[int]) -> None:
+    global _tag_columns
+    _tag_columns = {tag_id: i for i, tag_id in enumerate(tag_ids)}
+
+
+def count_chunk(bounds: Tuple[int, int]):
+    """统计user_id在[lo, hi)内的用户，返回(共现用户数矩阵, 权重乘积矩阵, 各标签用户数, 用户数)"""
+    import numpy as np
+    from scipy import sparse
+
+    lo, hi = bounds
+    n_tags = len(_tag_columns)
+    rows = (
+        UserTagRelationship.objects
+        .filter(user_id__gte=lo, user_id__lt=hi, status=True)
+        .values_list('user_id', 'tag_id', 'weight')
+        .iterator(chunk_size=10000)
+    )
+    users, columns, weights = [], [], []
+    for user_id, tag_id, weight in rows:
+        column = _tag_columns.get(tag_id)
+        if column is not None:
+            users.append(user_id)
+            columns.append(column)
+            weights.append(weight)
+    if not users:
+        empty = sparse.csr_matrix((n_tags, n_tags), dtype=np.float64)
+        return empty, empty, np.zeros(n_tags, dtype=np.int64), 0
+
+    user_ids, user_rows = np.unique(np.asarray(users, dtype=np.int64), return_inverse=True)
+    columns = np.asarray(columns, dtype=np.int64)
+    shape = (len(user_ids), n_tags)
+    presence = sparse.csr_matrix((np.ones(len(columns), dtype=np.float64), (user_rows, columns)), shape=shape)
+    weighted = sparse.csr_matrix((np.asarray(weights, dtype=np.float64), (user_rows, columns)), shape=shape)
+    support = np.asarray(presence.sum(axis=0)).ravel().astype(np.int64)
+    return (presence.T @ presence).tocsr(), (weighted.T @ weighted).tocsr(), support, len(user_ids)
+
+
+def user_id_ranges(chunk_size: int) -> List[Tuple[int, int]]:
+    bounds = UserTagRelationship.objects.filter(status=True).aggregate(lo=Min('user_id'), hi=Max('user_id'))
+    if bounds['lo'] is None:
+        return []
+    return [(lo, lo + chunk_size) for lo in range(bounds['lo'], bounds['hi'] + 1, chunk_size)]
+
+
+def top_neighbours(co_counts, co_weights, support, n_users: int, top_k: int, min_support: int):
+    """
+    由共现矩阵计算每个标签的前top_k个近邻（全部为向量化运算）
+    返回按(标签列, 排名)排序的 (行, 列, 排名, 相关度, 共现用户数) 数组
+    """
+    import numpy as np
+
+    co = co_counts.tocoo()
+    mask = (co.row != co.col) & (co.data >= min_support)
+    rows, cols, counts = co.row[mask], co.col[mask], co.data[mask]
+    if not len(rows) or not n_users:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0), empty
+
+    joint = counts / n_users
+    pmi = np.log(joint / ((support[rows] / n_users) * (support[cols] / n_users)))
+    denominator = -np.log(joint)
+    # 所有用户都同时拥有两个标签时NPMI取1
+    npmi = np.divide(pmi, denominator, out=np.ones_like(pmi), where=denominator > 0)
+    mean_weight = np.asarray(co_weights[rows, cols]).ravel() / counts
+    scores = npmi * mean_weight
+
+    positive = scores > 0
+    rows, cols, counts, scores = rows[positive], cols[positive], counts[positive], scores[positive]
+    # 按行分组、组内相关度降序，组内序号即排名
+    order = np.lexsort((-scores, rows))
+    rows, cols, counts, scores = rows[order], cols[order], counts[order], scores[order]
+    ranks = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+    keep = ranks < top_k
+    return rows[keep], cols[keep], ranks[keep], scores[keep], counts[keep].astype(np.int64)
+
+
+def build_related_tags(chunk_size: int = 50000, processes: int = 1, top_k: int = 20, min_support: int = 3,
+                       batch_size: int = 2000, stdout=None) -> Dict[str, int]:
+    """计算并整体替换RelatedTag，返回统计信息"""
+    import numpy as np
+    from scipy import sparse
+
+    tag_ids = list(Tag.objects.filter(is_active=True).order_by('tag_id').values_list('tag_id', flat=True))
+    n_tags = len(tag_ids)
+    co_counts = sparse.csr_matrix((n_tags, n_tags), dtype=np.float64)
+    co_weights = sparse.csr_matrix((n_tags, n_tags), dtype=np.float64)
+    support = np.zeros(n_tags, dtype=np.int64)
+    n_users = 0
+
+    ranges = user_id_ranges(chunk_size)
+    pool = None
+    # 子进程通过fork继承已初始化的Django；不支持fork的平台（Windows）在当前进程中计算
+    if processes > 1 and len(ranges) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        # 子进程不能沿用父进程的数据库连接
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(processes, initializer=_init_worker, initargs=(tag_ids,))
+        results: Iterable = pool.imap_unordered(count_chunk, ranges)
+    else:
+        _init_worker(tag_ids)
+        results = map(count_chunk, ranges)
+    try:
+        for done, (chunk_counts, chunk_weights, chunk_support, chunk_users) in enumerate(results, 1):
+            co_counts += chunk_counts
+            co_weights += chunk_weights
+            support += chunk_support
+            n_users += chunk_users
+            if stdout is not None:
+                stdout.write(f'已统计 {done}/{len(ranges)} 个用户区间')
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    rows, cols, ranks, scores, counts = top_neighbours(
+        co_counts, co_weights.tocsr(), support, n_users, top_k, min_support
+    )
+    related = [
+        RelatedTag(
+            tag_id=tag_ids[row], related_tag_id=tag_ids[col], rank=int(rank), score=float(score), co_count=int(count)
+        )
+        for row, col, rank, score, count in zip(rows, cols, ranks, scores, counts)
+    ]
+    with transaction.atomic():
+        RelatedTag.objects.all().delete()
+        RelatedTag.objects.bulk_create(related, batch_size=batch_size)
+    return {
+        'tags': n_tags,
+        'users': n_users,
+        'pairs': int(co_counts.nnz),
+        'neighbours': len(related),
+    }
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .models import Tag, UserTagRelationship
+
+# 权重之和的浮点误差容忍
+WEIGHT_TOLERANCE = 1e-6
+# update_fields中的字段名 -> attname
+_FIELD_ATTNAMES = {'tag': 'tag_id', 'tag_id': 'tag_id', 'status': 'status', 'weight': 'weight'}
+
+
+def _active_stats():
+    """按标签聚合激活关联的子查询（OuterRef指向Tag）"""
+    return UserTagRelationship.objects.filter(tag_id=OuterRef('pk'), status=True).order_by().values('tag_id')
+
+
+def actual_counts():
+    """(实际用户数, 实际权重之和) 表达式，用于对账和重算"""
+    stats = _active_stats()
+    user_count = Coalesce(
+        Subquery(stats.annotate(n=Count('pk')).values('n'), output_field=IntegerField()), Value(0)
+    )
+    weight_sum = Coalesce(
+        Subquery(stats.annotate(w=Sum('weight')).values('w'), output_field=FloatField()), Value(0.0)
+    )
+    return user_count, weight_sum
+
+
+class TagCounters:
+    """
+    标签冗余计数（Tag.user_count / Tag.weight_sum）
+    - 关联的创建、删除、状态或权重变化时，在同一事务中用F()表达式增减，不读取旧计数
+    - 旧值取自from_db时记录的状态，没有时保存前查一次库
+    - bulk_create、原始DELETE等不触发信号的写入需调用remove/recount；偏差由reconcile_tag_counters命令修复
+    """
+
+    def track(self) -> None:
+        pre_save.connect(self._before_save, sender=UserTagRelationship, weak=False,
+                         dispatch_uid='tag_counters_pre_save')
+        post_save.connect(self._after_save, sender=UserTagRelationship, weak=False,
+                          dispatch_uid='tag_counters_post_save')
+        post_delete.connect(self._after_delete, sender=UserTagRelationship, weak=False,
+                            dispatch_uid='tag_counters_post_delete')
+
+    @staticmethod
+    def _stored_state(pk) -> Optional[Tuple]:
+        if pk is None:
+            return None
+        return UserTagRelationship.objects.filter(pk=pk).values_list(*UserTagRelationship.COUNTER_FIELDS).first()
+
+    def _before_save(self, sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        state = getattr(instance, '_counter_state', None)
+        instance._counter_before = state if state is not None else self._stored_state(instance.pk)
+
+    def _after_save(self, sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+        if raw:
+            return
+        before = None if created else getattr(instance, '_counter_before', None)
+        after = instance.counter_state()
+        if before is not None and update_fields is not None:
+            # 只保存了部分字段，未保存的字段以数据库中的旧值为准
+            saved = {_FIELD_ATTNAMES[name] for name in update_fields if name in _FIELD_ATTNAMES}
+            after = tuple(
+                getattr(instance, name) if name in saved else before[i]
+                for i, name in enumerate(UserTagRelationship.COUNTER_FIELDS)
+            )
+        elif after is None:
+            after = self._stored_state(instance.pk)
+
+        deltas = defaultdict(lambda: [0, 0.0])
+        for state, sign in ((before, -1), (after, 1)):
+            if state is not None and state[1]:
+                deltas[state[0]][0] += sign
+                deltas[state[0]][1] += sign * state[2]
+        self.apply(deltas)
+        instance._counter_state = after
+
+    def _after_delete(self, sender, instance, **kwargs):
+        state = getattr(instance, '_counter_state', None) or instance.counter_state()
+        if state is not None and state[1]:
+            self.apply({state[0]: (-1, -state[2])})
+        instance._counter_state = None
+
+    @staticmethod
+    def apply(deltas: Dict[int, Iterable]) -> None:
+        """按 {tag_id: (用户数增量, 权重增量)} 更新计数"""
+        for tag_id, (count, weight) in deltas.items():
+            if count or weight:
+                Tag.objects.filter(pk=tag_id).update(
+                    user_count=F('user_count') + count,
+                    weight_sum=F('weight_sum') + weight,
+                )
+
+    def remove(self, relationships) -> None:
+        """扣除一批即将被原始DELETE删除的关联（需与删除在同一事务中调用）"""
+        rows = (
+            relationships.filter(status=True).order_by()
+            .values('tag_id').annotate(n=Count('pk'), w=Sum('weight'))
+            .values_list('tag_id', 'n', 'w')
+        )
+        self.apply({tag_id: (-n, -(w or 0.0)) for tag_id, n, w in rows})
+
+    @staticmethod
+    def recount(tag_ids: Optional[Iterable[int]] = None) -> int:
+        """按关联表重算计数（tag_ids为None时重算全部），返回更新的标签数"""
+        queryset = Tag.objects.all()
+        if tag_ids is not None:
+            queryset = queryset.filter(pk__in=list(tag_ids))
+        user_count, weight_sum = actual_counts()
+        return queryset.update(user_count=user_count, weight_sum=weight_sum)
+
+    @staticmethod
+    def drifted(queryset=None):
+        """计数与关联表不一致的标签"""
+        queryset = Tag.objects.all() if queryset is None else queryset
+        user_count, weight_sum = actual_counts()
+        return queryset.annotate(
+            actual_user_count=user_count,
+            actual_weight_sum=weight_sum,
+        ).annotate(
+            weight_diff=Abs(F('weight_sum') - F('actual_weight_sum')),
+        ).filter(~Q(user_count=F('actual_user_count')) | Q(weight_diff__gt=WEIGHT_TOLERANCE))
+
+
+tag_counters = TagCounters()
@@ -1,5 +1,6 @@
 import django_filters
-from django.db.models import Q
+from apps.search.filters import SubstringFilter
+from apps.search.index import search_index
 from .models import Tag
 
 
@@ -7,12 +8,12 @@ class TagFilter(django_filters.FilterSet):
     """
     标签过滤器 - 支持模糊查询、组合查询和分页
     """
-    # 模糊查询
-    tag_name = django_filters.CharFilter(
+    # 模糊查询（走n-gram索引）
+    tag_name = SubstringFilter(
         field_name='tag_name',
-        lookup_expr='contains',
         label='标签名称模糊查询'
     )
+    tag_name__contains = SubstringFilter(field_name='tag_name')
 
     # 精确查询
     tag_type = django_filters.ChoiceFilter(
@@ -50,12 +51,7 @@ class TagFilter(django_filters.FilterSet):
 
     def filter_search(self, queryset, name, value):
         """自定义搜索方法"""
-        if value:
-            return queryset.filter(
-                Q(tag_name__icontains=value) |
-                Q(description__icontains=value)
-            )
-        return queryset
+        return search_index.filter(queryset, value, ['tag_name', 'description'], 'icontains')
 
     class Meta:
         model = Tag
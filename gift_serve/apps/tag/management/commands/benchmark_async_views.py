@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from apps.user.models import User
+from utils.ratelimit import rate_limiter
+from utils.token import TokenManager
+
+
+class Command(BaseCommand):
+    """
+    同一接口分别经WSGI处理器（线程并发）和ASGI处理器（协程并发）请求，对比吞吐和延迟
+    请求走完整的中间件链；路由到同步还是异步视图由GIFT_ASYNC_VIEWS决定，两种部署分别运行一次
+    示例：python manage.py benchmark_async_views --path /api/tag/tags/ --requests 2000 --concurrency 50
+         GIFT_ASYNC_VIEWS=1 python manage.py benchmark_async_views --path /api/tag/tags/
+    """
+    help = '对比WSGI与ASGI处理同一接口的吞吐和p50/p95/p99延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tag/tags/', help='请求路径（可带查询参数）')
+        parser.add_argument('--requests', type=int, default=2000, help='每种处理器的请求数')
+        parser.add_argument('--concurrency', type=int, default=50, help='并发请求数')
+        parser.add_argument('--user-id', type=int, help='签发Token的用户，默认取第一个未删除的用户')
+        parser.add_argument('--with-ratelimit', action='store_true',
+                            help='保留限流（默认关闭，否则同一用户的大量请求会被429拒绝）')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('需要安装numpy: pip install numpy')
+        if options['requests'] <= 0 or options['concurrency'] <= 0:
+            raise CommandError('--requests和--concurrency必须大于0')
+
+        users = User.live.all()
+        if options['user_id'] is not None:
+            users = users.filter(user_id=options['user_id'])
+        user = users.order_by('user_id').first()
+        if user is None:
+            raise CommandError('没有可用于签发Token的用户')
+        token = TokenManager.create_token(user.user_id, user.username, token_version=user.token_version)
+        headers = {'authorization': f'Bearer {token}'}
+        if not options['with_ratelimit']:
+            rate_limiter.enabled = False
+
+        self.stdout.write(
+            f'{"异步" if settings.ASYNC_VIEWS else "同步"}视图（GIFT_ASYNC_VIEWS），路径 {options["path"]}，'
+            f'{options["requests"]} 次请求，并发 {options["concurrency"]}'
+        )
+        # 测试客户端的请求Host固定为testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, run in (('WSGI', self.run_wsgi), ('ASGI', self.run_asgi)):
+                # 预热：加载路由、建立数据库和Redis连接、填充进程内缓存
+                run(options['path'], headers, options['concurrency'], options['concurrency'])
+                started = time.perf_counter()
+                results = run(options['path'], headers, options['requests'], options['concurrency'])
+                elapsed = time.perf_counter() - started
+
+                latencies = [latency for latency, _ in results]
+                statuses = Counter(status for _, status in results)
+                p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name}：{len(results) / elapsed:.0f} req/s，p50 {p50:.2f} ms，p95 {p95:.2f} ms，'
+                    f'p99 {p99:.2f} ms，状态码 {dict(statuses)}'
+                ))
+
+    @staticmethod
+    def run_wsgi(path, headers, total, concurrency):
+        """线程池模拟多线程WSGI服务器，每个线程一个客户端"""
+        local = threading.local()
+
+        def request(_):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client(raise_request_exception=False)
+            started = time.perf_counter()
+            response = client.get(path, headers=headers)
+            return (time.perf_counter() - started) * 1000, response.status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(request, range(total)))
+
+    @staticmethod
+    def run_asgi(path, headers, total, concurrency):
+        """单个事件循环内并发请求，同步视图由Django放到线程中执行"""
+
+        async def main():
+            client = AsyncClient(raise_request_exception=False)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def request():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(path, headers=headers)
+                    return (time.perf_counter() - started) * 1000, response.status_code
+
+            return await asyncio.gather(*(request() for _ in range(total)))
+
+        return asyncio.run(main())
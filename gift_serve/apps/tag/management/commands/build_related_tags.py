@@ -0,0 +1,40 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tag.cooccurrence import build_related_tags
+
+
+class Command(BaseCommand):
+    """
+    计算标签共现近邻（建议由cron每天低峰期执行）
+    示例：python manage.py build_related_tags --processes 4 --top-k 20 --min-support 3
+    """
+    help = '按用户区间并行统计标签共现，保存每个标签的前k个相关标签'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=50000, help='每个计算任务的user_id区间长度')
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='并行进程数')
+        parser.add_argument('--top-k', type=int, default=20, help='每个标签保存的相关标签数')
+        parser.add_argument('--min-support', type=int, default=3, help='共现用户数少于该值的标签对忽略')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+            import scipy  # noqa: F401
+        except ImportError:
+            raise CommandError('需要安装numpy和scipy: pip install numpy scipy')
+
+        started = time.monotonic()
+        stats = build_related_tags(
+            chunk_size=options['chunk_size'],
+            processes=options['processes'],
+            top_k=options['top_k'],
+            min_support=options['min_support'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'计算完成：{stats["tags"]} 个标签，{stats["users"]} 个用户，{stats["pairs"]} 个共现对，'
+            f'保存 {stats["neighbours"]} 条相关标签，耗时 {time.monotonic() - started:.1f} 秒'
+        ))
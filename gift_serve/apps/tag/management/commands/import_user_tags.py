@@ -0,0 +1,92 @@
+from django.db import connection
+
+from apps.search.index import search_index
+from apps.tag.counters import tag_counters
+from apps.tag.models import Tag, UserTagRelationship
+from apps.user.models import User
+from utils.bulkimport import BulkImportCommand
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+UPDATE_FIELDS = ['weight', 'status', 'relation_description', 'update_time']
+
+
+class Command(BulkImportCommand):
+    """
+    批量导入用户-标签关联
+    字段：user_id 或 username, tag_name 或 tag_id, weight(0-1), status, relation_description
+    已存在的(user, tag)关联会更新权重、状态和描述
+    示例：python manage.py import_user_tags relations.ndjson --batch-size 5000
+    """
+    help = '从CSV/NDJSON文件批量导入用户-标签关联，支持断点续传'
+    count_models = (UserTagRelationship,)
+    default_batch_size = 5000
+
+    def prepare(self):
+        # 标签表较小，一次性加载名称到ID的映射
+        self.tag_ids = dict(Tag.objects.values_list('tag_name', 'tag_id'))
+        self.valid_tag_ids = set(self.tag_ids.values())
+
+    def resolve_tag(self, row):
+        tag_id = row.get('tag_id')
+        if tag_id not in (None, ''):
+            tag_id = int(tag_id)
+            return tag_id if tag_id in self.valid_tag_ids else None
+        return self.tag_ids.get((row.get('tag_name') or '').strip())
+
+    def import_batch(self, rows):
+        # 每批一次查询解析用户名、校验用户ID；已删除的用户视为不存在
+        usernames = {row['username'] for row in rows if row.get('username') and not row.get('user_id')}
+        user_ids = {int(row['user_id']) for row in rows if str(row.get('user_id') or '').isdigit()}
+        username_ids = dict(User.live.filter(username__in=usernames).values_list('username', 'user_id'))
+        valid_user_ids = set(User.live.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+
+        rejected = 0
+        relationships = {}
+        for row in rows:
+            if row.get('user_id'):
+                user_id = int(row['user_id']) if str(row['user_id']).isdigit() else None
+                user_id = user_id if user_id in valid_user_ids else None
+            else:
+                user_id = username_ids.get(row.get('username'))
+            try:
+                tag_id = self.resolve_tag(row)
+                # 只有缺省时取默认权重，0是合法权重
+                weight = row.get('weight')
+                weight = 1.0 if weight in (None, '') else float(weight)
+            except (TypeError, ValueError):
+                tag_id, weight = None, None
+            if user_id is None or tag_id is None or weight is None or not 0.0 <= weight <= 1.0:
+                self.reject(row, '用户或标签不存在，或权重不在0-1之间')
+                rejected += 1
+                continue
+
+            status = row.get('status')
+            # 同一批内的重复关联以最后一行为准
+            relationships[(user_id, tag_id)] = UserTagRelationship(
+                user_id=user_id,
+                tag_id=tag_id,
+                weight=weight,
+                status=True if status in (None, '') else str(status).lower() in TRUE_VALUES,
+                relation_description=row.get('relation_description') or None,
+            )
+
+        # MySQL按唯一索引自动判断冲突，不支持指定unique_fields
+        unique_fields = ['user', 'tag'] if connection.features.supports_update_conflicts_with_target else None
+        UserTagRelationship.objects.bulk_create(
+            list(relationships.values()),
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=UPDATE_FIELDS,
+        )
+        # bulk_create不触发信号且无法得知被覆盖的旧状态，按关联表重算本批涉及的标签计数
+        tag_counters.recount({tag_id for _, tag_id in relationships})
+        if UserTagRelationship in search_index.registered_models():
+            # 冲突更新时部分数据库不返回主键，重新读取本批关联后写入搜索索引（与import_users一致）
+            saved = UserTagRelationship.objects.filter(
+                user_id__in={user_id for user_id, _ in relationships},
+                tag_id__in={tag_id for _, tag_id in relationships},
+            ).only('pk', 'user_id', 'tag_id', *search_index.field_names(UserTagRelationship))
+            search_index.index_objects(
+                UserTagRelationship, [rel for rel in saved if (rel.user_id, rel.tag_id) in relationships]
+            )
+        return len(relationships), rejected
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tag.counters import tag_counters
+from apps.tag.models import Tag
+
+
+class Command(BaseCommand):
+    """
+    标签计数对账（建议由cron定期执行）
+    示例：python manage.py reconcile_tag_counters --chunk-size 500 --dry-run
+    """
+    help = '按关联表核对Tag.user_count/weight_sum，修复增量维护产生的偏差'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='每次核对的标签数')
+        parser.add_argument('--sleep', type=float, default=0.1, help='每块之间暂停的秒数')
+        parser.add_argument('--dry-run', action='store_true', help='只输出偏差，不修复')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        checked, fixed, last_pk = 0, 0, None
+        queryset = Tag.objects.order_by('pk').values_list('pk', flat=True)
+        while True:
+            batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            tag_ids = list(batch_queryset[:options['chunk_size']])
+            if not tag_ids:
+                break
+            drifted = tag_counters.drifted(Tag.objects.filter(pk__in=tag_ids)).values_list(
+                'pk', 'tag_name', 'user_count', 'actual_user_count', 'weight_sum', 'actual_weight_sum'
+            )
+            drifted_ids = []
+            for pk, tag_name, user_count, actual_count, weight_sum, actual_weight in drifted:
+                drifted_ids.append(pk)
+                self.stdout.write(
+                    f'{tag_name} ({pk}): 用户数 {user_count} -> {actual_count}，'
+                    f'权重之和 {weight_sum:.4f} -> {actual_weight:.4f}'
+                )
+            if drifted_ids and not options['dry_run']:
+                # 重算时直接从关联表读取最新值，不使用上面核对时的结果
+                tag_counters.recount(drifted_ids)
+            checked += len(tag_ids)
+            fixed += len(drifted_ids)
+            last_pk = tag_ids[-1]
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        action = '发现' if options['dry_run'] else '修复'
+        self.stdout.write(self.style.SUCCESS(
+            f'核对 {checked} 个标签，{action} {fixed} 个偏差，耗时 {time.monotonic() - started:.1f} 秒'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tag', '0002_alter_usertagrelationship_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertagrelationship',
+            index=models.Index(fields=['relation_time', 'relation_id'], name='user_tag_rel_time_id_idx'),
+        ),
+    ]
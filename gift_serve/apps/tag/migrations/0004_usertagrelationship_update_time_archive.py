@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:05
+
+import django.core.validators
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tag', '0003_usertagrelationship_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertagrelationship',
+            name='update_time',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='修改时间'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='usertagrelationship',
+            index=models.Index(fields=['status', 'update_time'], name='user_tag_rel_status_upd_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedUserTagRelationship',
+            fields=[
+                ('weight', models.FloatField(default=1.0, help_text='0-1之间的数值，表示关联强度', validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(1.0)], verbose_name='关联权重')),
+                ('status', models.BooleanField(default=True, verbose_name='是否激活')),
+                ('relation_description', models.TextField(blank=True, help_text='可选，描述用户与此标签的具体关系', max_length=300, null=True, verbose_name='关联描述')),
+                ('relation_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='关联ID')),
+                ('user_id', models.IntegerField(db_index=True, verbose_name='用户ID')),
+                ('tag_id', models.IntegerField(verbose_name='标签ID')),
+                ('relation_time', models.DateTimeField(verbose_name='关联时间')),
+                ('update_time', models.DateTimeField(verbose_name='修改时间')),
+                ('archived_time', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '已归档的用户-标签关联',
+                'verbose_name_plural': '已归档的用户-标签关联',
+                'db_table': 'user_tag_relationships_archive',
+            },
+        ),
+    ]
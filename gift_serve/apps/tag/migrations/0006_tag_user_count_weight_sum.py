@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """按现有关联初始化标签计数"""
+    Tag = apps.get_model('tag', 'Tag')
+    UserTagRelationship = apps.get_model('tag', 'UserTagRelationship')
+    stats = UserTagRelationship.objects.filter(tag_id=OuterRef('pk'), status=True).order_by().values('tag_id')
+    Tag.objects.update(
+        user_count=Coalesce(
+            Subquery(stats.annotate(n=Count('pk')).values('n'), output_field=IntegerField()), Value(0)
+        ),
+        weight_sum=Coalesce(
+            Subquery(stats.annotate(w=Sum('weight')).values('w'), output_field=FloatField()), Value(0.0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tag', '0005_tag_updated_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='user_count',
+            field=models.IntegerField(default=0, verbose_name='用户数'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='weight_sum',
+            field=models.FloatField(default=0.0, verbose_name='权重之和'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user_count', 'tag_id'], name='user_tags_user_count_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tag', '0006_tag_user_count_weight_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='排名')),
+                ('score', models.FloatField(verbose_name='相关度')),
+                ('co_count', models.IntegerField(verbose_name='共现用户数')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='计算时间')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_tags', to='tag.tag', verbose_name='标签')),
+                ('related_tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tag.tag', verbose_name='相关标签')),
+            ],
+            options={
+                'verbose_name': '相关标签',
+                'verbose_name_plural': '相关标签',
+                'db_table': 'tag_related',
+                'indexes': [models.Index(fields=['tag', 'rank'], name='tag_related_rank_idx')],
+                'unique_together': {('tag', 'related_tag')},
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from apps.user.models import User
 
@@ -36,6 +36,13 @@ class Tag(models.Model):
         verbose_name='创建时间'
     )
 
+    # 最后修改时间（自动），内存中的标签结构据此增量刷新
+    updated_time = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name='修改时间'
+    )
+
     # 标签描述
     description = models.TextField(
         max_length=500,
@@ -51,6 +58,16 @@ class Tag(models.Model):
         verbose_name='是否激活'
     )
 
+    # 冗余计数：激活关联数、激活关联的权重之和（由counters.py随关联写入增量维护）
+    user_count = models.IntegerField(
+        default=0,
+        verbose_name='用户数'
+    )
+    weight_sum = models.FloatField(
+        default=0.0,
+        verbose_name='权重之和'
+    )
+
     class Meta:
         db_table = 'user_tags'
         verbose_name = '标签'
@@ -59,32 +76,28 @@ class Tag(models.Model):
         indexes = [
             models.Index(fields=['tag_type', 'is_active']),
             models.Index(fields=['tag_name']),
+            # 按热度排序
+            models.Index(fields=['user_count', 'tag_id'], name='user_tags_user_count_idx'),
         ]
 
+    # 冗余计数字段，只由counters.py的F()表达式更新
+    COUNTER_FIELDS = ('user_count', 'weight_sum')
+
     def __str__(self):
         return f"{self.tag_name} ({self.get_tag_type_display()})"
 
+    def save(self, *args, **kwargs):
+        # 修改已有标签时不写回读取时的计数，否则会覆盖期间并发的F()增减
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
-class UserTagRelationship(models.Model):
-
-    # 关联主键
-    relation_id = models.AutoField(primary_key=True, verbose_name='关联ID')
-
-    # 用户外键 - 假设您的用户模型名为User
-    user = models.ForeignKey(
-        User,  # 请根据您的实际用户模型名称调整
-        on_delete=models.CASCADE,
-        related_name='user_tags',
-        verbose_name='用户'
-    )
 
-    # 标签外键
-    tag = models.ForeignKey(
-        Tag,
-        on_delete=models.CASCADE,
-        related_name='tagged_users',
-        verbose_name='标签'
-    )
+class UserTagRelationshipBase(models.Model):
+    """关联表与归档表共用的字段"""
 
     # 关联时间
     relation_time = models.DateTimeField(
@@ -92,6 +105,12 @@ class UserTagRelationship(models.Model):
         verbose_name='关联时间'
     )
 
+    # 最后修改时间（状态变为未激活的时间据此判断）
+    update_time = models.DateTimeField(
+        auto_now=True,
+        verbose_name='修改时间'
+    )
+
     # 关联权重（0-1之间的小数）
     weight = models.FloatField(
         default=1.0,
@@ -115,6 +134,44 @@ class UserTagRelationship(models.Model):
         help_text='可选，描述用户与此标签的具体关系'
     )
 
+    class Meta:
+        abstract = True
+
+
+class ActiveRelationshipManager(models.Manager):
+    """激活状态的关联"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(status=True)
+
+
+class UserTagRelationship(UserTagRelationshipBase):
+
+    # 关联主键
+    relation_id = models.AutoField(primary_key=True, verbose_name='关联ID')
+
+    # 用户外键 - 假设您的用户模型名为User
+    user = models.ForeignKey(
+        User,  # 请根据您的实际用户模型名称调整
+        on_delete=models.CASCADE,
+        related_name='user_tags',
+        verbose_name='用户'
+    )
+
+    # 标签外键
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='tagged_users',
+        verbose_name='标签'
+    )
+
+    objects = models.Manager()
+    active = ActiveRelationshipManager()
+
+    # 影响标签计数的字段（attname）
+    COUNTER_FIELDS = ('tag_id', 'status', 'weight')
+
     class Meta:
         db_table = 'user_tag_relationships'
         verbose_name = '用户-标签关联'
@@ -125,7 +182,88 @@ class UserTagRelationship(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['tag', 'status']),
             models.Index(fields=['relation_time']),
+            # 游标分页排序键
+            models.Index(fields=['relation_time', 'relation_id'], name='user_tag_rel_time_id_idx'),
+            # 归档任务扫描长期未激活的关联
+            models.Index(fields=['status', 'update_time'], name='user_tag_rel_status_upd_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.tag} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        # 标签计数在pre_save/post_save信号中更新，与关联写入放在同一事务中
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录加载时的计数字段，保存时与新值比较得出标签计数的增量
+        instance._counter_state = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        """(tag_id, status, weight)，有字段未加载时返回None"""
+        if any(name not in self.__dict__ for name in self.COUNTER_FIELDS):
+            return None
+        return tuple(self.__dict__[name] for name in self.COUNTER_FIELDS)
+
+
+class ArchivedUserTagRelationship(UserTagRelationshipBase):
+    """
+    已归档的用户-标签关联（冷数据），结构与关联表一致
+    用户可能同时被归档，user_id/tag_id不设外键
+    """
+    relation_id = models.IntegerField(primary_key=True, verbose_name='关联ID')
+    user_id = models.IntegerField(db_index=True, verbose_name='用户ID')
+    tag_id = models.IntegerField(verbose_name='标签ID')
+    # 归档时原样保留时间
+    relation_time = models.DateTimeField(verbose_name='关联时间')
+    update_time = models.DateTimeField(verbose_name='修改时间')
+    archived_time = models.DateTimeField(auto_now_add=True, verbose_name='归档时间')
+
+    class Meta:
+        db_table = 'user_tag_relationships_archive'
+        verbose_name = '已归档的用户-标签关联'
+        verbose_name_plural = '已归档的用户-标签关联'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.tag_id} (已归档)"
+
+
+class RelatedTag(models.Model):
+    """
+    标签共现的近邻（离线计算，见cooccurrence.py）
+    每个标签保存得分最高的前k个相关标签，rank从0开始
+    """
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='related_tags',
+        verbose_name='标签'
+    )
+    related_tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='相关标签'
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name='排名')
+    # NPMI × 共现用户的平均权重乘积，0~1，越大越相关
+    score = models.FloatField(verbose_name='相关度')
+    # 同时拥有两个标签的用户数
+    co_count = models.IntegerField(verbose_name='共现用户数')
+    created_time = models.DateTimeField(auto_now_add=True, verbose_name='计算时间')
+
+    class Meta:
+        db_table = 'tag_related'
+        verbose_name = '相关标签'
+        verbose_name_plural = '相关标签'
+        unique_together = ['tag', 'related_tag']
+        indexes = [
+            models.Index(fields=['tag', 'rank'], name='tag_related_rank_idx'),
         ]
 
     def __str__(self):
-        return f"{self.user} - {self.tag} ({self.status})"
\ No newline at end of file
+        return f"{self.tag_id} -> {self.related_tag_id} ({self.score:.3f})"
@@ -1,12 +1,13 @@
 # serializers.py
 from rest_framework import serializers
+from utils.fieldsets import SparseFieldsMixin
 from .models import UserTagRelationship
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class UserTagRelationshipListSerializer(serializers.ModelSerializer):
+class UserTagRelationshipListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """列表序列化器（简化版，用于列表查询）"""
     username = serializers.CharField(source='user.username', read_only=True)
     tag_name = serializers.CharField(source='tag.tag_name', read_only=True)
@@ -21,7 +22,7 @@ class UserTagRelationshipListSerializer(serializers.ModelSerializer):
         read_only_fields = ['relation_id', 'relation_time']
 
 
-class UserTagRelationshipDetailSerializer(serializers.ModelSerializer):
+class UserTagRelationshipDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """详情序列化器（完整版）"""
     username = serializers.CharField(source='user.username', read_only=True)
     tag_name = serializers.CharField(source='tag.tag_name', read_only=True)
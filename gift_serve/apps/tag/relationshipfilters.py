@@ -1,14 +1,15 @@
 # filters.py
 import django_filters
+from apps.search.filters import SubstringFilter
 from .models import UserTagRelationship
 
 
 class UserTagRelationshipFilter(django_filters.FilterSet):
     """用户标签关联过滤器"""
     user = django_filters.NumberFilter(field_name='user__user_id')
-    username = django_filters.CharFilter(field_name='user__username', lookup_expr='contains')
+    username = SubstringFilter(field_name='user__username')
     tag = django_filters.NumberFilter(field_name='tag__tag_id')
-    tag_name = django_filters.CharFilter(field_name='tag__tag_name', lookup_expr='contains')
+    tag_name = SubstringFilter(field_name='tag__tag_name')
 
     # 权重范围过滤
     min_weight = django_filters.NumberFilter(field_name='weight', lookup_expr='gte')
@@ -22,7 +23,7 @@ class UserTagRelationshipFilter(django_filters.FilterSet):
     status = django_filters.BooleanFilter(field_name='status')
 
     # 描述模糊搜索
-    description = django_filters.CharFilter(field_name='relation_description', lookup_expr='contains')
+    description = SubstringFilter(field_name='relation_description')
 
     class Meta:
         model = UserTagRelationship
@@ -1,9 +1,10 @@
 from django.utils import timezone
 from rest_framework import serializers
-from .models import Tag
+from utils.fieldsets import SparseFieldsMixin
+from .models import RelatedTag, Tag
 
 
-class TagListSerializer(serializers.ModelSerializer):
+class TagListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     标签列表序列化器（用于分页列表）
     """
@@ -19,15 +20,16 @@ class TagListSerializer(serializers.ModelSerializer):
         fields = ['tag_id', 'tag_type', 'tag_type_display', 'tag_name', 'description', 'is_active', 'created_time']
 
 
-class TagDetailSerializer(serializers.ModelSerializer):
+class TagDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     标签详情序列化器（用于单个标签操作）
     """
 
     class Meta:
         model = Tag
-        fields = ['tag_id', 'tag_type', 'tag_name', 'description', 'is_active', 'created_time']
-        read_only_fields = ['tag_id', 'created_time']
+        fields = ['tag_id', 'tag_type', 'tag_name', 'description', 'is_active', 'created_time',
+                  'user_count', 'weight_sum']
+        read_only_fields = ['tag_id', 'created_time', 'user_count', 'weight_sum']
 
     def validate_tag_name(self, value):
         """验证标签名称唯一性"""
@@ -46,4 +48,17 @@ class TagDetailSerializer(serializers.ModelSerializer):
         if self.instance and self.instance.tag_type == 'system' and tag_type != 'system':
             raise serializers.ValidationError("系统标签类型不可修改")
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class RelatedTagSerializer(serializers.ModelSerializer):
+    """
+    相关标签（用于相关标签列表）
+    """
+    tag_id = serializers.IntegerField(source='related_tag.tag_id', read_only=True)
+    tag_name = serializers.CharField(source='related_tag.tag_name', read_only=True)
+    tag_type = serializers.CharField(source='related_tag.tag_type', read_only=True)
+
+    class Meta:
+        model = RelatedTag
+        fields = ['tag_id', 'tag_name', 'tag_type', 'rank', 'score', 'co_count']
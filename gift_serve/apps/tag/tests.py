@@ -1,3 +1,231 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
 from django.test import TestCase
 
-# Create your tests here.
+from apps.user.models import User
+from utils.counting import count_cache
+from utils.token import TokenManager
+from utils.token_cache import user_epoch_cache
+from .catalog import TagCatalog
+from .counters import tag_counters
+from .models import Tag, UserTagRelationship
+
+
+class TagCounterTests(TestCase):
+    """Tag.user_count / weight_sum 随关联的增删改增量维护"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(user_id=20000 + i, username=f'counter_user_{i}', password='x')
+            for i in range(3)
+        ]
+        self.tag = Tag.objects.create(tag_name='counter_tag', tag_type='interest')
+        self.other = Tag.objects.create(tag_name='counter_other', tag_type='interest')
+
+    def assertCounts(self, tag, user_count, weight_sum):
+        tag.refresh_from_db()
+        self.assertEqual(tag.user_count, user_count)
+        self.assertAlmostEqual(tag.weight_sum, weight_sum)
+
+    def test_create_and_delete(self):
+        first = UserTagRelationship.objects.create(user=self.users[0], tag=self.tag, weight=0.5)
+        UserTagRelationship.objects.create(user=self.users[1], tag=self.tag, weight=0.25)
+        self.assertCounts(self.tag, 2, 0.75)
+
+        first.delete()
+        self.assertCounts(self.tag, 1, 0.25)
+
+    def test_status_weight_and_tag_changes(self):
+        relation = UserTagRelationship.objects.create(user=self.users[0], tag=self.tag, weight=0.5)
+
+        relation.weight = 0.8
+        relation.save()
+        self.assertCounts(self.tag, 1, 0.8)
+
+        relation.status = False
+        relation.save(update_fields=['status'])
+        self.assertCounts(self.tag, 0, 0.0)
+
+        relation = UserTagRelationship.objects.get(pk=relation.pk)
+        relation.status = True
+        relation.tag = self.other
+        relation.save()
+        self.assertCounts(self.tag, 0, 0.0)
+        self.assertCounts(self.other, 1, 0.8)
+        self.assertFalse(tag_counters.drifted().exists())
+
+    def test_tag_save_keeps_concurrent_counts(self):
+        # 读取标签后其他请求新增了关联，保存旧实例不能把计数写回旧值
+        stale = Tag.objects.get(pk=self.tag.pk)
+        UserTagRelationship.objects.create(user=self.users[0], tag=self.tag, weight=0.5)
+        stale.description = '修改描述'
+        stale.save()
+        self.assertCounts(self.tag, 1, 0.5)
+        self.assertEqual(self.tag.description, '修改描述')
+
+    def test_recount_repairs_drift(self):
+        UserTagRelationship.objects.create(user=self.users[0], tag=self.tag, weight=0.5)
+        Tag.objects.filter(pk=self.tag.pk).update(user_count=10, weight_sum=3.0)
+        self.assertTrue(tag_counters.drifted().filter(pk=self.tag.pk).exists())
+
+        tag_counters.recount([self.tag.pk])
+        self.assertCounts(self.tag, 1, 0.5)
+
+
+class CountCacheTests(TestCase):
+    """分页总数缓存：相同过滤条件共用计数，模型写入提交后失效"""
+
+    def setUp(self):
+        # 缓存不随测试数据库重置，递增代数丢弃残留的计数
+        count_cache.bump(Tag)
+        for i in range(2):
+            Tag.objects.create(tag_name=f'count_tag_{i}', tag_type='skill')
+
+    def test_count_is_cached_until_model_changes(self):
+        queryset = Tag.objects.filter(tag_type='skill')
+        self.assertEqual(count_cache.count(queryset), (2, False))
+        # 排序不同的相同查询直接命中缓存
+        with self.assertNumQueries(0):
+            self.assertEqual(count_cache.count(queryset.order_by('-tag_id')), (2, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(tag_name='count_tag_new', tag_type='skill')
+        self.assertEqual(count_cache.count(queryset), (3, False))
+
+
+class TagCatalogTests(TestCase):
+
+    def setUp(self):
+        self.skill = Tag.objects.create(tag_name='catalog_skill', tag_type='skill')
+        self.interest = Tag.objects.create(tag_name='catalog_interest', tag_type='interest')
+        self.inactive = Tag.objects.create(tag_name='catalog_inactive', tag_type='skill', is_active=False)
+        self.catalog = TagCatalog()
+
+    def test_lookup_filters_and_orders(self):
+        self.assertEqual(self.catalog.lookup(QueryDict('tag_type=skill&ordering=tag_id')),
+                         [self.skill.pk, self.inactive.pk])
+        self.assertEqual(self.catalog.lookup(QueryDict('tag_type=skill&is_active=true')), [self.skill.pk])
+        self.assertEqual(
+            self.catalog.lookup(QueryDict('tag_type_in=skill&tag_type_in=interest&is_active=1&ordering=-tag_id')),
+            [self.interest.pk, self.skill.pk],
+        )
+
+    def test_unsupported_params_fall_back_to_database(self):
+        self.assertIsNone(self.catalog.lookup(QueryDict('tag_name=catalog')))
+        self.assertIsNone(self.catalog.lookup(QueryDict('ordering=-user_count')))
+        self.assertIsNone(self.catalog.lookup(QueryDict('tag_type=unknown')))
+
+    def test_refresh_picks_up_changes(self):
+        self.catalog.lookup(QueryDict('is_active=true'))
+        self.skill.is_active = False
+        self.skill.save()
+        self.interest.delete()
+        added = Tag.objects.create(tag_name='catalog_added', tag_type='interest')
+
+        self.catalog.refresh(version=object())
+        self.assertEqual(self.catalog.lookup(QueryDict('is_active=false&ordering=tag_id')),
+                         [self.skill.pk, self.inactive.pk])
+        self.assertEqual(self.catalog.lookup(QueryDict('is_active=true')), [added.pk])
+
+
+class TagCursorPaginationTests(TestCase):
+    """游标分页：按游标翻页不重复、不遗漏，篡改的游标返回404而不是500"""
+
+    def setUp(self):
+        user = User.objects.create(user_id=20100, username='cursor_user', password='x')
+        cache.delete(user_epoch_cache.key(user.user_id))
+        user_epoch_cache.flush()
+        token = TokenManager.create_token(user.user_id, user.username)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        self.tags = [Tag.objects.create(tag_name=f'cursor_tag_{i}') for i in range(5)]
+
+    def get_page(self, **params):
+        response = self.client.get('/api/tag/tags/', {'pagination': 'cursor', 'page_size': 2, **params})
+        return response, response.json()
+
+    def test_pages_through_all_tags(self):
+        seen = []
+        response, body = self.get_page()
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['tag_id'] for item in body['data']['list'])
+            next_link = body['data']['pagination']['next']
+            if next_link is None:
+                break
+            cursor = parse_qs(urlparse(next_link).query)['cursor'][0]
+            response, body = self.get_page(cursor=cursor)
+        self.assertEqual(seen, [tag.pk for tag in reversed(self.tags)])
+
+    def test_tampered_cursor_is_rejected(self):
+        _, body = self.get_page()
+        cursor = parse_qs(urlparse(body['data']['pagination']['next']).query)['cursor'][0]
+        tampered = cursor[:5] + ('x' if cursor[5] != 'x' else 'y') + cursor[6:]
+
+        for value in (tampered, 'not-a-cursor'):
+            response, body = self.get_page(cursor=value)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(body['message'], '无效的分页游标')
+
+
+class RelationshipListViewTests(TestCase):
+    """用户的标签、标签的用户列表：按user_id、tag_id查找，不存在时返回404"""
+
+    def setUp(self):
+        self.user = User.objects.create(user_id=20300, username='relation_user', password='x')
+        cache.delete(user_epoch_cache.key(self.user.user_id))
+        user_epoch_cache.flush()
+        token = TokenManager.create_token(self.user.user_id, self.user.username)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        self.tag = Tag.objects.create(tag_name='relation_tag')
+        UserTagRelationship.objects.create(user=self.user, tag=self.tag, weight=0.5)
+
+    def test_user_tags(self):
+        response = self.client.get(f'/api/tag/users/{self.user.user_id}/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['tag'] for item in response.json()['data']['list']], [self.tag.pk])
+        self.assertEqual(self.client.get('/api/tag/users/99999/tags/').status_code, 404)
+
+    def test_tag_users(self):
+        response = self.client.get(f'/api/tag/tags/{self.tag.pk}/users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['user'] for item in response.json()['data']['list']], [self.user.user_id])
+        self.assertEqual(self.client.get('/api/tag/tags/99999/users/').status_code, 404)
+
+
+class ImportUserTagsTests(TestCase):
+    """import_user_tags：权重0原样导入，已删除用户的关联被拒绝"""
+
+    def setUp(self):
+        self.user = User.objects.create(user_id=20400, username='import_user', password='x')
+        self.deleted = User.objects.create(user_id=20401, username='import_deleted', password='x', is_deleted=True)
+        self.tag = Tag.objects.create(tag_name='import_tag')
+        self.other = Tag.objects.create(tag_name='import_other')
+
+    def run_import(self, rows):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'relations.ndjson')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(row) + '\n' for row in rows)
+            call_command('import_user_tags', path, stdout=StringIO())
+
+    def test_zero_weight_kept(self):
+        self.run_import([
+            {'user_id': self.user.user_id, 'tag_name': 'import_tag', 'weight': 0},
+            {'user_id': self.user.user_id, 'tag_name': 'import_other', 'weight': ''},
+        ])
+        weights = dict(UserTagRelationship.objects.filter(user=self.user).values_list('tag__tag_name', 'weight'))
+        self.assertEqual(weights, {'import_tag': 0.0, 'import_other': 1.0})
+
+    def test_deleted_user_rejected(self):
+        self.run_import([
+            {'user_id': self.deleted.user_id, 'tag_name': 'import_tag', 'weight': 0.5},
+            {'username': self.deleted.username, 'tag_name': 'import_other', 'weight': 0.5},
+        ])
+        self.assertFalse(UserTagRelationship.objects.filter(user=self.deleted).exists())
@@ -1,9 +1,22 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# ASGI部署时读多的接口使用原生异步视图
+if settings.ASYNC_VIEWS:
+    tag_list_view = async_views.TagListAsyncView
+    user_tags_view = async_views.UserTagsAsyncView
+    tag_users_view = async_views.TagUsersAsyncView
+else:
+    tag_list_view = views.TagListAPIView
+    user_tags_view = views.UserTagsView
+    tag_users_view = views.TagUsersView
 
 urlpatterns = [
-    path('tags/', views.TagListAPIView.as_view(), name='tag-list'),
+    path('tags/', tag_list_view.as_view(), name='tag-list'),
+    path('tags/autocomplete/', views.TagAutocompleteAPIView.as_view(), name='tag-autocomplete'),
     path('tags/<int:tag_id>/', views.TagDetailAPIView.as_view(), name='tag-detail'),
+    path('tags/<int:tag_id>/related/', views.TagRelatedAPIView.as_view(), name='tag-related'),
     # 用户标签关联的基本CRUD操作
     path(
         'user-tag-relationships/',
@@ -19,14 +32,14 @@ urlpatterns = [
     # 获取用户的所有标签
     path(
         'users/<int:user_id>/tags/',
-        views.UserTagsView.as_view(),
+        user_tags_view.as_view(),
         name='user-tags'
     ),
 
     # 获取标签的所有用户
     path(
         'tags/<int:tag_id>/users/',
-        views.TagUsersView.as_view(),
+        tag_users_view.as_view(),
         name='tag-users'
     ),
 ]
\ No newline at end of file
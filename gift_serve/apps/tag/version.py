@@ -0,0 +1,9 @@
+from django.conf import settings
+
+from utils.versioning import ChangeVersion
+
+# 标签数据版本：Tag保存、删除提交后递增，各进程内存中的标签结构据此刷新
+tag_version = ChangeVersion(
+    'tag_catalog_version',
+    check_interval=getattr(settings, 'TAG_VERSION_CHECK_INTERVAL', 1.0),
+)
@@ -1,19 +1,22 @@
-from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import APIException
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django_filters import rest_framework as filters
-from .models import Tag, UserTagRelationship
+from apps.user.models import User
+from .models import RelatedTag, Tag, UserTagRelationship
 from .relationshioser import UserTagRelationshipDetailSerializer,UserTagRelationshipListSerializer
 from .relationshipfilters import UserTagRelationshipFilter
 
-from .serializers import TagListSerializer, TagDetailSerializer
+from .serializers import RelatedTagSerializer, TagListSerializer, TagDetailSerializer
 from .filters import TagFilter
+from .autocomplete import tag_autocomplete
+from .catalog import tag_catalog
+from utils.fieldsets import project_queryset
 from utils.pagination import StandardPagination, LargeResultsPagination
-User = get_user_model()
 
 class TagListAPIView(APIView):
     """
@@ -22,6 +25,7 @@ class TagListAPIView(APIView):
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = TagFilter
     pagination_class = StandardPagination
+    cursor_ordering = ('-created_time', '-tag_id')  # 游标分页的排序键
 
     def get_paginator(self):
         """获取分页器实例"""
@@ -36,8 +40,14 @@ class TagListAPIView(APIView):
         - 过滤: ?tag_name=python&tag_type=skill
         - 搜索: ?search=编程
         - 组合: ?tag_type=skill&is_active=true&page=1&page_size=10
+        - 按热度排序: ?ordering=-user_count
         """
         try:
+            # 常用过滤条件直接由进程内的标签目录快照返回
+            response = tag_catalog.respond(request, self, self.pagination_class)
+            if response is not None:
+                return response
+
             # 获取基础查询集
             queryset = Tag.objects.all()
 
@@ -49,26 +59,40 @@ class TagListAPIView(APIView):
             ordering = request.GET.get('ordering', '-created_time')
             if ordering.lstrip('-') in ['tag_id', 'tag_name', 'created_time', 'tag_type']:
                 filtered_queryset = filtered_queryset.order_by(ordering)
+            elif ordering.lstrip('-') == 'user_count':
+                # 按冗余计数排序，与(user_count, tag_id)索引一致
+                filtered_queryset = filtered_queryset.order_by(ordering, ordering.replace('user_count', 'tag_id'))
+            filtered_queryset = project_queryset(filtered_queryset, TagListSerializer, request, self.cursor_ordering)
 
             # 分页处理
             paginator = self.get_paginator()
             page = paginator.paginate_queryset(filtered_queryset, request, view=self)
+            context = {'request': request}
 
             if page is not None:
-                serializer = TagListSerializer(page, many=True)
+                serializer = TagListSerializer(page, many=True, context=context)
                 return paginator.get_paginated_response(serializer.data)
 
             # 如果没有分页，返回所有数据（不推荐用于大数据集）
-            serializer = TagListSerializer(filtered_queryset, many=True)
+            serializer = TagListSerializer(filtered_queryset, many=True, context=context)
             return Response({
                 'code': 200,
                 'message': '获取成功',
                 'data': {
                     'list': serializer.data,
-                    'total_count': filtered_queryset.count()
+                    'total_count': len(serializer.data)
                 }
             })
 
+        except APIException as e:
+            # 分页器对无效游标、页码抛出NotFound，对参数错误抛出ValidationError，按原状态码返回
+            if isinstance(e.detail, str):
+                return Response({'code': e.status_code, 'message': e.detail}, status=e.status_code)
+            return Response({
+                'code': e.status_code,
+                'message': '请求参数错误',
+                'errors': e.detail
+            }, status=e.status_code)
         except Exception as e:
             return Response({
                 'code': 500,
@@ -94,6 +118,27 @@ class TagListAPIView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TagAutocompleteAPIView(APIView):
+    """
+    标签名前缀补全（输入联想），从进程内的有序数组查询，不访问数据库
+    查询参数：?q=前缀&limit=10（最多50）
+    """
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except (TypeError, ValueError):
+            limit = 10
+        entries = tag_autocomplete.suggest(request.query_params.get('q', ''), limit)
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': {
+                'list': [entry.to_dict() for entry in entries]
+            }
+        })
+
+
 class TagDetailAPIView(APIView):
     """
     标签详情接口
@@ -106,8 +151,9 @@ class TagDetailAPIView(APIView):
     def get(self, request, tag_id):
         """获取单个标签详情"""
         try:
-            tag = self.get_object(tag_id)
-            serializer = TagDetailSerializer(tag)
+            queryset = project_queryset(Tag.objects.all(), TagDetailSerializer, request)
+            tag = get_object_or_404(queryset, tag_id=tag_id)
+            serializer = TagDetailSerializer(tag, context={'request': request})
             return Response({
                 'code': 200,
                 'message': '获取成功',
@@ -197,6 +243,41 @@ class TagDetailAPIView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+class TagRelatedAPIView(APIView):
+    """
+    相关标签：拥有该标签的用户也常拥有的标签（由build_related_tags命令离线计算）
+    查询参数：?limit=10（最多50）
+    """
+    max_limit = 50
+
+    def get(self, request, tag_id):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except (TypeError, ValueError):
+            limit = 10
+        if not Tag.objects.filter(tag_id=tag_id).exists():
+            return Response({
+                'code': 404,
+                'message': '标签不存在'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        # 按(tag, rank)索引只读取前limit行
+        related = (
+            RelatedTag.objects
+            .filter(tag_id=tag_id, related_tag__is_active=True)
+            .select_related('related_tag')
+            .order_by('rank')[:limit]
+        )
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': {
+                'tag_id': tag_id,
+                'list': RelatedTagSerializer(related, many=True).data
+            }
+        })
+
+
 class UserTagRelationshipListCreateView(APIView):
     """
     用户标签关联列表和创建视图（支持分页和过滤）
@@ -208,6 +289,7 @@ class UserTagRelationshipListCreateView(APIView):
     search_fields = ['relation_description', 'user__username', 'tag__name']
     ordering_fields = ['relation_time', 'weight', 'user__username']
     ordering = ['-relation_time']
+    cursor_ordering = ('-relation_time', '-relation_id')  # 游标分页的排序键
 
     def get_queryset(self):
         """获取基础查询集"""
@@ -242,17 +324,21 @@ class UserTagRelationshipListCreateView(APIView):
         for backend in list(self.filter_backends):
             if hasattr(backend, 'filter_queryset'):
                 filtered_queryset = backend().filter_queryset(request, filtered_queryset, self)
+        filtered_queryset = project_queryset(
+            filtered_queryset, UserTagRelationshipListSerializer, request, self.cursor_ordering
+        )
 
         # 应用分页
         paginator = pagination_class()
         page = paginator.paginate_queryset(filtered_queryset, request, view=self)
+        context = {'request': request}
 
         if page is not None:
-            serializer = UserTagRelationshipListSerializer(page, many=True)
+            serializer = UserTagRelationshipListSerializer(page, many=True, context=context)
             return paginator.get_paginated_response(serializer.data)
 
         # 如果没有分页，返回所有结果
-        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True)
+        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -283,8 +369,9 @@ class UserTagRelationshipDetailView(APIView):
 
     def get(self, request, relation_id):
         """获取详情"""
-        relationship = self.get_object(relation_id)
-        serializer = UserTagRelationshipDetailSerializer(relationship)
+        queryset = project_queryset(UserTagRelationship.objects.all(), UserTagRelationshipDetailSerializer, request)
+        relationship = get_object_or_404(queryset, relation_id=relation_id)
+        serializer = UserTagRelationshipDetailSerializer(relationship, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, relation_id):
@@ -321,37 +408,38 @@ class UserTagsView(APIView):
     """
     获取用户的所有标签关联（支持分页和过滤）
     """
+    cursor_ordering = ('-relation_time', '-relation_id')
 
     def get(self, request, user_id):
         """获取用户的所有标签"""
         # 验证用户是否存在
-        user = get_object_or_404(User, id=user_id)
+        user = get_object_or_404(User, user_id=user_id)
 
-        user_relationships = UserTagRelationship.objects.filter(
-            user_id=user_id,
-            status=True
-        )
+        user_relationships = UserTagRelationship.active.filter(user_id=user_id).select_related('user', 'tag')
 
         # 应用过滤
         tag_filter = UserTagRelationshipFilter(
             request.GET,
             queryset=user_relationships
         )
-        filtered_queryset = tag_filter.qs
+        filtered_queryset = project_queryset(
+            tag_filter.qs, UserTagRelationshipListSerializer, request, self.cursor_ordering
+        )
 
         # 应用分页
         paginator = StandardPagination()
         page = paginator.paginate_queryset(filtered_queryset, request, view=self)
+        context = {'request': request}
 
         if page is not None:
-            serializer = UserTagRelationshipListSerializer(page, many=True)
+            serializer = UserTagRelationshipListSerializer(page, many=True, context=context)
             return paginator.get_paginated_response(serializer.data)
 
-        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True)
+        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True, context=context)
         return Response({
             'user_id': user_id,
             'username': user.username,
-            'count': filtered_queryset.count(),
+            'count': len(serializer.data),
             'tags': serializer.data
         }, status=status.HTTP_200_OK)
 
@@ -360,36 +448,37 @@ class TagUsersView(APIView):
     """
     获取标签的所有用户关联（支持分页和过滤）
     """
+    cursor_ordering = ('-relation_time', '-relation_id')
 
     def get(self, request, tag_id):
         """获取标签的所有用户"""
         # 验证标签是否存在
-        tag = get_object_or_404(Tag, id=tag_id)
+        tag = get_object_or_404(Tag, tag_id=tag_id)
 
-        tag_relationships = UserTagRelationship.objects.filter(
-            tag_id=tag_id,
-            status=True
-        )
+        tag_relationships = UserTagRelationship.active.filter(tag_id=tag_id).select_related('user', 'tag')
 
         # 应用过滤
         tag_filter = UserTagRelationshipFilter(
             request.GET,
             queryset=tag_relationships
         )
-        filtered_queryset = tag_filter.qs
+        filtered_queryset = project_queryset(
+            tag_filter.qs, UserTagRelationshipListSerializer, request, self.cursor_ordering
+        )
 
         # 应用分页
         paginator = StandardPagination()
         page = paginator.paginate_queryset(filtered_queryset, request, view=self)
+        context = {'request': request}
 
         if page is not None:
-            serializer = UserTagRelationshipListSerializer(page, many=True)
+            serializer = UserTagRelationshipListSerializer(page, many=True, context=context)
             return paginator.get_paginated_response(serializer.data)
 
-        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True)
+        serializer = UserTagRelationshipListSerializer(filtered_queryset, many=True, context=context)
         return Response({
             'tag_id': tag_id,
-            'tag_name': tag.name,
-            'count': filtered_queryset.count(),
+            'tag_name': tag.tag_name,
+            'count': len(serializer.data),
             'users': serializer.data
         }, status=status.HTTP_200_OK)
\ No newline at end of file
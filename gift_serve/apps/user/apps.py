@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user'
+
+    def ready(self):
+        from . import signals  # noqa: F401  注册资料缓存的信号处理
+        from utils.counting import count_cache
+        from .models import User
+        count_cache.track(User)
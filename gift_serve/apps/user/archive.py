@@ -0,0 +1,207 @@
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.search.index import search_index
+from apps.tag.counters import tag_counters
+from apps.tag.models import ArchivedUserTagRelationship, Tag, UserTagRelationship
+from utils.counting import count_cache
+from utils.token import TokenManager
+from .cache import user_profile_cache
+from .models import ArchivedUser, PurgeJob, User
+from .purge import UNFINISHED_STATUSES
+
+
+def copy_instance(instance, model, **overrides):
+    """按列名（attname）把一行复制为另一个模型的实例，目标模型没有的列忽略"""
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+        if hasattr(instance, field.attname)
+    }
+    values.update(overrides)
+    return model(**values)
+
+
+def _restore_times(objects: List, values: Dict, fields: Iterable[str]) -> None:
+    """bulk_create会用auto_now/auto_now_add覆盖时间字段，写回原值（bulk_update不调用pre_save）"""
+    fields = list(fields)
+    for obj in objects:
+        for name in fields:
+            setattr(obj, name, values[obj.pk][name])
+    type(objects[0]).objects.bulk_update(objects, fields)
+
+
+class ColdDataArchiver:
+    """
+    冷热分离：把长期软删除的用户、长期未激活的关联从热表移到归档表
+    - 按主键分块，每块在一个事务中先写归档表再删除热表，中途失败不会丢数据
+    - 热表用QuerySet.delete()删除，搜索索引、资料缓存、分页计数的信号照常触发
+    - 每块之间暂停sleep秒，避免长时间占用数据库
+    """
+
+    def __init__(self, user_days: int = 90, relation_days: int = 180, chunk_size: int = 500,
+                 sleep: float = 0.1, stdout=None):
+        self.user_days = user_days
+        self.relation_days = relation_days
+        self.chunk_size = chunk_size
+        self.sleep = sleep
+        self.stdout = stdout
+
+    def log(self, message: str) -> None:
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _chunks(self, queryset):
+        """按主键升序逐块取出主键；每块处理后从热表删除，所以每次都从头取"""
+        while True:
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+            if not pks:
+                return
+            yield pks
+            if self.sleep:
+                time.sleep(self.sleep)
+
+    def archive_users(self, now=None) -> int:
+        """归档删除时间早于user_days天的用户及其全部关联，返回归档的用户数"""
+        cutoff = (now or timezone.now()) - timedelta(days=self.user_days)
+        # 等待后台清除的用户由清除任务处理
+        purging = PurgeJob.objects.filter(status__in=UNFINISHED_STATUSES).values('user_id')
+        candidates = User.objects.filter(is_deleted=True, deleted_time__lt=cutoff).exclude(pk__in=purging)
+        archived = 0
+        for user_ids in self._chunks(candidates):
+            with transaction.atomic():
+                # 加锁后复核条件：取出主键到加锁之间用户可能已被恢复
+                users = list(
+                    User.objects.select_for_update()
+                    .filter(pk__in=user_ids, is_deleted=True, deleted_time__lt=cutoff)
+                )
+                user_ids = [user.pk for user in users]
+                relationships = UserTagRelationship.objects.filter(user_id__in=user_ids)
+                ArchivedUserTagRelationship.objects.bulk_create(
+                    [copy_instance(rel, ArchivedUserTagRelationship) for rel in relationships]
+                )
+                ArchivedUser.objects.bulk_create([copy_instance(user, ArchivedUser) for user in users])
+                relationships.delete()
+                User.objects.filter(pk__in=user_ids).delete()
+            archived += len(user_ids)
+            self.log(f'已归档 {archived} 个用户')
+        return archived
+
+    def archive_relationships(self, now=None) -> int:
+        """归档未激活且超过relation_days天未修改的关联，返回归档的关联数"""
+        cutoff = (now or timezone.now()) - timedelta(days=self.relation_days)
+        candidates = UserTagRelationship.objects.filter(status=False, update_time__lt=cutoff)
+        archived = 0
+        for relation_ids in self._chunks(candidates):
+            with transaction.atomic():
+                relationships = list(
+                    UserTagRelationship.objects.select_for_update()
+                    .filter(pk__in=relation_ids, status=False, update_time__lt=cutoff)
+                )
+                ArchivedUserTagRelationship.objects.bulk_create(
+                    [copy_instance(rel, ArchivedUserTagRelationship) for rel in relationships]
+                )
+                UserTagRelationship.objects.filter(pk__in=[rel.pk for rel in relationships]).delete()
+            archived += len(relationships)
+            self.log(f'已归档 {archived} 个关联')
+        return archived
+
+    def run(self, now=None) -> Dict[str, int]:
+        now = now or timezone.now()
+        return {
+            'users': self.archive_users(now),
+            'relationships': self.archive_relationships(now),
+        }
+
+
+def restore_users(user_ids: Iterable[int], undelete: bool = False) -> Dict[int, Optional[str]]:
+    """
+    把归档用户及其关联恢复到热表，返回 {user_id: None(成功) 或 失败原因}
+    - 用户名、手机号已被新用户占用时不恢复
+    - 关联的标签已删除时丢弃该关联
+    - undelete为True时同时取消软删除
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    results: Dict[int, Optional[str]] = {}
+    with transaction.atomic():
+        archived = {user.pk: user for user in ArchivedUser.objects.select_for_update().filter(pk__in=user_ids)}
+        for user_id in user_ids:
+            if user_id not in archived:
+                results[user_id] = '归档中不存在该用户'
+
+        usernames = {user.username for user in archived.values()}
+        phones = {user.phone_number for user in archived.values() if user.phone_number}
+        taken = User.objects.filter(
+            Q(pk__in=archived) | Q(username__in=usernames) | Q(phone_number__in=phones)
+        ).values_list('pk', 'username', 'phone_number')
+        taken_ids = {pk for pk, _, _ in taken}
+        taken_usernames = {username for _, username, _ in taken}
+        taken_phones = {phone for _, _, phone in taken if phone}
+        for user_id, user in list(archived.items()):
+            if user_id in taken_ids:
+                results[user_id] = '用户ID已存在'
+            elif user.username in taken_usernames:
+                results[user_id] = f'用户名已被占用: {user.username}'
+            elif user.phone_number and user.phone_number in taken_phones:
+                results[user_id] = f'手机号已被占用: {user.phone_number}'
+            else:
+                continue
+            del archived[user_id]
+        if not archived:
+            return results
+
+        overrides = {'is_deleted': False, 'deleted_time': None} if undelete else {}
+        users = [copy_instance(user, User, **overrides) for user in archived.values()]
+        User.objects.bulk_create(users)
+        _restore_times(users, {pk: {'create_time': user.create_time} for pk, user in archived.items()},
+                       ['create_time'])
+
+        archived_relationships = list(ArchivedUserTagRelationship.objects.filter(user_id__in=archived))
+        tag_ids = set(
+            Tag.objects.filter(pk__in={rel.tag_id for rel in archived_relationships}).values_list('pk', flat=True)
+        )
+        relationships = [
+            copy_instance(rel, UserTagRelationship)
+            for rel in archived_relationships if rel.tag_id in tag_ids
+        ]
+        if relationships:
+            UserTagRelationship.objects.bulk_create(relationships)
+            tag_counters.recount({rel.tag_id for rel in relationships})
+            _restore_times(
+                relationships,
+                {rel.pk: {'relation_time': rel.relation_time, 'update_time': rel.update_time}
+                 for rel in archived_relationships},
+                ['relation_time', 'update_time'],
+            )
+
+        ArchivedUserTagRelationship.objects.filter(user_id__in=archived).delete()
+        ArchivedUser.objects.filter(pk__in=archived).delete()
+
+        # bulk_create不触发信号，手动维护索引和缓存
+        search_index.index_objects(User, users)
+        search_index.index_objects(UserTagRelationship, relationships)
+        restored_ids = list(archived)
+        transaction.on_commit(lambda: user_profile_cache.invalidate_many(restored_ids))
+        transaction.on_commit(lambda: count_cache.bump(User, UserTagRelationship))
+        if undelete:
+            # 刷新Token版本缓存中的“已删除”标记
+            transaction.on_commit(lambda: TokenManager.revoke_users_tokens(restored_ids))
+
+    for user_id in archived:
+        results[user_id] = None
+    return results
+
+
+_archive_config = getattr(settings, 'ARCHIVE_CONFIG', {})
+cold_data_archiver = ColdDataArchiver(
+    user_days=_archive_config.get('USER_DAYS', 90),
+    relation_days=_archive_config.get('RELATION_DAYS', 180),
+    chunk_size=_archive_config.get('CHUNK_SIZE', 500),
+    sleep=_archive_config.get('SLEEP', 0.1),
+)
@@ -0,0 +1,108 @@
+import secrets
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+# 缓存内容结构变化（如序列化字段调整）时递增，旧版本的缓存自然失效
+PROFILE_SCHEMA_VERSION = 3
+# 不进入缓存的字段：密码哈希；Token版本号通过QuerySet.update修改，不触发信号
+PRIVATE_FIELDS = ('password', 'token_version')
+
+
+class UserProfileCache:
+    """
+    用户资料读穿缓存（Redis）
+    - 缓存UserSerializer的输出，读取时命中则不访问数据库
+    - 每个用户一个版本号，写入提交后换成新值（见signals.py），缓存条目带着回填前读到的版本号，
+      与当前版本号不一致即视为未命中；回填期间发生的写入不会被旧数据覆盖
+    - bulk_update等不触发信号的写入需调用invalidate
+    """
+
+    def __init__(self, timeout: int = 300):
+        self.timeout = timeout
+        # 版本号要比资料条目存活更久，否则过期后旧条目可能与"无版本号"重新匹配
+        self.version_timeout = timeout * 2
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user_id) -> str:
+        return f'user_profile_v{PROFILE_SCHEMA_VERSION}_{user_id}'
+
+    @staticmethod
+    def version_key(user_id) -> str:
+        return f'user_profile_version_{user_id}'
+
+    @staticmethod
+    def serialize(user) -> Dict:
+        from .serializers.base import UserSerializer
+
+        data = dict(UserSerializer(user).data)
+        for field in PRIVATE_FIELDS:
+            data.pop(field, None)
+        return data
+
+    def _read(self, user_id) -> Tuple[Optional[Dict], Optional[str]]:
+        """一次读取缓存条目和当前版本号，返回(资料或None, 当前版本号)"""
+        try:
+            cached = cache.get_many([self.key(user_id), self.version_key(user_id)])
+        except Exception:
+            cached = {}
+        version = cached.get(self.version_key(user_id))
+        entry = cached.get(self.key(user_id))
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1], version
+        self.misses += 1
+        return None, version
+
+    def get(self, user_id) -> Optional[Dict]:
+        """只读缓存，未命中返回None"""
+        return self._read(user_id)[0]
+
+    def get_or_load(self, user_id) -> Optional[Dict]:
+        """读穿：未命中时查库并回填，用户不存在返回None"""
+        data, version = self._read(user_id)
+        if data is not None:
+            return data
+        user = User.objects.filter(user_id=user_id).first()
+        if user is None:
+            return None
+        data = self.serialize(user)
+        try:
+            # 标记查库前读到的版本号：查库后才提交的写入已换掉版本号，这条数据不会被命中
+            cache.set(self.key(user_id), (version, data), self.timeout)
+        except Exception:
+            pass
+        return data
+
+    def invalidate(self, user_id) -> None:
+        """换新版本号，该用户已缓存的资料全部失效"""
+        self.invalidate_many([user_id])
+
+    def invalidate_many(self, user_ids: Iterable) -> None:
+        user_ids = list(user_ids)
+        try:
+            cache.set_many({self.version_key(user_id): secrets.token_hex(8) for user_id in user_ids},
+                           self.version_timeout)
+        except Exception:
+            # 无法更新版本号时尽量删除条目
+            try:
+                cache.delete_many([self.key(user_id) for user_id in user_ids])
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        """当前进程的命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+user_profile_cache = UserProfileCache(timeout=getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 300))
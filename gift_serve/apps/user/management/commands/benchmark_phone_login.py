@@ -0,0 +1,117 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.user.models import User
+from apps.user.sequence import user_id_allocator
+from apps.user.views import LoginView
+from utils.counting import count_cache
+from utils.phone import normalize_phone
+
+USERNAME_PREFIX = 'bench_phone_'
+PASSWORD = 'benchmark'
+
+
+def bench_phone(index: int) -> str:
+    """第index个测试用户的手机号（199号段，规范形式）"""
+    return f'199{index:08d}'
+
+
+class Command(BaseCommand):
+    """
+    在大表上测量手机号登录的延迟（规范化 + 唯一索引查询，可选包含密码校验）
+    测试用户以bench_phone_为用户名前缀，重复执行时只补齐缺少的部分
+    示例：python manage.py benchmark_phone_login --users 5000000 --lookups 10000
+    """
+    help = '统计手机号登录查询的p50/p95/p99延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000000, help='测试用户数')
+        parser.add_argument('--lookups', type=int, default=10000, help='登录查询次数')
+        parser.add_argument('--batch-size', type=int, default=10000, help='生成测试用户时每批写入的行数')
+        parser.add_argument('--with-password', action='store_true',
+                            help='同时校验密码（PBKDF2耗时远大于查询，建议减少--lookups）')
+        parser.add_argument('--cleanup', action='store_true', help='测量后删除测试用户')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('需要安装numpy: pip install numpy')
+        if options['users'] <= 0 or options['lookups'] <= 0:
+            raise CommandError('--users和--lookups必须大于0')
+
+        self.seed_users(options['users'], options['batch_size'])
+
+        rng = random.Random(options['seed'])
+        # 客户端传来的号码格式各异，登录时统一规范化
+        formats = (
+            lambda phone: phone,
+            lambda phone: f'+86 {phone[:3]} {phone[3:7]} {phone[7:]}',
+            lambda phone: f'{phone[:3]}-{phone[3:7]}-{phone[7:]}',
+        )
+        inputs = [rng.choice(formats)(bench_phone(rng.randrange(options['users'])))
+                  for _ in range(options['lookups'])]
+
+        view = LoginView()
+        plan = User.objects.filter(phone_number=bench_phone(0)).only(*view.LOGIN_FIELDS).explain()
+        self.stdout.write(f'查询计划：{plan}')
+
+        latencies, found = [], 0
+        for phone_number in inputs:
+            started = time.perf_counter()
+            if options['with_password']:
+                user = view.authenticate_by_phone(phone_number, PASSWORD)
+            else:
+                user = User.objects.filter(phone_number=normalize_phone(phone_number)).only(*view.LOGIN_FIELDS).first()
+            latencies.append((time.perf_counter() - started) * 1000)
+            found += user is not None
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        self.stdout.write(self.style.SUCCESS(
+            f'{"登录（含密码校验）" if options["with_password"] else "手机号查询"}：'
+            f'{len(latencies)} 次（找到 {found}），p50 {p50:.3f} ms，p95 {p95:.3f} ms，p99 {p99:.3f} ms'
+        ))
+
+        if options['cleanup']:
+            self.cleanup(options['batch_size'])
+
+    def seed_users(self, total, batch_size):
+        """按编号补齐测试用户；所有用户共用一个密码哈希，生成时不做逐个哈希"""
+        queryset = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        existing = queryset.count()
+        if existing >= total:
+            self.stdout.write(f'已有测试用户 {existing} 个')
+            return
+
+        password = make_password(PASSWORD)
+        started = time.perf_counter()
+        for first in range(existing, total, batch_size):
+            indexes = range(first, min(first + batch_size, total))
+            user_ids = user_id_allocator.reserve(len(indexes))
+            # bulk_create不触发信号，测试用户不写入搜索索引和资料缓存
+            User.objects.bulk_create(
+                [
+                    User(user_id=user_id, username=f'{USERNAME_PREFIX}{index}',
+                         phone_number=bench_phone(index), password=password)
+                    for user_id, index in zip(user_ids, indexes)
+                ],
+                ignore_conflicts=True,
+            )
+            self.stdout.write(f'\r已生成 {indexes.stop}/{total}', ending='')
+        count_cache.bump(User)
+        self.stdout.write(f'\n生成测试用户耗时 {time.perf_counter() - started:.1f} s')
+
+    def cleanup(self, batch_size):
+        queryset = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        deleted = 0
+        while True:
+            user_ids = list(queryset.values_list('user_id', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            User.objects.filter(user_id__in=user_ids).delete()
+            deleted += len(user_ids)
+        self.stdout.write(f'已删除测试用户 {deleted} 个')
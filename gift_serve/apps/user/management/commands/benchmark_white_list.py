@@ -0,0 +1,62 @@
+import random
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.routes import build_white_list_matcher
+
+
+class Command(BaseCommand):
+    """
+    测量认证中间件白名单判断的延迟，与逐个正则匹配的写法对比
+    示例：python manage.py benchmark_white_list --paths 100000 --extra 50
+    """
+    help = '统计白名单匹配器单次判断的p50/p95/p99延迟'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', type=int, default=100000, help='判断的路径数')
+        parser.add_argument('--extra', type=int, default=0, help='额外生成的白名单条目数，模拟更大的白名单')
+        parser.add_argument('--hit-ratio', type=float, default=0.2, help='命中白名单的路径比例')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('需要安装numpy: pip install numpy')
+
+        rng = random.Random(options['seed'])
+        white_list = list(settings.WHITE_LIST) + [f'/api/public/v{i}/*/info/' for i in range(options['extra'])]
+        matcher = build_white_list_matcher(white_list)
+        separate = [re.compile(pattern) for pattern in matcher.patterns]
+        self.stdout.write(f'白名单 {len(matcher.patterns)} 条（含auth_exempt视图）')
+
+        paths = []
+        for i in range(options['paths']):
+            if rng.random() < options['hit_ratio']:
+                prefix = rng.choice(white_list).replace('*', str(rng.randrange(1000)))
+                paths.append(prefix + str(i))
+            else:
+                paths.append(f'/api/users/{rng.randrange(1, 10 ** 6)}/tags/')
+
+        # 两种写法结果必须一致
+        for path in paths[:1000]:
+            if matcher.match(path) != any(regex.match(path) for regex in separate):
+                raise CommandError(f'匹配结果不一致: {path}')
+
+        for name, check in (
+            ('合并正则', matcher.match),
+            ('逐个正则', lambda path: any(regex.match(path) for regex in separate)),
+        ):
+            latencies, hits = [], 0
+            for path in paths:
+                started = time.perf_counter()
+                hits += check(path)
+                latencies.append((time.perf_counter() - started) * 1e6)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}：{len(latencies)} 次判断（命中 {hits}），'
+                f'p50 {p50:.2f} µs，p95 {p95:.2f} µs，p99 {p99:.2f} µs'
+            ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.user.archive import restore_users
+
+
+class Command(BaseCommand):
+    """
+    从归档表恢复用户及其关联
+    示例：python manage.py restore_archived_users 10001 10002 --undelete
+    """
+    help = '把归档用户恢复到用户表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='+', type=int, help='要恢复的用户ID')
+        parser.add_argument('--undelete', action='store_true', help='同时取消软删除')
+
+    def handle(self, *args, **options):
+        results = restore_users(options['user_ids'], undelete=options['undelete'])
+        for user_id, error in results.items():
+            if error is None:
+                self.stdout.write(self.style.SUCCESS(f'{user_id}: 已恢复'))
+            else:
+                self.stdout.write(self.style.WARNING(f'{user_id}: {error}'))
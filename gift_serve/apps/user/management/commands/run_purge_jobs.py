@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.user.purge import UserPurger, user_purger
+
+
+class Command(BaseCommand):
+    """
+    执行用户清除任务（Web进程未开启PURGE_CONFIG['IN_PROCESS']时使用）
+    示例：python manage.py run_purge_jobs --once
+    """
+    help = '分块删除已销毁用户的关联数据和用户行'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='执行完当前任务后退出')
+        parser.add_argument('--chunk-size', type=int, default=user_purger.chunk_size, help='每个事务删除的关联数')
+        parser.add_argument('--sleep', type=float, default=user_purger.sleep, help='每块之间暂停的秒数')
+
+    def handle(self, *args, **options):
+        purger = UserPurger(
+            chunk_size=options['chunk_size'],
+            sleep=options['sleep'],
+            in_process=False,
+            poll_interval=user_purger.poll_interval,
+            stale_after=user_purger.stale_after,
+            max_attempts=user_purger.max_attempts,
+        )
+        while True:
+            processed = purger.run_pending()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f'已执行 {processed} 个清除任务'))
+            if options['once']:
+                return
+            time.sleep(purger.poll_interval)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def seed_user_sequence(apps, schema_editor):
+    """从现有最大user_id之后开始分配，空表从10000开始"""
+    User = apps.get_model('user', 'User')
+    IdSequence = apps.get_model('user', 'IdSequence')
+    max_id = User.objects.aggregate(max_id=Max('user_id'))['max_id']
+    IdSequence.objects.update_or_create(
+        name='user',
+        defaults={'next_value': max(max_id + 1, 10000) if max_id else 10000},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='序列名称')),
+                ('next_value', models.BigIntegerField(verbose_name='下一个可分配的值')),
+            ],
+            options={
+                'verbose_name': 'ID序列',
+                'verbose_name_plural': 'ID序列',
+                'db_table': 'id_sequence',
+            },
+        ),
+        migrations.RunPython(seed_user_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:10
+
+import re
+
+from django.db import migrations, models
+from django.db.models import Count
+
+BATCH_SIZE = 2000
+
+# utils.phone.normalize_phone 的副本：迁移的结果不随以后对规范化规则的修改而变化
+PHONE_PATTERN = re.compile(r'^1[3-9]\d{9}$')
+_SEPARATORS = re.compile(r'[\s\-().]')
+
+
+def normalize_phone(value):
+    if value is None:
+        return None
+    digits = _SEPARATORS.sub('', str(value))
+    if digits.startswith('+86'):
+        digits = digits[3:]
+    elif digits.startswith('0086'):
+        digits = digits[4:]
+    elif digits.startswith('86') and len(digits) == 13:
+        digits = digits[2:]
+    return digits if PHONE_PATTERN.match(digits) else None
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    """
+    规范化已有手机号，空字符串改为NULL
+    无法识别的号码、规范化后重复的号码（最早注册的用户保留）先写入user_phone_conflict表再置为NULL，
+    结束时输出冲突数量，按该表联系用户或人工恢复
+    """
+    User = apps.get_model('user', 'User')
+    PhoneNumberConflict = apps.get_model('user', 'PhoneNumberConflict')
+    changed, conflicts = [], []
+    invalid = 0
+    for user in User.objects.only('user_id', 'phone_number').iterator(chunk_size=BATCH_SIZE):
+        raw = user.phone_number
+        value = normalize_phone(raw)
+        if value is None and raw and raw.strip():
+            conflicts.append(PhoneNumberConflict(user_id=user.user_id, phone_number=raw, reason='invalid'))
+            invalid += 1
+        if value != raw:
+            user.phone_number = value
+            changed.append(user)
+        if len(changed) >= BATCH_SIZE:
+            PhoneNumberConflict.objects.bulk_create(conflicts)
+            User.objects.bulk_update(changed, ['phone_number'])
+            changed, conflicts = [], []
+    PhoneNumberConflict.objects.bulk_create(conflicts)
+    User.objects.bulk_update(changed, ['phone_number'])
+
+    duplicates = (
+        User.objects.exclude(phone_number=None)
+        .values('phone_number')
+        .annotate(total=Count('user_id'))
+        .filter(total__gt=1)
+        .values_list('phone_number', flat=True)
+    )
+    duplicated = 0
+    for phone_number in list(duplicates):
+        owners = list(
+            User.objects.filter(phone_number=phone_number)
+            .order_by('create_time', 'user_id')
+            .values_list('user_id', flat=True)
+        )
+        keep, others = owners[0], owners[1:]
+        PhoneNumberConflict.objects.bulk_create(
+            PhoneNumberConflict(user_id=user_id, phone_number=phone_number, reason='duplicate', kept_by=keep)
+            for user_id in others
+        )
+        User.objects.filter(user_id__in=others).update(phone_number=None)
+        duplicated += len(others)
+
+    if invalid or duplicated:
+        print(f'\n  手机号规范化：{invalid} 个无法识别、{duplicated} 个重复的号码已置为NULL，'
+              f'原值见 user_phone_conflict 表', end='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_user_create_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhoneNumberConflict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.IntegerField(db_index=True, verbose_name='用户ID')),
+                ('phone_number', models.CharField(max_length=20, verbose_name='被清空的号码')),
+                ('reason', models.CharField(choices=[('duplicate', '规范化后重复'), ('invalid', '无法识别')], max_length=10, verbose_name='原因')),
+                ('kept_by', models.IntegerField(blank=True, null=True, verbose_name='保留该号码的用户ID')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='记录时间')),
+            ],
+            options={
+                'verbose_name': '手机号冲突',
+                'verbose_name_plural': '手机号冲突',
+                'db_table': 'user_phone_conflict',
+            },
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='phone_number',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='电话号码'),
+        ),
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='phone_number',
+            field=models.CharField(blank=True, max_length=20, null=True, unique=True, verbose_name='电话号码'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from utils.blobstore import BlobError, icon_store, is_inline_image, iter_inline_image, make_reference
+
+BATCH_SIZE = 500
+
+
+def move_inline_icons(apps, schema_editor):
+    """
+    按user_id分批把内联头像（data URL/base64）转存到icon_store，用户表只保留 blob:<sha256>
+    无法解码且超过500字符的旧值置为NULL
+    """
+    User = apps.get_model('user', 'User')
+    queryset = (
+        User.objects.annotate(icon_length=Length('user_icon'))
+        .filter(Q(user_icon__startswith='data:') | Q(icon_length__gt=500))
+        .only('user_id', 'user_icon')
+        .order_by('user_id')
+    )
+    last_id = None
+    while True:
+        batch = list((queryset if last_id is None else queryset.filter(user_id__gt=last_id))[:BATCH_SIZE])
+        if not batch:
+            return
+        for user in batch:
+            reference = None
+            if is_inline_image(user.user_icon):
+                try:
+                    reference = make_reference(icon_store.save(iter_inline_image(user.user_icon)))
+                except BlobError:
+                    reference = None
+            user.user_icon = reference
+        User.objects.bulk_update(batch, ['user_icon'])
+        last_id = batch[-1].user_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_normalize_phone_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_inline_icons, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='user_icon',
+            field=models.CharField(blank=True, max_length=500, null=True, verbose_name='用户头像'),
+        ),
+    ]
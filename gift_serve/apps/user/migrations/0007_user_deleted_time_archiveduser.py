@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_move_user_icon_to_blob_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted_time',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='删除时间'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_deleted', 'deleted_time'], name='user_deleted_time_idx'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedUser',
+            fields=[
+                ('user_icon', models.CharField(blank=True, max_length=500, null=True, verbose_name='用户头像')),
+                ('age', models.IntegerField(blank=True, null=True, verbose_name='用户年龄')),
+                ('birthday', models.DateField(blank=True, null=True, verbose_name='用户生日')),
+                ('gender', models.SmallIntegerField(choices=[(1, '男'), (2, '女'), (0, '未知')], default=0, verbose_name='用户性别')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='是否删除')),
+                ('deleted_time', models.DateTimeField(blank=True, null=True, verbose_name='删除时间')),
+                ('password', models.CharField(max_length=128, verbose_name='密码')),
+                ('token_version', models.PositiveIntegerField(default=0, verbose_name='Token版本')),
+                ('user_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='用户ID')),
+                ('username', models.CharField(db_index=True, max_length=50, verbose_name='用户名')),
+                ('phone_number', models.CharField(blank=True, max_length=20, null=True, verbose_name='电话号码')),
+                ('create_time', models.DateTimeField(verbose_name='创建时间')),
+                ('archived_time', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '已归档用户',
+                'verbose_name_plural': '已归档用户',
+                'db_table': 'user_archive',
+            },
+        ),
+    ]
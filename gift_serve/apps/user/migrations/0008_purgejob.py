@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0007_user_deleted_time_archiveduser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('job_id', models.AutoField(primary_key=True, serialize=False, verbose_name='任务ID')),
+                ('user_id', models.IntegerField(db_index=True, verbose_name='用户ID')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '执行中'), ('done', '已完成'), ('failed', '失败')], default='pending', max_length=10, verbose_name='状态')),
+                ('total_relationships', models.IntegerField(blank=True, null=True, verbose_name='待删除关联数')),
+                ('deleted_relationships', models.IntegerField(default=0, verbose_name='已删除关联数')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='执行次数')),
+                ('error', models.TextField(blank=True, default='', verbose_name='错误信息')),
+                ('created_time', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_time', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('finished_time', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+            ],
+            options={
+                'verbose_name': '用户清除任务',
+                'verbose_name_plural': '用户清除任务',
+                'db_table': 'user_purge_job',
+                'indexes': [models.Index(fields=['status', 'updated_time'], name='user_purge_job_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:10
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def fill_deleted_time(apps, schema_editor):
+    """0007之前软删除的用户没有删除时间，按迁移时间补齐，使其进入归档的等待期"""
+    User = apps.get_model('user', 'User')
+    User.objects.filter(is_deleted=True, deleted_time__isnull=True).update(deleted_time=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_purgejob'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_deleted_time, migrations.RunPython.noop),
+    ]
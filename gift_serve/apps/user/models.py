@@ -1,13 +1,14 @@
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
 
-class User(models.Model):
-    # 自定义主键user_id，从10000开始自增
-    user_id = models.AutoField(primary_key=True, verbose_name='用户ID', default=10000)
+class UserBase(models.Model):
+    """用户表与归档表共用的字段"""
     # 基本信息字段
     username = models.CharField(max_length=50, unique=True, verbose_name='用户名')
-    user_icon = models.TextField(null=True, blank=True, verbose_name='用户头像')
+    # 头像引用：blob:<sha256>（图片存放在utils.blobstore.icon_store）或外部URL
+    user_icon = models.CharField(max_length=500, null=True, blank=True, verbose_name='用户头像')
 
     age = models.IntegerField(verbose_name='用户年龄', null=True, blank=True)
     birthday = models.DateField(verbose_name='用户生日', null=True, blank=True)
@@ -22,15 +23,145 @@ class User(models.Model):
     create_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     # 删除标识
     is_deleted = models.BooleanField(default=False, verbose_name='是否删除')
-    phone_number = models.CharField(max_length=20, blank=True, verbose_name='电话号码')
+    # 软删除时间，归档任务据此挑选长期删除的用户
+    deleted_time = models.DateTimeField(null=True, blank=True, verbose_name='删除时间')
+    # 规范化的11位手机号（见utils.phone.normalize_phone），唯一索引；未填写为NULL
+    phone_number = models.CharField(max_length=20, null=True, blank=True, unique=True, verbose_name='电话号码')
     # 新增密码字段 - 使用Django内置加密
     password = models.CharField(max_length=128, verbose_name='密码')  # 长度128用于存储哈希值
+    # Token版本号，递增后该用户此前签发的所有Token失效
+    token_version = models.PositiveIntegerField(default=0, verbose_name='Token版本')
+
+    class Meta:
+        abstract = True
+
+
+class LiveUserManager(models.Manager):
+    """未删除的用户"""
+
+    # 被基础过滤条件排除的行，分页总数据此由表的估算行数扣除（见utils.counting）
+    estimate_complement = Q(is_deleted=True)
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class User(UserBase):
+    # 自定义主键user_id，从10000开始自增
+    user_id = models.AutoField(primary_key=True, verbose_name='用户ID', default=10000)
+
+    objects = models.Manager()
+    live = LiveUserManager()
 
     class Meta:
         db_table = 'user'
         verbose_name = '用户'
         verbose_name_plural = '用户列表'
         ordering = ['-create_time']
+        indexes = [
+            # 游标分页排序键
+            models.Index(fields=['create_time', 'user_id'], name='user_create_time_id_idx'),
+            # 归档任务扫描长期删除的用户
+            models.Index(fields=['is_deleted', 'deleted_time'], name='user_deleted_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.username} (ID: {self.user_id})"
+
+
+class ArchivedUser(UserBase):
+    """
+    已归档用户（冷数据），结构与user表一致
+    用户名、手机号可能已被新用户使用，归档表中不要求唯一
+    """
+    user_id = models.IntegerField(primary_key=True, verbose_name='用户ID')
+    username = models.CharField(max_length=50, db_index=True, verbose_name='用户名')
+    phone_number = models.CharField(max_length=20, null=True, blank=True, verbose_name='电话号码')
+    # 归档时原样保留创建时间
+    create_time = models.DateTimeField(verbose_name='创建时间')
+    archived_time = models.DateTimeField(auto_now_add=True, verbose_name='归档时间')
+
+    class Meta:
+        db_table = 'user_archive'
+        verbose_name = '已归档用户'
+        verbose_name_plural = '已归档用户'
+
+    def __str__(self):
+        return f"{self.username} (ID: {self.user_id}, 已归档)"
+
+
+class PhoneNumberConflict(models.Model):
+    """迁移0005规范化手机号时被清空的号码（规范化后重复或无法识别），保留原值供人工核对、恢复"""
+    REASON_DUPLICATE = 'duplicate'
+    REASON_INVALID = 'invalid'
+    REASON_CHOICES = (
+        (REASON_DUPLICATE, '规范化后重复'),
+        (REASON_INVALID, '无法识别'),
+    )
+
+    user_id = models.IntegerField(db_index=True, verbose_name='用户ID')
+    phone_number = models.CharField(max_length=20, verbose_name='被清空的号码')
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES, verbose_name='原因')
+    # 重复号码由最早注册的用户保留
+    kept_by = models.IntegerField(null=True, blank=True, verbose_name='保留该号码的用户ID')
+    created_time = models.DateTimeField(auto_now_add=True, verbose_name='记录时间')
+
+    class Meta:
+        db_table = 'user_phone_conflict'
+        verbose_name = '手机号冲突'
+        verbose_name_plural = '手机号冲突'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.phone_number} ({self.reason})"
+
+
+class PurgeJob(models.Model):
+    """彻底删除用户的后台任务：销毁接口只标记用户并创建任务，关联数据由后台分块删除"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, '等待中'),
+        (STATUS_RUNNING, '执行中'),
+        (STATUS_DONE, '已完成'),
+        (STATUS_FAILED, '失败'),
+    )
+
+    job_id = models.AutoField(primary_key=True, verbose_name='任务ID')
+    # 用户行在任务完成时删除，不设外键
+    user_id = models.IntegerField(db_index=True, verbose_name='用户ID')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name='状态')
+    total_relationships = models.IntegerField(null=True, blank=True, verbose_name='待删除关联数')
+    deleted_relationships = models.IntegerField(default=0, verbose_name='已删除关联数')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='执行次数')
+    error = models.TextField(blank=True, default='', verbose_name='错误信息')
+    created_time = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    # 执行中每块更新一次，长时间未更新说明执行进程已退出，可被重新领取
+    updated_time = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    finished_time = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+
+    class Meta:
+        db_table = 'user_purge_job'
+        verbose_name = '用户清除任务'
+        verbose_name_plural = '用户清除任务'
+        indexes = [
+            models.Index(fields=['status', 'updated_time'], name='user_purge_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.user_id} ({self.status})"
+
+
+class IdSequence(models.Model):
+    """ID序列表，各进程按块预留ID（hi/lo），分配时无需查询最大ID"""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='序列名称')
+    next_value = models.BigIntegerField(verbose_name='下一个可分配的值')
+
+    class Meta:
+        db_table = 'id_sequence'
+        verbose_name = 'ID序列'
+        verbose_name_plural = 'ID序列'
 
     def __str__(self):
-        return f"{self.username} (ID: {self.user_id})"
\ No newline at end of file
+        return f"{self.name}: {self.next_value}"
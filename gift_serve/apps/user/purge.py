@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.search.index import search_index
+from apps.search.models import NgramEntry
+from apps.tag.counters import tag_counters
+from apps.tag.models import UserTagRelationship
+from utils.counting import count_cache
+from .cache import user_profile_cache
+from .models import PurgeJob, User
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_STATUSES = (PurgeJob.STATUS_PENDING, PurgeJob.STATUS_RUNNING)
+
+
+def raw_delete(model, pks: Iterable) -> int:
+    """按主键直接执行DELETE，不经过Collector（不加载对象、不级联、不发信号）"""
+    pks = list(pks)
+    if not pks:
+        return 0
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            pks,
+        )
+        return cursor.rowcount
+
+
+def drop_search_entries(model, pks: Iterable) -> None:
+    """删除对象的n-gram索引（原始DELETE不触发post_delete）"""
+    if model in search_index.registered_models():
+        NgramEntry.objects.filter(source__in=search_index.sources(model), object_id__in=list(pks)).delete()
+
+
+class UserPurger:
+    """
+    用户彻底删除的后台执行器
+    - 销毁接口只标记删除并创建PurgeJob，立即返回
+    - 关联按主键分块用原始DELETE删除，每块一个短事务并更新进度，块之间暂停sleep秒
+    - 关联删完后删除用户行；任务由本进程的后台线程或run_purge_jobs命令领取执行
+    - 执行中的任务超过stale_after秒未更新视为执行进程已退出，可被重新领取
+    """
+
+    def __init__(self, chunk_size: int = 1000, sleep: float = 0.05, in_process: bool = True,
+                 poll_interval: float = 30, stale_after: int = 300, max_attempts: int = 3):
+        self.chunk_size = chunk_size
+        self.sleep = sleep
+        self.in_process = in_process
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def enqueue(self, user_id: int) -> PurgeJob:
+        """创建清除任务；该用户已有未完成的任务时直接返回"""
+        job = PurgeJob.objects.filter(user_id=user_id, status__in=UNFINISHED_STATUSES).first()
+        if job is None:
+            job = PurgeJob.objects.create(user_id=user_id)
+        transaction.on_commit(self.wake)
+        return job
+
+    def claim(self) -> Optional[PurgeJob]:
+        """领取一个待执行或已失联的任务，多个执行者并发领取时用条件更新保证只有一个成功"""
+        stale = timezone.now() - timedelta(seconds=self.stale_after)
+        candidates = PurgeJob.objects.filter(
+            Q(status=PurgeJob.STATUS_PENDING) | Q(status=PurgeJob.STATUS_RUNNING, updated_time__lt=stale),
+            attempts__lt=self.max_attempts,
+        ).order_by('job_id')
+        for job in candidates[:10]:
+            claimed = PurgeJob.objects.filter(
+                pk=job.pk, status=job.status, updated_time=job.updated_time
+            ).update(status=PurgeJob.STATUS_RUNNING, attempts=F('attempts') + 1, updated_time=timezone.now())
+            if claimed:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def run(self, job: PurgeJob) -> None:
+        try:
+            self._purge(job)
+        except Exception as e:
+            logger.exception('清除用户 %s 失败', job.user_id)
+            status = PurgeJob.STATUS_FAILED if job.attempts >= self.max_attempts else PurgeJob.STATUS_PENDING
+            PurgeJob.objects.filter(pk=job.pk).update(status=status, error=str(e), updated_time=timezone.now())
+
+    def _purge(self, job: PurgeJob) -> None:
+        relationships = UserTagRelationship.objects.filter(user_id=job.user_id)
+        if job.total_relationships is None:
+            job.total_relationships = relationships.count()
+            PurgeJob.objects.filter(pk=job.pk).update(
+                total_relationships=job.total_relationships, updated_time=timezone.now()
+            )
+
+        while True:
+            pks = list(relationships.order_by('pk').values_list('pk', flat=True)[:self.chunk_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                tag_counters.remove(UserTagRelationship.objects.filter(pk__in=pks))
+                deleted = raw_delete(UserTagRelationship, pks)
+                drop_search_entries(UserTagRelationship, pks)
+                PurgeJob.objects.filter(pk=job.pk).update(
+                    deleted_relationships=F('deleted_relationships') + deleted, updated_time=timezone.now()
+                )
+            if self.sleep:
+                time.sleep(self.sleep)
+
+        with transaction.atomic():
+            # 用户被恢复（取消删除）时不再删除用户行
+            user_ids = list(
+                User.objects.select_for_update().filter(pk=job.user_id, is_deleted=True).values_list('pk', flat=True)
+            )
+            # 清除期间新写入的关联（锁住用户后不会再增加）
+            remaining = list(relationships.values_list('pk', flat=True))
+            tag_counters.remove(UserTagRelationship.objects.filter(pk__in=remaining))
+            raw_delete(UserTagRelationship, remaining)
+            drop_search_entries(UserTagRelationship, remaining)
+            raw_delete(User, user_ids)
+            drop_search_entries(User, user_ids)
+            PurgeJob.objects.filter(pk=job.pk).update(
+                status=PurgeJob.STATUS_DONE,
+                deleted_relationships=F('deleted_relationships') + len(remaining),
+                error='',
+                updated_time=timezone.now(),
+                finished_time=timezone.now(),
+            )
+            transaction.on_commit(lambda: user_profile_cache.invalidate(job.user_id))
+            transaction.on_commit(lambda: count_cache.bump(User, UserTagRelationship))
+
+    def run_pending(self, limit: Optional[int] = None) -> int:
+        """依次执行可领取的任务，返回执行的任务数"""
+        processed = 0
+        while limit is None or processed < limit:
+            job = self.claim()
+            if job is None:
+                break
+            self.run(job)
+            processed += 1
+        return processed
+
+    def wake(self) -> None:
+        """通知后台线程有新任务（未启用进程内执行时只依赖run_purge_jobs命令）"""
+        if not self.in_process:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='user-purge', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception('执行用户清除任务失败')
+            finally:
+                close_old_connections()
+            self._wakeup.wait(self.poll_interval)
+
+
+_purge_config = getattr(settings, 'PURGE_CONFIG', {})
+user_purger = UserPurger(
+    chunk_size=_purge_config.get('CHUNK_SIZE', 1000),
+    sleep=_purge_config.get('SLEEP', 0.05),
+    in_process=_purge_config.get('IN_PROCESS', True),
+    poll_interval=_purge_config.get('POLL_INTERVAL', 30),
+    stale_after=_purge_config.get('STALE_AFTER', 300),
+    max_attempts=_purge_config.get('MAX_ATTEMPTS', 3),
+)
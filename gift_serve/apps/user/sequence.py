@@ -0,0 +1,56 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import IdSequence
+
+
+class BlockIdAllocator:
+    """
+    hi/lo ID分配器
+    - 每个进程从id_sequence表一次预留block_size个ID，之后在内存中递增分配
+    - 预留时对序列行加行锁，多进程、多线程并发分配不会冲突
+    - 进程重启会丢弃未用完的ID，ID可能不连续
+    """
+
+    def __init__(self, name: str, block_size: int = 100, start: int = 1):
+        self.name = name
+        self.block_size = block_size
+        self.start = start
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+        self._pid = None
+
+    def next_id(self) -> int:
+        """分配一个ID"""
+        with self._lock:
+            # fork出的子进程不能沿用父进程已预留的ID段
+            if self._pid != os.getpid() or self._next >= self._limit:
+                block = self.reserve(self.block_size)
+                self._next, self._limit = block.start, block.stop
+                self._pid = os.getpid()
+            value = self._next
+            self._next += 1
+            return value
+
+    def reserve(self, size: int) -> range:
+        """从数据库预留size个连续ID（批量导入可直接使用）"""
+        with transaction.atomic():
+            sequence = IdSequence.objects.select_for_update().filter(name=self.name).first()
+            if sequence is None:
+                IdSequence.objects.get_or_create(name=self.name, defaults={'next_value': self.start})
+                sequence = IdSequence.objects.select_for_update().get(name=self.name)
+            first = sequence.next_value
+            IdSequence.objects.filter(name=self.name).update(next_value=F('next_value') + size)
+        return range(first, first + size)
+
+
+user_id_allocator = BlockIdAllocator(
+    'user',
+    block_size=getattr(settings, 'USER_ID_BLOCK_SIZE', 100),
+    start=10000,
+)
@@ -1,11 +1,14 @@
 from rest_framework import serializers
 
 from utils.encrypt import PasswordEncryptor
+from utils.fieldsets import SparseFieldsMixin
+from utils.phone import normalize_phone
 from apps.user.models import User
 from django.utils import timezone
+from .icon import InlineIconMixin, UserIconField, UserIconThumbnailsField
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InlineIconMixin, SparseFieldsMixin, serializers.ModelSerializer):
     # 自定义时间序列化格式
     create_time = serializers.DateTimeField(
         format='%Y-%m-%d %H:%M:%S',
@@ -13,6 +16,9 @@ class UserSerializer(serializers.ModelSerializer):
         default=timezone.now
     )
     birthday = serializers.DateField(format='%Y-%m-%d',default=None)
+    # 头像输出为URL，内联图片在保存时转存
+    user_icon = UserIconField()
+    user_icon_thumbnails = UserIconThumbnailsField()
 
     # 显示性别选择项的显示值而非数字
     gender_display = serializers.CharField(
@@ -22,13 +28,27 @@ class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = '__all__'
+        # Token版本号只用于服务端校验，不对外输出
+        exclude = ['token_version']
         # fields = ['username', 'password',  'phone_number', 'age', 'gender']
         read_only_fields = ['user_id', 'create_time']
         extra_kwargs = {
             'username': {'required': True},
-            'password': { 'required': True},
-            'phone_number': {'required': True}
+            # 密码哈希只写不读
+            'password': {'required': True, 'write_only': True},
+            'phone_number': {'required': True, 'validators': []}
         }
 
+    def validate_phone_number(self, value):
+        """保存规范化后的手机号，并按规范化结果校验唯一性"""
+        value = normalize_phone(value)
+        if value is None:
+            raise serializers.ValidationError("手机号码格式不正确")
+        others = User.objects.filter(phone_number=value)
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError("手机号码已被注册")
+        return value
+
 
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+
+from .update import UserUpdateSerializer
+
+
+class BatchUserUpdateItemSerializer(UserUpdateSerializer):
+    """
+    批量更新中的单个条目
+    用户名、手机号的唯一性由批量接口对整批统一查询校验，这里不逐条查库
+    """
+
+    class Meta(UserUpdateSerializer.Meta):
+        extra_kwargs = {
+            **UserUpdateSerializer.Meta.extra_kwargs,
+            'username': {'required': False, 'allow_blank': False, 'validators': []},
+        }
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        user_id = self.initial_data.get('user_id')
+        try:
+            self.user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({'user_id': '缺少user_id或格式不正确'})
+        return attrs
+
+
+class BatchUserUpdateSerializer(serializers.Serializer):
+    """批量更新请求：{"users": [{"user_id": 1, "age": 20}, ...]}"""
+    users = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000)
+
+
+class BatchUserDeleteSerializer(serializers.Serializer):
+    """批量软删除请求：{"user_ids": [1, 2, 3]}"""
+    user_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
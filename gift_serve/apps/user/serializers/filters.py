@@ -1,10 +1,14 @@
 # filters.py
 import django_filters
+from apps.search.filters import SubstringFilter
 from apps.user.models import User
 
 
 class UserFilter(django_filters.FilterSet):
-    username = django_filters.CharFilter(field_name='username', lookup_expr='contains')
+    # 模糊查询走n-gram索引
+    username = SubstringFilter(field_name='username')
+    username__contains = SubstringFilter(field_name='username')
+    phone_number__contains = SubstringFilter(field_name='phone_number')
 
     class Meta:
         model = User
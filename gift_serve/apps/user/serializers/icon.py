@@ -0,0 +1,89 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from utils.blobstore import BlobError, icon_store, is_inline_image, iter_inline_image, make_reference, parse_reference
+
+
+def icon_url(value, size=None):
+    """头像引用转换为URL：blob:<sha256> 转为不可变地址，外部URL原样返回"""
+    digest = parse_reference(value)
+    if digest is None:
+        return value or None
+    if size is None:
+        return reverse('user-icon', kwargs={'digest': digest})
+    return reverse('user-icon-thumbnail', kwargs={'digest': digest, 'size': size})
+
+
+class InlineIcon(str):
+    """校验通过、尚未写入icon_store的内联图片，由store_inline_icon在保存时转存"""
+
+
+def store_inline_icon(data, field='user_icon'):
+    """把validated_data中的内联图片写入icon_store，替换为 blob:<sha256>"""
+    value = data.get(field)
+    if isinstance(value, InlineIcon):
+        data[field] = make_reference(icon_store.save(iter_inline_image(value)))
+    return data
+
+
+class InlineIconMixin:
+    """
+    ModelSerializer的create/update前转存内联头像
+    只有通过全部校验并真正保存的请求才会写入icon_store，校验失败不留下孤立文件
+    """
+
+    def create(self, validated_data):
+        return super().create(store_inline_icon(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, store_inline_icon(validated_data))
+
+
+class UserIconField(serializers.CharField):
+    """
+    头像字段
+    - 写入：data URL/base64内联图片校验后返回InlineIcon，保存时（InlineIconMixin）转存到icon_store，
+      用户表只保存 blob:<sha256>；也接受上传接口返回的 blob:<sha256> 引用或 http(s) 地址
+    - 输出：不可变的头像URL
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('trim_whitespace', False)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if is_inline_image(value):
+            try:
+                icon_store.check(iter_inline_image(value))
+            except BlobError as e:
+                raise serializers.ValidationError(str(e))
+            return InlineIcon(value)
+
+        digest = parse_reference(value)
+        if digest is not None:
+            if not icon_store.exists(digest):
+                raise serializers.ValidationError('头像不存在，请重新上传')
+            return value
+        if value.startswith(('http://', 'https://')) and len(value) <= 500:
+            return value
+        raise serializers.ValidationError('头像格式不正确')
+
+    def to_representation(self, value):
+        return icon_url(value)
+
+
+class UserIconThumbnailsField(serializers.Field):
+    """各尺寸缩略图URL，如 {"64": "/api/icons/<sha256>/64/"}"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'user_icon')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if parse_reference(value) is None:
+            return {}
+        return {str(size): icon_url(value, size) for size in icon_store.thumbnail_sizes}
@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from apps.user.models import PurgeJob
+
+
+class PurgeJobSerializer(serializers.ModelSerializer):
+    """清除任务进度"""
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PurgeJob
+        fields = [
+            'job_id', 'user_id', 'status', 'total_relationships', 'deleted_relationships',
+            'progress', 'attempts', 'error', 'created_time', 'updated_time', 'finished_time',
+        ]
+
+    def get_progress(self, obj):
+        """完成比例（0-1），尚未统计总数时为None"""
+        if obj.status == PurgeJob.STATUS_DONE:
+            return 1.0
+        if not obj.total_relationships:
+            return None if obj.total_relationships is None else 0.0
+        return round(min(obj.deleted_relationships / obj.total_relationships, 1.0), 4)
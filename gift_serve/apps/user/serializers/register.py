@@ -1,8 +1,12 @@
 from apps.user.models import User
+from apps.user.sequence import user_id_allocator
 from utils.encrypt import PasswordEncryptor
+from utils.phone import normalize_phone
 from .base import UserSerializer
+from .icon import InlineIconMixin, UserIconField
 from rest_framework import serializers
-class UserRegisterSerializer(serializers.ModelSerializer):
+class UserRegisterSerializer(InlineIconMixin, serializers.ModelSerializer):
+    user_icon = UserIconField()
 
     class Meta:
         model = User
@@ -14,26 +18,22 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             'birthday': {'required': False},
             'age': {'required': False},
             'gender': {'required': False},
-            'phone_number': {'required': True},
+            # 唯一性在validate_phone_number中按规范化后的号码校验
+            'phone_number': {'required': True, 'validators': []},
             'password': {'required': True},
         }
 
     def validate_phone_number(self, value):
-        import re
-        if not re.match(r'^1[3-9]\d{9}$', value):
+        value = normalize_phone(value)
+        if value is None:
             raise serializers.ValidationError("手机号码格式不正确")
         if User.objects.filter(phone_number=value).exists():
             raise serializers.ValidationError("手机号码已被注册")
         return value
 
     def create(self, validated_data):
-        """创建用户时自动设置user_id从10000开始"""
-        # 获取当前最大的user_id
-        last_user = User.objects.all().order_by('-user_id').first()
-        if last_user:
-            validated_data['user_id'] = last_user.user_id + 1
-        else:
-            validated_data['user_id'] = 10000
+        """创建用户时从ID序列分配user_id（从10000开始，无需查询当前最大值）"""
+        validated_data['user_id'] = user_id_allocator.next_id()
         plain_password = validated_data['password']
         validated_data['password'] = PasswordEncryptor.set_password(plain_password)
         return super().create(validated_data)
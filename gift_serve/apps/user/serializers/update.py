@@ -1,6 +1,8 @@
 from .base import UserSerializer
+from .icon import UserIconField
 from rest_framework import serializers
 
+from utils.phone import normalize_phone
 from ..models import User
 
 
@@ -12,6 +14,7 @@ class UserUpdateSerializer(serializers.ModelSerializer):  # 继承原序列化
 
     # 如果原序列化器已包含所有你需要的字段（username, birthday, age, gender, phone_number），
     # 你只需要重写 Meta 类或添加新的验证即可。
+    user_icon = UserIconField()
 
     class Meta:  # 继承原序列化器的Meta类
         user_id = serializers.IntegerField(required=True, write_only=True)
@@ -23,9 +26,16 @@ class UserUpdateSerializer(serializers.ModelSerializer):  # 继承原序列化
             'user_icon': {'required': False},
             'age': {'required': False},
             'gender': {'required': False},
-            'phone_number': {'required': False, 'allow_blank': False}
+            # 唯一性在实际更新时由UserSerializer按规范化后的号码校验
+            'phone_number': {'required': False, 'allow_blank': False, 'validators': []}
         }
 
+    def validate_phone_number(self, value):
+        value = normalize_phone(value)
+        if value is None:
+            raise serializers.ValidationError("手机号码格式不正确")
+        return value
+
     def validate(self, attrs):
         received_fields = set(self.initial_data.keys())
         allowed_fields = set(self.fields.keys())
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import user_profile_cache
+from .models import User
+
+
+@receiver(post_save, sender=User, dispatch_uid='user_profile_cache_save')
+def invalidate_profile_cache(sender, instance, raw=False, **kwargs):
+    """
+    事务提交后使资料缓存失效，由下次读取回填
+    不直接写入保存后的数据：并发的两次保存提交顺序与回调执行顺序可能不同，后执行的旧数据会覆盖新数据
+    """
+    if not raw:
+        user_id = instance.pk
+        transaction.on_commit(lambda: user_profile_cache.invalidate(user_id))
+
+
+@receiver(post_delete, sender=User, dispatch_uid='user_profile_cache_delete')
+def drop_profile_cache(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: user_profile_cache.invalidate(user_id))
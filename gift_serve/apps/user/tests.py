@@ -1,3 +1,384 @@
-from django.test import TestCase
+import importlib
+import io
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import jwt
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django_redis import get_redis_connection
+
+from utils.blobstore import BlobStore, pillow_available
+from utils.bloom import BloomFilter
+from utils.encrypt import PasswordEncryptor
+from utils.phone import normalize_phone
+from utils.ratelimit import LocalTokenBuckets, RateLimiter, rate_limiter
+from utils.testing import requires_redis, requires_row_locks
+from utils.token import TokenManager
+from utils.token_cache import REVOKED_JTI_SET_KEY, user_epoch_cache, verified_token_cache
+from .cache import UserProfileCache, user_profile_cache
+from .models import User
+from .serializers.base import UserSerializer
+from .sequence import BlockIdAllocator
+
+
+class BlockIdAllocatorTests(TransactionTestCase):
+    """hi/lo ID分配器：多线程、多个分配器实例（相当于多进程）分配的ID不重复"""
+
+    @requires_row_locks
+    def test_concurrent_allocation_has_no_duplicates(self):
+        # 两个实例共用同一序列，模拟两个进程；块很小以便频繁预留
+        allocators = [BlockIdAllocator('test_concurrent', block_size=7, start=100) for _ in range(2)]
+        results = []
+        errors = []
+
+        def allocate(allocator):
+            try:
+                results.append([allocator.next_id() for _ in range(50)])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=allocate, args=(allocators[i % 2],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        ids = [value for chunk in results for value in chunk]
+        self.assertEqual(len(ids), 400)
+        self.assertEqual(len(set(ids)), 400)
+        self.assertGreaterEqual(min(ids), 100)
+
+    def test_reserve_returns_disjoint_ranges(self):
+        allocator = BlockIdAllocator('test_reserve', block_size=5, start=1)
+        first = allocator.next_id()
+        block = allocator.reserve(100)
+        self.assertEqual(len(block), 100)
+        self.assertNotIn(first, block)
+        self.assertTrue(set(block).isdisjoint(allocator.next_id() for _ in range(10)))
+
+
+class NormalizePhoneMigrationTests(TransactionTestCase):
+    """迁移0005：重复和无法识别的号码写入冲突表后再置为NULL"""
+
+    migrate_from = [('user', '0004_user_create_time_id_idx')]
+    migrate_to = [('user', '0005_normalize_phone_number')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        # 迁移会输出冲突统计
+        with redirect_stdout(io.StringIO()):
+            executor.migrate(self.migrate_to)
+        return executor.loader.project_state(self.migrate_to).apps
+
+    def test_conflicts_are_kept_in_side_table(self):
+        User = self.old_apps.get_model('user', 'User')
+        for user_id, phone_number in (
+            (10001, '+86 138-0000-0001'), (10002, '13800000001'), (10003, '8613800000001'),
+            (10004, 'unknown'), (10005, ''), (10006, '139 0000 0002'),
+        ):
+            User.objects.create(user_id=user_id, username=f'phone_{user_id}', password='x', phone_number=phone_number)
+
+        apps = self.migrate()
+        User = apps.get_model('user', 'User')
+        self.assertEqual(dict(User.objects.values_list('user_id', 'phone_number')), {
+            10001: '13800000001', 10002: None, 10003: None, 10004: None, 10005: None, 10006: '13900000002',
+        })
+        conflicts = apps.get_model('user', 'PhoneNumberConflict').objects.order_by('user_id')
+        self.assertEqual(
+            list(conflicts.values_list('user_id', 'phone_number', 'reason', 'kept_by')),
+            [
+                (10002, '13800000001', 'duplicate', 10001),
+                (10003, '13800000001', 'duplicate', 10001),
+                (10004, 'unknown', 'invalid', None),
+            ],
+        )
+
+    def test_vendored_normalizer_matches_utils(self):
+        migration = importlib.import_module('apps.user.migrations.0005_normalize_phone_number')
+        for value in (None, '', '13800000001', '+86 138 0000 0001', '0086-138-0000-0001',
+                      '8613800000001', '(138)00000001', '12800000001', '1380000000', 'abc'):
+            self.assertEqual(migration.normalize_phone(value), normalize_phone(value), value)
+
+
+class BlobStoreThumbnailTests(SimpleTestCase):
+    """缩略图：生成失败或未安装Pillow时不能用原图代替"""
+
+    def setUp(self):
+        self.root = self.enterContext(tempfile.TemporaryDirectory())
+
+    @skipUnless(pillow_available(), '需要Pillow')
+    def test_thumbnails_are_generated(self):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (200, 100), 'red').save(buffer, format='PNG')
+        store = BlobStore(self.root, thumbnail_sizes=(64,))
+        digest = store.save([buffer.getvalue()])
+
+        with store.open(digest, 64) as f, Image.open(f) as thumbnail:
+            self.assertEqual(thumbnail.size, (64, 32))
+        # 临时文件都已改名
+        self.assertEqual(sorted(os.listdir(os.path.dirname(store.path(digest)))), [digest, f'{digest}_64'])
+
+    @skipUnless(pillow_available(), '需要Pillow')
+    def test_undecodable_image_has_no_thumbnail(self):
+        store = BlobStore(self.root, thumbnail_sizes=(64,))
+        with self.assertLogs('utils.blobstore', 'WARNING'):
+            digest = store.save([b'\x89PNG\r\n\x1a\n' + b'broken' * 10])
+        with store.open(digest) as f:
+            self.assertTrue(f.read().startswith(b'\x89PNG'))
+        with self.assertLogs('utils.blobstore', 'WARNING'), self.assertRaises(FileNotFoundError):
+            store.open(digest, 64)
+
+    def test_thumbnails_disabled_without_pillow(self):
+        with mock.patch('utils.blobstore.pillow_available', return_value=False), \
+                self.assertLogs('utils.blobstore', 'WARNING'):
+            store = BlobStore(self.root, thumbnail_sizes=(64, 128))
+        self.assertEqual(store.thumbnail_sizes, ())
+
+
+class UserProfileCacheTests(TestCase):
+    """资料缓存：写入提交后失效，回填期间发生的写入不会被旧数据覆盖"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='profile_user', password='x', phone_number='13800000003', age=20)
+        user_profile_cache.invalidate(self.user.user_id)
+
+    def update_age(self, age):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.age = age
+            self.user.save()
+
+    def test_read_through_and_invalidate_on_save(self):
+        self.assertIsNone(user_profile_cache.get(self.user.user_id))
+        self.assertEqual(user_profile_cache.get_or_load(self.user.user_id)['age'], 20)
+        self.assertEqual(user_profile_cache.get(self.user.user_id)['age'], 20)
+
+        self.update_age(21)
+        self.assertIsNone(user_profile_cache.get(self.user.user_id))
+        self.assertEqual(user_profile_cache.get_or_load(self.user.user_id)['age'], 21)
+
+    def test_out_of_order_commit_callbacks(self):
+        first, second = User.objects.get(pk=self.user.pk), User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks() as first_callbacks:
+            first.age = 21
+            first.save()
+        with self.captureOnCommitCallbacks() as second_callbacks:
+            second.age = 22
+            second.save()
+        # 两个进程的提交回调执行顺序与提交顺序相反
+        for callback in second_callbacks + first_callbacks:
+            callback()
+        self.assertEqual(user_profile_cache.get_or_load(self.user.user_id)['age'], 22)
+
+    def test_write_during_load_is_not_overwritten(self):
+        serialize = UserProfileCache.serialize
+
+        def serialize_then_write(user):
+            # 已从数据库读到旧数据，回填缓存之前另一个请求保存并提交
+            data = serialize(user)
+            self.update_age(30)
+            return data
+
+        with mock.patch.object(UserProfileCache, 'serialize', side_effect=serialize_then_write):
+            self.assertEqual(user_profile_cache.get_or_load(self.user.user_id)['age'], 20)
+        self.assertIsNone(user_profile_cache.get(self.user.user_id))
+        self.assertEqual(user_profile_cache.get_or_load(self.user.user_id)['age'], 30)
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f'jti-{i}' for i in range(1000)]
+        bloom.update(items)
+        self.assertTrue(all(item in bloom for item in items))
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        bloom.update(f'jti-{i}' for i in range(1000))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        # 期望约1%，留出余量
+        self.assertLess(false_positives, 300)
+
+
+@override_settings(PASSWORD_HASH_CONFIG=dict(settings.PASSWORD_HASH_CONFIG, ITERATIONS=1000))
+class PasswordRehashTests(SimpleTestCase):
+    """只有迭代次数或算法变化的哈希才需要在登录时重新计算"""
+
+    def test_fresh_hash_does_not_need_rehash(self):
+        encoded = make_password('secret')
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+        self.assertIs(PasswordEncryptor.needs_rehash(encoded), False)
+
+    def test_changed_iterations_need_rehash(self):
+        with self.settings(PASSWORD_HASH_CONFIG=dict(settings.PASSWORD_HASH_CONFIG, ITERATIONS=500)):
+            encoded = make_password('secret')
+        self.assertIs(PasswordEncryptor.needs_rehash(encoded), True)
+        self.assertTrue(PasswordEncryptor.verify_password('secret', encoded))
+
+    def test_legacy_md5_needs_rehash(self):
+        self.assertIs(PasswordEncryptor.needs_rehash(PasswordEncryptor.legacy_md5('secret')), True)
+
+
+class TokenRevocationTests(TestCase):
+    """Token撤销：单个Token登出、用户全部Token失效、删除用户，以及其他进程发布的撤销"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='token_user', password='x', phone_number='13800000001')
+        # Redis不随测试数据库重置，清掉可能残留的同ID用户的版本号
+        cache.delete(user_epoch_cache.key(self.user.user_id))
+        user_epoch_cache.flush()
+        verified_token_cache.clear()
+        # 下次验证时立即同步撤销日志
+        verified_token_cache._next_sync = 0
+
+    def create_token(self, version=0):
+        return TokenManager.create_token(self.user.user_id, self.user.username, token_version=version)
+
+    def test_valid_token(self):
+        token = self.create_token()
+        is_valid, payload = TokenManager.verify_token(token)
+        self.assertTrue(is_valid)
+        self.assertEqual(payload['user_id'], self.user.user_id)
+        # 第二次命中进程内缓存
+        hits = verified_token_cache.hits
+        self.assertTrue(TokenManager.verify_token(token)[0])
+        self.assertEqual(verified_token_cache.hits, hits + 1)
+
+    def test_invalid_token(self):
+        is_valid, result = TokenManager.verify_token(self.create_token() + 'x')
+        self.assertFalse(is_valid)
+        self.assertEqual(result['error'], '无效的Token')
+
+    def test_tokens_are_distinct(self):
+        self.assertNotEqual(self.create_token(), self.create_token())
+
+    @requires_redis
+    def test_blacklisted_token_is_rejected(self):
+        token = self.create_token()
+        is_valid, payload = TokenManager.verify_token(token)
+        self.assertTrue(is_valid)
+
+        self.assertTrue(TokenManager.add_to_blacklist(token, payload))
+        is_valid, result = TokenManager.verify_token(token)
+        self.assertFalse(is_valid)
+        self.assertEqual(result['error'], 'Token已失效')
+        # 同一用户的其他Token不受影响
+        self.assertTrue(TokenManager.verify_token(self.create_token())[0])
+
+    def test_revoke_user_tokens(self):
+        token = self.create_token()
+        self.assertTrue(TokenManager.verify_token(token)[0])
+
+        TokenManager.revoke_user_tokens(self.user.user_id)
+        self.assertFalse(TokenManager.verify_token(token)[0])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+        self.assertTrue(TokenManager.verify_token(self.create_token(version=1))[0])
+
+    def test_deleted_user_is_rejected(self):
+        token = self.create_token()
+        self.assertTrue(TokenManager.verify_token(token)[0])
+
+        TokenManager.revoke_user_tokens(self.user.user_id, deleted=True)
+        is_valid, result = TokenManager.verify_token(self.create_token(version=1))
+        self.assertFalse(is_valid)
+        self.assertEqual(result['error'], '用户不存在或已被删除')
+
+    def test_load_does_not_overwrite_concurrent_bump(self):
+        load_rows = user_epoch_cache._user_queryset
+
+        def load_then_bump(user_ids):
+            # 本进程已从数据库读到旧版本号，写回Redis之前其他进程完成了递增
+            rows = list(load_rows(user_ids))
+            TokenManager.revoke_user_tokens(self.user.user_id)
+            return rows
+
+        with mock.patch.object(user_epoch_cache, '_user_queryset', side_effect=load_then_bump):
+            self.assertEqual(user_epoch_cache.load_many([self.user.user_id]), {self.user.user_id: 1})
+        self.assertEqual(cache.get(user_epoch_cache.key(self.user.user_id)), 1)
+        self.assertFalse(TokenManager.verify_token(self.create_token())[0])
+
+    def test_token_version_is_not_serialized(self):
+        self.assertNotIn('token_version', UserSerializer(self.user).data)
+
+    @requires_redis
+    def test_revocation_from_other_process(self):
+        token = self.create_token()
+        self.assertTrue(TokenManager.verify_token(token)[0])
+        self.assertTrue(TokenManager.verify_token(token)[0])
+
+        # 其他进程拉黑Token并发布撤销事件，本进程的本地缓存和过滤器不知情
+        jti = jwt.decode(token, options={'verify_signature': False})['jti']
+        cache.set(f'blacklist_jti_{jti}', 1, 60)
+        get_redis_connection('default').zadd(REVOKED_JTI_SET_KEY, {jti: int(time.time()) + 60})
+        verified_token_cache.publish_revocation(self.user.user_id, jti)
+
+        verified_token_cache._next_sync = 0
+        is_valid, result = TokenManager.verify_token(token)
+        self.assertFalse(is_valid)
+        self.assertEqual(result['error'], 'Token已失效')
+
+    def test_version_bump_from_other_process(self):
+        token = self.create_token()
+        self.assertTrue(TokenManager.verify_token(token)[0])
+        self.assertTrue(TokenManager.verify_token(token)[0])
+
+        # 其他进程递增版本号并发布撤销事件，本进程的本地缓存不知情
+        User.objects.filter(pk=self.user.pk).update(token_version=F('token_version') + 1)
+        cache.incr(user_epoch_cache.key(self.user.user_id))
+        verified_token_cache.publish_revocation(self.user.user_id)
+
+        verified_token_cache._next_sync = 0
+        is_valid, result = TokenManager.verify_token(token)
+        self.assertFalse(is_valid)
+        self.assertEqual(result['error'], 'Token已失效')
+
+
+class RateLimitTests(TestCase):
+    """客户端限流在JWT认证之前生效；rate、burst配置错误时启动即报错"""
+
+    def test_invalid_rules_rejected(self):
+        for rule in ({'rate': 0, 'burst': 5}, {'rate': 1, 'burst': 0}, {'rate': 'fast', 'burst': 5}):
+            with self.subTest(rule=rule), self.assertRaises(ImproperlyConfigured):
+                RateLimiter({'DEFAULT': rule})
+            with self.subTest(route=rule), self.assertRaises(ImproperlyConfigured):
+                RateLimiter({'ROUTES': [('/api/login/', rule)]})
+        RateLimiter({'DEFAULT': None, 'ROUTES': [('/admin/', None)]})
+
+    def test_unauthenticated_requests_limited(self):
+        rule = {'rate': 0.001, 'burst': 2}
+        with mock.patch.object(rate_limiter, 'default_rule', rule), \
+                mock.patch.object(rate_limiter, '_local', LocalTokenBuckets()):
+            statuses = [
+                self.client.get('/api/tag/tags/', REMOTE_ADDR='10.9.8.7').status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [401, 401, 429])
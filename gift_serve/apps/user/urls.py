@@ -1,17 +1,27 @@
 from django.urls import path
 from .views import (UserListAPIView,UserRegistrationAPIView,LoginView,
                     UserUpdateAPIView,UserUpdatePasswordAPIView,UserDeleteAPIView,
-                    UserDestroyAPIView,LogoutAPIView
+                    UserDestroyAPIView,LogoutAPIView,UserDetailAPIView,CacheStatsAPIView,
+                    UserIconUploadAPIView,UserIconView,
+                    UserBatchUpdateAPIView,UserBatchDeleteAPIView,PurgeJobAPIView
                     )
 
 urlpatterns = [
     path('users/', UserListAPIView.as_view(), name='user-list'),
+    path('users/<int:user_id>/', UserDetailAPIView.as_view(), name='user-detail'),
+    path('cache-stats/', CacheStatsAPIView.as_view(), name='cache-stats'),
+    path('icons/upload/', UserIconUploadAPIView.as_view(), name='user-icon-upload'),
+    path('icons/<str:digest>/', UserIconView.as_view(), name='user-icon'),
+    path('icons/<str:digest>/<int:size>/', UserIconView.as_view(), name='user-icon-thumbnail'),
     path('register/', UserRegistrationAPIView.as_view(), name='user-register'),
     path('login/', LoginView.as_view(), name='login'),
     path('update/', UserUpdateAPIView.as_view(), name='user-update'),
     path('updatepwd/', UserUpdatePasswordAPIView.as_view(), name='update-password'),
     path('delete/', UserDeleteAPIView.as_view(), name='user-delete'),
+    path('batch-update/', UserBatchUpdateAPIView.as_view(), name='user-batch-update'),
+    path('batch-delete/', UserBatchDeleteAPIView.as_view(), name='user-batch-delete'),
     path('destroy/', UserDestroyAPIView.as_view(), name='user-destroy'),
+    path('purge-jobs/<int:job_id>/', PurgeJobAPIView.as_view(), name='user-purge-job'),
     path('logout/', LogoutAPIView.as_view(), name='logout'),
 
 ]
\ No newline at end of file
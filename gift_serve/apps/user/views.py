@@ -1,6 +1,12 @@
 import json
+from collections import defaultdict
 
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Now
+from django.utils import timezone
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.views import View
 from django.shortcuts import render
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
@@ -8,8 +14,19 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from utils.phone import normalize_phone
+from utils.routes import auth_exempt
 from utils.token import TokenManager
-from .models import User
+from utils.blobstore import BlobError, DIGEST_PATTERN, icon_store, make_reference, sniff_content_type
+from utils.counting import count_cache
+from utils.fieldsets import project_queryset, trim_data
+from apps.search.index import search_index
+from apps.tag.autocomplete import tag_autocomplete
+from apps.tag.catalog import tag_catalog
+from apps.gift.recommend import gift_index
+from .cache import user_profile_cache
+from .models import PurgeJob, User
+from .purge import user_purger
 from .serializers.base import UserSerializer
 from .serializers.register import UserRegisterSerializer
 from .serializers.update import UserUpdateSerializer
@@ -17,14 +34,20 @@ from .serializers.filters import UserFilter
 from .serializers.pwd import UserUpdatePwdSerializer
 from .serializers.dele import UserDeleteSerializer
 from .serializers.destroy import UserDestroySerializer
-from utils.encrypt import PasswordEncryptor
+from .serializers.batch import BatchUserDeleteSerializer, BatchUserUpdateItemSerializer, BatchUserUpdateSerializer
+from .serializers.icon import icon_url, store_inline_icon
+from .serializers.purge import PurgeJobSerializer
+from utils.encrypt import PasswordEncryptor, PasswordHashBusy
 from rest_framework.generics import ListAPIView
 from rest_framework.pagination import PageNumberPagination
+from utils.pagination import CountPaginationMixin, KeysetPaginationMixin
 
 
-class StandardPageNumberPagination(PageNumberPagination):
+class StandardPageNumberPagination(KeysetPaginationMixin, CountPaginationMixin, PageNumberPagination):
     """
     自定义分页器，保持与原有响应结构一致
+    视图声明cursor_ordering后，可通过 pagination=cursor / cursor 参数使用游标分页
+    count=false 时不统计总数
     """
     page_size = 20  # 默认每页显示条数
     page_size_query_param = 'size'  # 前端控制每页大小的参数名
@@ -36,13 +59,35 @@ class StandardPageNumberPagination(PageNumberPagination):
         """
         from rest_framework.response import Response
 
+        if self.cursor_page is not None:
+            # 游标模式：总数、页码不计算，通过next_cursor/previous_cursor翻页
+            return Response({
+                'code': 200,
+                'message': '获取用户列表成功',
+                'data': {
+                    'list': data,
+                    'pagination': {
+                        'total': None,
+                        'total_estimated': False,
+                        'page': None,
+                        'size': self.cursor_page['page_size'],
+                        'pages': None,
+                        'has_next': self.cursor_page['has_next'],
+                        'has_previous': self.cursor_page['has_previous'],
+                        'next_cursor': self.cursor_page['next_cursor'],
+                        'previous_cursor': self.cursor_page['previous_cursor'],
+                    }
+                }
+            })
+
         return Response({
             'code': 200,
             'message': '获取用户列表成功',
             'data': {
                 'list': data,  # 分页后的数据
                 'pagination': {
-                    'total': self.page.paginator.count,  # 总记录数
+                    'total': self.page.paginator.count,  # 总记录数（count=false时为None）
+                    'total_estimated': self.is_count_estimated(),  # 总数是否为统计信息估算值
                     'page': self.page.number,  # 当前页码
                     'size': self.get_page_size(self.request),  # 当前页大小
                     'pages': self.page.paginator.num_pages,  # 总页数
@@ -54,16 +99,19 @@ class StandardPageNumberPagination(PageNumberPagination):
 
 # Create your views here.
 class UserListAPIView(ListAPIView):
-    queryset = User.objects.filter(is_deleted=False)
+    queryset = User.live.all()
     serializer_class = UserSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = UserFilter
     pagination_class = StandardPageNumberPagination  # 添加分页器
+    cursor_ordering = ('-create_time', '-user_id')  # 游标分页的排序键
 
     # 可以删除原有的get方法，ListAPIView会自动处理分页
     # 如果希望保持完全控制，可以保留但需要修改：
     def get(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        # ?fields= / ?exclude= 同时裁剪输出字段和查询的列
+        queryset = project_queryset(queryset, self.get_serializer_class(), request, self.cursor_ordering)
         page = self.paginate_queryset(queryset)
 
         if page is not None:
@@ -79,6 +127,103 @@ class UserListAPIView(ListAPIView):
         })
 
 
+class UserDetailAPIView(APIView):
+    """
+    用户资料接口，读取走资料缓存，命中时不访问数据库
+    """
+
+    def get(self, request, user_id):
+        profile = user_profile_cache.get_or_load(user_id)
+        if profile is None or profile.get('is_deleted'):
+            return Response({
+                'code': 404,
+                'message': f'用户不存在 (user_id: {user_id})'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'code': 200,
+            'message': '获取用户信息成功',
+            'data': trim_data(profile, request)
+        }, status=status.HTTP_200_OK)
+
+
+class UserIconUploadAPIView(APIView):
+    """
+    头像上传接口（multipart，字段名file），流式写入内容寻址存储
+    返回的reference作为user_icon传给注册/更新接口
+    """
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'code': 400,
+                'message': '缺少上传文件 file'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            digest = icon_store.save(upload.chunks())
+        except BlobError as e:
+            return Response({
+                'code': 400,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        reference = make_reference(digest)
+        return Response({
+            'code': 201,
+            'message': '上传成功',
+            'data': {
+                'reference': reference,
+                'url': icon_url(reference),
+                'thumbnails': {str(size): icon_url(reference, size) for size in icon_store.thumbnail_sizes},
+            }
+        }, status=status.HTTP_201_CREATED)
+
+
+@auth_exempt
+class UserIconView(View):
+    """
+    头像文件，地址中包含内容摘要，内容不可变：长期缓存，ETag即摘要
+    """
+    CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+    def get(self, request, digest, size=None):
+        if not DIGEST_PATTERN.fullmatch(digest) or (size is not None and size not in icon_store.thumbnail_sizes):
+            raise Http404
+        etag = f'"{digest}-{size or 0}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            try:
+                f = icon_store.open(digest, size)
+            except FileNotFoundError:
+                raise Http404
+            content_type = sniff_content_type(f.read(16)) or 'application/octet-stream'
+            f.seek(0)
+            response = FileResponse(f, content_type=content_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = self.CACHE_CONTROL
+        return response
+
+
+class CacheStatsAPIView(APIView):
+    """当前进程各级缓存的命中统计"""
+
+    def get(self, request):
+        return Response({
+            'code': 200,
+            'message': '获取成功',
+            'data': {
+                'user_profile_cache': user_profile_cache.stats(),
+                'count_cache': count_cache.stats(),
+                'tag_autocomplete': tag_autocomplete.stats(),
+                'tag_catalog': tag_catalog.stats(),
+                'gift_index': gift_index.stats(),
+                **TokenManager.cache_stats(),
+            }
+        }, status=status.HTTP_200_OK)
+
+
+@auth_exempt
 class UserRegistrationAPIView(APIView):
     """
     用户注册接口
@@ -115,6 +260,17 @@ class UserRegistrationAPIView(APIView):
                     'errors': serializer.errors
                 }, status=status.HTTP_400_BAD_REQUEST)
 
+        except PasswordHashBusy:
+            return Response({
+                'code': status.HTTP_503_SERVICE_UNAVAILABLE,
+                'message': '注册请求过多，请稍后重试'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except IntegrityError:
+            # 并发注册时由唯一索引兜底
+            return Response({
+                'code': status.HTTP_400_BAD_REQUEST,
+                'message': '用户名或手机号码已被注册'
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # 处理意外错误
             return Response({
@@ -124,10 +280,20 @@ class UserRegistrationAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@auth_exempt
 class LoginView(APIView):
     """支持用户名和手机号登录的接口"""
     # permission_classes = (IsAuthenticatedOrReadOnly, )
     def post(self, request):
+        try:
+            return self.login(request)
+        except PasswordHashBusy:
+            return Response({
+                'code': 503,
+                'message': '登录请求过多，请稍后重试'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def login(self, request):
         login_type = request.data.get('login_type')  # 'username' 或 'phone'
         password = request.data.get('password')
 
@@ -172,8 +338,8 @@ class LoginView(APIView):
             #     "username":user.username
             # }
             # 生成Token
-            access_token = TokenManager.create_token(user.user_id, user.username, 'access')
-            refresh_token = TokenManager.create_token(user.user_id, user.username, 'refresh')
+            access_token = TokenManager.create_token(user.user_id, user.username, 'access', user.token_version)
+            refresh_token = TokenManager.create_token(user.user_id, user.username, 'refresh', user.token_version)
             # print("token={}".format(token))
             if not user.is_deleted:
                 # login(request, user)  # Django 会话登录
@@ -201,31 +367,30 @@ class LoginView(APIView):
                 'message': '用户名/手机号或密码错误'
             }, status=status.HTTP_401_UNAUTHORIZED)
 
+    # 登录只需要这几列，避免读取头像等大字段和完整序列化
+    LOGIN_FIELDS = ('user_id', 'username', 'password', 'is_deleted', 'token_version')
+
     def authenticate_by_username(self, username, password):
         """通过用户名认证"""
-        try:
-            user = User.objects.filter(username=username).first()
-            ser_data = UserSerializer(user).data
-            db_password = ser_data['password']
-            # 调用工具中的 check_password 方法验证密码
-            if PasswordEncryptor.check_password(password, db_password):  # 假设 check_password 接受明文密码和加密密码
-                return user
-        except User.DoesNotExist:
-            pass
-        return None
+        user = User.objects.filter(username=username).only(*self.LOGIN_FIELDS).first()
+        return self.check_user_password(user, password)
 
     def authenticate_by_phone(self, phone_number, password):
-        """通过手机号认证"""
-        try:
-            user = User.objects.get(phone_number=phone_number)
-            ser_data = UserSerializer(user).data
-            db_password = ser_data['password']
-            # 调用工具中的 check_password 方法验证密码
-            if PasswordEncryptor.check_password(password, db_password):
-                return user
-        except User.DoesNotExist:
-            pass
-        return None
+        """通过手机号认证（按规范化后的号码走唯一索引）"""
+        phone_number = normalize_phone(phone_number)
+        if phone_number is None:
+            return None
+        user = User.objects.filter(phone_number=phone_number).only(*self.LOGIN_FIELDS).first()
+        return self.check_user_password(user, password)
+
+    def check_user_password(self, user, password):
+        """校验密码，旧版MD5或参数过时的哈希在校验成功后自动升级"""
+        if user is None or not PasswordEncryptor.check_password(password, user.password):
+            return None
+        if PasswordEncryptor.needs_rehash(user.password):
+            user.password = PasswordEncryptor.set_password(password)
+            User.objects.filter(user_id=user.user_id).update(password=user.password)
+        return user
 
 
 class UserUpdateAPIView(APIView):
@@ -306,7 +471,15 @@ class UserUpdatePasswordAPIView(APIView):
 
         # 3. 直接使用验证后的序列化器执行更新！
         # 将数据库查询到的user实例和验证通过的数据传入
-        updated_user = pwd_ser.update(user, pwd_ser.validated_data)
+        try:
+            updated_user = pwd_ser.update(user, pwd_ser.validated_data)
+        except PasswordHashBusy:
+            return Response({
+                'code': 503,
+                'message': '修改密码请求过多，请稍后重试'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        # 修改密码后，该用户此前签发的所有Token失效
+        TokenManager.revoke_user_tokens(updated_user.user_id)
         return Response({
             "message": "密码更新成功",
             "data": UserSerializer(updated_user).data,
@@ -334,14 +507,159 @@ class UserDeleteAPIView(APIView):
             )
 
         user.is_deleted = True
+        user.deleted_time = timezone.now()
         user.save()
+        TokenManager.revoke_user_tokens(user.user_id, deleted=True)
         return Response({
             "message": "删除用户成功",
             "user_id": UserSerializer(user).data,
             # 注意：除非明确序列化，否则这里不应返回密码信息
         }, status=status.HTTP_200_OK)
 
+class UserBatchUpdateAPIView(APIView):
+    """
+    批量更新用户资料
+    - 请求：{"users": [{"user_id": 10001, "age": 20}, {"user_id": 10002, "username": "x"}]}，最多1000条
+    - 整批一起校验（用户名、手机号唯一性各一次查询），通过的条目在一个事务中按字段组合bulk_update
+    - 返回每个条目的结果，校验失败的条目不影响其他条目
+    """
+    UNIQUE_FIELDS = ('username', 'phone_number')
+
+    def post(self, request):
+        batch_ser = BatchUserUpdateSerializer(data=request.data)
+        if not batch_ser.is_valid():
+            return Response(
+                {"error": "数据验证失败", "details": batch_ser.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        items = batch_ser.validated_data['users']
+        results = [None] * len(items)
+        valid = {}  # user_id -> (条目序号, 校验后的数据)
+        for index, item in enumerate(items):
+            item_ser = BatchUserUpdateItemSerializer(data=item)
+            if not item_ser.is_valid():
+                results[index] = self.failure(item.get('user_id'), item_ser.errors)
+            elif item_ser.user_id in valid:
+                results[index] = self.failure(item_ser.user_id, '同一用户在本批次中重复')
+            else:
+                valid[item_ser.user_id] = (index, item_ser.validated_data)
+
+        users = User.objects.in_bulk(list(valid))
+        conflicts = self.find_conflicts(valid)
+        groups = defaultdict(list)
+        for user_id, (index, data) in valid.items():
+            user = users.get(user_id)
+            if user is None:
+                results[index] = self.failure(user_id, '用户不存在')
+            elif user_id in conflicts:
+                results[index] = self.failure(user_id, conflicts[user_id])
+            else:
+                # 只转存确定要写入的条目的内联头像
+                for field, value in store_inline_icon(data).items():
+                    setattr(user, field, value)
+                fields = tuple(sorted(data))
+                groups[fields].append(user)
+                results[index] = {'user_id': user_id, 'success': True, 'updated_fields': list(fields)}
+
+        try:
+            with transaction.atomic():
+                for fields, group in groups.items():
+                    User.objects.bulk_update(group, fields, batch_size=500)
+                    search_index.index_objects(User, group, fields)
+        except IntegrityError:
+            # 校验之后有并发请求占用了用户名或手机号
+            return Response(
+                {"error": "用户名或手机号码冲突，请重试"},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        # bulk_update不触发信号，手动失效缓存
+        updated_ids = [user.user_id for group in groups.values() for user in group]
+        if updated_ids:
+            user_profile_cache.invalidate_many(updated_ids)
+            count_cache.bump(User)
+
+        return Response({
+            "message": "批量更新完成",
+            "updated": len(updated_ids),
+            "failed": len(items) - len(updated_ids),
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def failure(user_id, errors):
+        return {'user_id': user_id, 'success': False, 'errors': errors}
+
+    def find_conflicts(self, valid):
+        """批内重复或已被其他用户占用的用户名/手机号，返回{user_id: 错误信息}"""
+        conflicts = {}
+        for field in self.UNIQUE_FIELDS:
+            wanted = defaultdict(list)
+            for user_id, (_, data) in valid.items():
+                if data.get(field) is not None:
+                    wanted[data[field]].append(user_id)
+            if not wanted:
+                continue
+            owners = dict(User.objects.filter(**{f'{field}__in': list(wanted)}).values_list(field, 'user_id'))
+            for value, user_ids in wanted.items():
+                owner = owners.get(value)
+                for user_id in user_ids:
+                    if len(user_ids) > 1:
+                        conflicts[user_id] = f'{field} 在本批次中重复'
+                    elif owner is not None and owner != user_id:
+                        conflicts[user_id] = f'{field} 已被其他用户使用'
+        return conflicts
+
+
+class UserBatchDeleteAPIView(APIView):
+    """
+    批量软删除用户
+    - 请求：{"user_ids": [10001, 10002]}，最多1000个
+    - 一条UPDATE完成软删除，Token版本号批量递增
+    """
+
+    def post(self, request):
+        batch_ser = BatchUserDeleteSerializer(data=request.data)
+        if not batch_ser.is_valid():
+            return Response(
+                {"error": "数据验证失败", "details": batch_ser.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_ids = list(dict.fromkeys(batch_ser.validated_data['user_ids']))
+        states = dict(User.objects.filter(user_id__in=user_ids).values_list('user_id', 'is_deleted'))
+        to_delete = [user_id for user_id in user_ids if states.get(user_id) is False]
+        if to_delete:
+            with transaction.atomic():
+                User.objects.filter(user_id__in=to_delete, is_deleted=False).update(is_deleted=True, deleted_time=Now())
+            TokenManager.revoke_users_tokens(to_delete, deleted=True)
+            # update()不触发信号，手动失效缓存
+            user_profile_cache.invalidate_many(to_delete)
+            count_cache.bump(User)
+
+        results = []
+        for user_id in user_ids:
+            if user_id not in states:
+                results.append({'user_id': user_id, 'success': False, 'errors': '用户不存在'})
+            elif states[user_id]:
+                results.append({'user_id': user_id, 'success': False, 'errors': '用户已删除'})
+            else:
+                results.append({'user_id': user_id, 'success': True})
+        return Response({
+            "message": "批量删除完成",
+            "deleted": len(to_delete),
+            "failed": len(user_ids) - len(to_delete),
+            "results": results,
+        }, status=status.HTTP_200_OK)
+
+
 class UserDestroyAPIView(APIView):
+    """
+    彻底删除用户：标记删除并创建清除任务后立即返回，关联数据由后台分块删除（见purge.py）
+    进度通过 purge-jobs/<job_id>/ 查询
+    """
+
     def post(self, request):
         destroy_ser = UserDestroySerializer(data=request.data)
         if not destroy_ser.is_valid():
@@ -350,18 +668,38 @@ class UserDestroyAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         user_id = request.data.get('user_id')
-        try:
-            user = User.objects.get(user_id=user_id)
-        except User.DoesNotExist:
+        with transaction.atomic():
+            user = User.objects.select_for_update().filter(user_id=user_id).first()
+            if user is None:
+                return Response(
+                    {"error": f"用户不存在 (user_id: {user_id})"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            if not user.is_deleted:
+                user.is_deleted = True
+                user.deleted_time = timezone.now()
+                user.save(update_fields=['is_deleted', 'deleted_time'])
+            job = user_purger.enqueue(user.user_id)
+        TokenManager.revoke_user_tokens(user.user_id, deleted=True)
+        return Response({
+            "message": "已提交销毁任务",
+            "data": PurgeJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class PurgeJobAPIView(APIView):
+    """清除任务进度"""
+
+    def get(self, request, job_id):
+        job = PurgeJob.objects.filter(job_id=job_id).first()
+        if job is None:
             return Response(
-                {"error": f"用户不存在 (user_id: {user_id})"},
+                {"error": f"任务不存在 (job_id: {job_id})"},
                 status=status.HTTP_404_NOT_FOUND
             )
-        user.delete()
         return Response({
-            "message": "销毁用户成功",
-            "data": "",
-            # 注意：除非明确序列化，否则这里不应返回密码信息
+            "message": "获取成功",
+            "data": PurgeJobSerializer(job).data,
         }, status=status.HTTP_200_OK)
 
 class LogoutAPIView(APIView):
@@ -375,6 +713,9 @@ class LogoutAPIView(APIView):
                 if is_valid:
                     # 将Token加入黑名单
                     TokenManager.add_to_blacklist(token, payload)
+                    # all=true 时使该用户所有设备上的Token失效
+                    if str(request.data.get('all', '')).lower() in ('true', '1'):
+                        TokenManager.revoke_user_tokens(payload['user_id'])
             return Response({
                 'code': 200,
                 'message': '登出成功'
@@ -387,6 +728,7 @@ class LogoutAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@auth_exempt
 class TokenRefreshView(APIView):
     """Token刷新视图（白名单接口示例）"""
 
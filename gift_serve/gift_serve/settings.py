@@ -42,7 +42,9 @@ INSTALLED_APPS = [
     'rest_framework',
     'django_filters',
     "apps.user",
-    "apps.tag"
+    "apps.tag",
+    "apps.search",
+    "apps.gift",
 ]
 
 
@@ -84,6 +86,13 @@ JWT_CONFIG = {
     'ALGORITHM': 'HS256',  # 加密算法
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(hours=24),  # 访问令牌有效期
     'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=7),  # 刷新令牌有效期
+    'VERIFIED_CACHE_SIZE': 10000,  # 进程内已验证Token缓存容量
+    'VERIFIED_CACHE_SYNC_INTERVAL': 1.0,  # 跨进程撤销同步间隔（秒），其他进程的撤销最多延迟这么久生效
+    'REVOCATION_LOG_SIZE': 10000,  # Redis中保留的最近撤销事件数，落后更多的进程整体清空本地缓存
+    'BLACKLIST_FILTER_CAPACITY': 100000,  # 本地黑名单布隆过滤器容量
+    'BLACKLIST_FILTER_ERROR_RATE': 0.01,  # 布隆过滤器误判率
+    'USER_EPOCH_CACHE_SIZE': 50000,  # 进程内用户Token版本号缓存容量
+    'USER_EPOCH_CACHE_TTL': 60,  # 用户Token版本号本地缓存时间（秒）
 }
 # 不需要Token验证的白名单路径
 WHITE_LIST   = [
@@ -99,12 +108,53 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://127.0.0.1:6379/1",
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # DefaultClient的子类，采样请求中统计缓存耗时
+            "CLIENT_CLASS": "utils.instrumentation.InstrumentedRedisClient",
         }
     }
 }
+# 限流配置（令牌桶）：rate为每秒补充令牌数，burst为桶容量
+# 同一规则同时作用于客户端IP和已认证用户；ROUTES按顺序匹配路径前缀，未命中时使用DEFAULT
+RATE_LIMITS = {
+    'ENABLED': True,
+    'TRUST_FORWARDED': False,  # 部署在反向代理后时开启，使用X-Forwarded-For识别客户端
+    'REDIS_BACKOFF': 1.0,  # Redis调用失败后改用进程内令牌桶的秒数，连续失败时翻倍
+    'REDIS_MAX_BACKOFF': 30.0,
+    'DEFAULT': {'rate': 20, 'burst': 40},
+    'ROUTES': [
+        ('/api/login/', {'rate': 0.5, 'burst': 5}),
+        ('/api/register/', {'rate': 0.2, 'burst': 3}),
+        ('/api/users/', {'rate': 5, 'burst': 10}),
+        ('/api/tag/user-tag-relationships/', {'rate': 5, 'burst': 10}),
+        ('/admin/', None),
+    ],
+}
+
+# 请求指标采样配置：SAMPLE_RATE为采样比例（0-1），记录经队列异步写入LOGGER
+REQUEST_METRICS = {
+    'SAMPLE_RATE': float(os.environ.get('GIFT_METRICS_SAMPLE_RATE', 0.01)),
+    'LOGGER': 'gift.metrics',
+}
+# 分页总数缓存：TIMEOUT为计数缓存秒数；无过滤条件且统计行数超过ESTIMATE_THRESHOLD的表使用估算总数
+COUNT_CACHE = {
+    'TIMEOUT': 30,
+    'ESTIMATE_THRESHOLD': 100000,
+    'ESTIMATE_TIMEOUT': 300,
+}
+# 子串搜索：BACKEND为ngram（倒排索引）或like（直接LIKE，适合小数据量或测试）
+# FIELDS为需要索引的字段及n-gram长度，纯数字字段使用较长的片段以缩短倒排链
+SEARCH_CONFIG = {
+    'BACKEND': 'ngram',
+    'NGRAM_SIZE': 2,
+    'FIELDS': {
+        'user.User': {'username': 2, 'phone_number': 3},
+        'tag.Tag': ['tag_name', 'description'],
+        'tag.UserTagRelationship': ['relation_description'],
+    },
+}
 # 中间件配置
 MIDDLEWARE = [
+    'middleware.metrics_middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -112,7 +162,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'middleware.jwt_middleware.JWTAuthenticationMiddleware'
+    'middleware.ratelimit_middleware.IPRateLimitMiddleware',
+    'middleware.jwt_middleware.JWTAuthenticationMiddleware',
+    'middleware.ratelimit_middleware.UserRateLimitMiddleware',
 ]
 
 
@@ -137,6 +189,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'gift_serve.wsgi.application'
 
+# 通过ASGI部署时开启，标签列表、用户标签、标签用户等读接口使用原生异步视图
+ASYNC_VIEWS = os.environ.get('GIFT_ASYNC_VIEWS', '').lower() in ('1', 'true')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -154,6 +209,72 @@ DATABASES = {
 }
 
 
+# 用户资料缓存时间（秒），写入时主动重写，过期只是兜底
+USER_PROFILE_CACHE_TIMEOUT = 300
+
+# 头像存储：本地内容寻址目录，THUMBNAIL_SIZES为预生成的缩略图边长（需要Pillow）
+BLOB_STORE = {
+    'ROOT': os.environ.get('GIFT_BLOB_ROOT', os.path.join(BASE_DIR, 'blobs')),
+    'THUMBNAIL_SIZES': (64, 200),
+    'MAX_SIZE': 5 * 1024 * 1024,
+}
+
+# 冷热分离：软删除超过USER_DAYS天的用户、未激活超过RELATION_DAYS天的关联移到归档表
+# 由 python manage.py archive_cold_data 执行（cron）
+ARCHIVE_CONFIG = {
+    'USER_DAYS': 90,
+    'RELATION_DAYS': 180,
+    'CHUNK_SIZE': 500,  # 每个事务处理的行数
+    'SLEEP': 0.1,  # 每块之间暂停的秒数
+}
+
+# 用户彻底删除（销毁接口）的后台清除任务
+# IN_PROCESS为True时由Web进程内的后台线程执行，否则只由 python manage.py run_purge_jobs 执行
+PURGE_CONFIG = {
+    'CHUNK_SIZE': 1000,  # 每个事务删除的关联数
+    'SLEEP': 0.05,  # 每块之间暂停的秒数
+    'IN_PROCESS': True,
+    'POLL_INTERVAL': 30,  # 后台线程轮询间隔（秒）
+    'STALE_AFTER': 300,  # 执行中的任务超过该秒数未更新可被重新领取
+    'MAX_ATTEMPTS': 3,
+}
+
+# 标签版本号的本地缓存时间（秒），其他进程的标签修改最多延迟这么久可见
+TAG_VERSION_CHECK_INTERVAL = 1.0
+# 标签名前缀补全：热度（Tag.user_count）整体刷新间隔，短前缀结果缓存的最大前缀长度
+TAG_AUTOCOMPLETE = {
+    'POPULARITY_TTL': 300,
+    'PREFIX_CACHE_LENGTH': 2,
+    'MAX_LIMIT': 50,
+}
+
+# 礼物推荐索引：增量块超过COMPACT_THRESHOLD个礼物时全量重建；单次推荐最多返回MAX_LIMIT个
+GIFT_RECOMMEND = {
+    'COMPACT_THRESHOLD': 2000,
+    'MAX_LIMIT': 100,
+}
+
+# 每个进程一次预留的user_id数量
+USER_ID_BLOCK_SIZE = 100
+
+# 密码哈希：首选迭代次数可配置的PBKDF2，旧版MD5哈希在登录成功时自动升级
+PASSWORD_HASHERS = [
+    # 同时负责校验Django默认PBKDF2哈希器生成的pbkdf2_sha256哈希（迭代次数记录在哈希中）
+    'utils.encrypt.TunablePBKDF2PasswordHasher',
+    # 用于校验已有的其他格式哈希（登录后升级为首选哈希器）；
+    # 不能再列出django的PBKDF2PasswordHasher，同名算法后注册的会覆盖前者，导致每次登录都判定需要重新哈希
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_CONFIG = {
+    'ITERATIONS': 600000,  # PBKDF2迭代次数
+    'MAX_WORKERS': 4,  # 每个进程的哈希线程数
+    'MAX_PENDING': 32,  # 排队上限，超出后直接拒绝
+    'TIMEOUT': 10,  # 等待哈希结果的超时时间（秒）
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -7,6 +7,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('apps.user.urls')),
     path('api/tag/', include('apps.tag.urls')),
+    path('api/gift/', include('apps.gift.urls')),
 
     # path('api/', include('user.urls')),
 ]
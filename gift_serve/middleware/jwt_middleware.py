@@ -1,99 +1,56 @@
-# # your_app/middleware.py
-# from django.utils.deprecation import MiddlewareMixin
-# from django.http import JsonResponse
-# from django.conf import settings
-# from utils.token_utils import get_token_from_request, TokenManager
-# import logging
-#
-# logger = logging.getLogger('django')
-#
-#
-# class JWTAuthenticationMiddleware(MiddlewareMixin):
-#     """
-#     JWT认证中间件（使用MiddlewareMixin确保兼容性）[6,7](@ref)
-#     """
-#
-#     def process_request(self, request):
-#         """
-#         处理请求，进行JWT认证
-#         """
-#         # 检查是否在白名单中
-#         if self._is_no_auth_required(request):
-#             return None
-#
-#         # 获取token
-#         token = get_token_from_request(request)
-#         if not token:
-#             return JsonResponse({
-#                 'code': 401,
-#                 'message': '未提供认证Token',
-#                 'detail': '请在URL参数中添加token或设置Authorization请求头'
-#             }, status=401)
-#
-#         # 验证token
-#         is_valid, payload, error_msg = TokenManager.verify_token(token)
-#
-#         if not is_valid:
-#             return JsonResponse({
-#                 'code': 401,
-#                 'message': '认证失败',
-#                 'detail': error_msg
-#             }, status=401)
-#
-#         # 将用户信息添加到request对象中
-#         request.user_info = payload.get('data', {})
-#         request.token_payload = payload
-#         request.token = token
-#
-#         return None
-#
-#     def process_response(self, request, response):
-#         """
-#         处理响应
-#         """
-#         if hasattr(response, 'headers'):
-#             response.headers['X-Request-ID'] = getattr(request, 'request_id', 'unknown')
-#         return response
-#
-#     def process_exception(self, request, exception):
-#         """
-#         处理异常[1](@ref)
-#         """
-#         logger.error(f'JWT中间件异常: {str(exception)}')
-#         return JsonResponse({
-#             'code': 500,
-#             'message': '服务器内部错误',
-#             'detail': str(exception)
-#         }, status=500)
-#
-#     def _is_no_auth_required(self, request):
-#         """检查当前请求是否需要认证"""
-#         path = request.path
-#
-#         for white_path in settings.NO_AUTH_REQUIRED:
-#             if path.startswith(white_path):
-#                 return True
-#
-#         if request.method == 'OPTIONS':
-#             return True
-#
-#         return False
-
-import re
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
 from django.http import JsonResponse
+from utils.instrumentation import timed
+from utils.routes import build_white_list_matcher
 from utils.token import TokenManager, ResponseHelper
 
 
-class JWTAuthenticationMiddleware(MiddlewareMixin):
-    """JWT认证中间件"""
+class JWTAuthenticationMiddleware:
+    """
+    JWT认证中间件
+    同时支持同步和异步：ASGI下整条认证链路在事件循环中完成，不切换到同步线程
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # 白名单匹配器，首次请求时（URLconf已可加载）编译一次，所有实例共享
+    white_list_matcher = None
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return self.process_response(request, response)
 
     def process_request(self, request):
         """处理请求前的认证逻辑"""
+        with timed('auth_ms'):
+            return self._authenticate(request)
+
+    async def aprocess_request(self, request):
+        """process_request的异步版本"""
+        with timed('auth_ms'):
+            return await self._aauthenticate(request)
 
+    def _authenticate(self, request):
         # 检查是否在白名单中
-        if self._is_white_listed(request.path):
+        if self._is_white_listed(request.path_info):
             return None
 
         # 获取Token
@@ -103,29 +60,37 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
 
         # 验证Token
         is_valid, payload = TokenManager.verify_token(token)
-        print("验证Token==={}".format(payload) )
-        print("is_valid==={}".format(is_valid) )
+        return self._apply_result(request, is_valid, payload)
+
+    async def _aauthenticate(self, request):
+        if self._is_white_listed(request.path_info):
+            return None
 
+        token = TokenManager.get_token_from_request(request)
+        if not token:
+            return ResponseHelper.error('未提供认证Token', 401)
+
+        is_valid, payload = await TokenManager.averify_token(token)
+        return self._apply_result(request, is_valid, payload)
+
+    def _apply_result(self, request, is_valid, payload):
+        """认证失败返回错误响应，成功则将用户信息添加到request对象中"""
         if not is_valid:
             return ResponseHelper.error(payload['error'], payload.get('code', 401))
 
-        # 将用户信息添加到request对象中
         request.user_id = payload['user_id']
         request.username = payload['username']
         request.token_payload = payload
-        print("request==={}".format(request) )
-
         return None
 
     def _is_white_listed(self, path):
-        """检查路径是否在白名单中"""
-        for white_path in settings.WHITE_LIST:
-            if white_path.endswith('/') and path == white_path[:-1]:
-                return True
-            if re.match(white_path.replace('*', '.*'), path):
-                return True
-        return False
+        """检查路径是否在白名单中（配置白名单 + auth_exempt视图）"""
+        matcher = JWTAuthenticationMiddleware.white_list_matcher
+        if matcher is None:
+            matcher = build_white_list_matcher(settings.WHITE_LIST)
+            JWTAuthenticationMiddleware.white_list_matcher = matcher
+        return matcher.match(path)
 
     def process_response(self, request, response):
         """处理响应"""
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,58 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from utils.instrumentation import current_record, finish_record, start_record
+
+
+class RequestMetricsMiddleware:
+    """
+    请求采样指标中间件（放在中间件列表最前面）
+    按REQUEST_METRICS['SAMPLE_RATE']采样，记录认证、视图、数据库、缓存耗时，
+    以结构化日志经队列异步输出
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        record, reset_token = start_record(request)
+        if record is None:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._finish(request, record, reset_token, response, start)
+        return response
+
+    async def __acall__(self, request):
+        record, reset_token = start_record(request)
+        if record is None:
+            return await self.get_response(request)
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._finish(request, record, reset_token, response, start)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """记录进入视图的时间点"""
+        if current_record() is not None:
+            request._metrics_view_start = time.perf_counter()
+        return None
+
+    def _finish(self, request, record, reset_token, response, start):
+        now = time.perf_counter()
+        view_start = getattr(request, '_metrics_view_start', None)
+        if view_start is not None:
+            record.view_ms = (now - view_start) * 1000
+        record.user_id = getattr(request, 'user_id', None)
+        finish_record(record, reset_token, response, (now - start) * 1000)
@@ -0,0 +1,62 @@
+import math
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from utils.instrumentation import timed
+from utils.ratelimit import rate_limiter
+from utils.token import ResponseHelper
+
+
+class RateLimitMiddleware:
+    """
+    令牌桶限流中间件基类，scope决定按客户端IP还是按用户计数
+    规则见settings.RATE_LIMITS，按路径前缀配置
+    """
+
+    scope = None
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        buckets = rate_limiter.get_buckets(request, self.scope)
+        if buckets:
+            with timed('ratelimit_ms'):
+                allowed, retry_after = rate_limiter.allow(buckets)
+            if not allowed:
+                return self.reject(retry_after)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        buckets = rate_limiter.get_buckets(request, self.scope)
+        if buckets:
+            with timed('ratelimit_ms'):
+                allowed, retry_after = await sync_to_async(rate_limiter.allow, thread_sensitive=False)(buckets)
+            if not allowed:
+                return self.reject(retry_after)
+        return await self.get_response(request)
+
+    @staticmethod
+    def reject(retry_after):
+        response = ResponseHelper.error('请求过于频繁，请稍后重试', 429)
+        response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+class IPRateLimitMiddleware(RateLimitMiddleware):
+    """按客户端IP限流，放在JWT认证中间件之前，未认证的请求在校验Token之前就被计数和拒绝"""
+
+    scope = 'ip'
+
+
+class UserRateLimitMiddleware(RateLimitMiddleware):
+    """按用户限流，放在JWT认证中间件之后（依赖request.user_id）"""
+
+    scope = 'user'
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{64}')
+# 用户表中保存的引用格式：blob:<sha256>
+REFERENCE_PREFIX = 'blob:'
+DATA_URL_PATTERN = re.compile(r'^data:([\w/.+-]*)(?:;[\w=-]+)*;base64,', re.IGNORECASE)
+_BASE64_PATTERN = re.compile(r'^[A-Za-z0-9+/=\s]+$')
+
+logger = logging.getLogger(__name__)
+
+# 文件头 -> Content-Type
+_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+class BlobError(ValueError):
+    """内容不合法（非图片、超出大小、编码错误）"""
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def make_reference(digest: str) -> str:
+    return f'{REFERENCE_PREFIX}{digest}'
+
+
+def parse_reference(value) -> Optional[str]:
+    """blob:<sha256> -> sha256，其他值返回None"""
+    if value and value.startswith(REFERENCE_PREFIX):
+        digest = value[len(REFERENCE_PREFIX):]
+        if DIGEST_PATTERN.fullmatch(digest):
+            return digest
+    return None
+
+
+def is_inline_image(value) -> bool:
+    """data URL或较长的裸base64视为内联图片"""
+    if not value:
+        return False
+    return bool(DATA_URL_PATTERN.match(value)) or (len(value) > 256 and bool(_BASE64_PATTERN.match(value[:1024])))
+
+
+def iter_inline_image(value: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """分段解码data URL/base64，避免一次性生成完整的二进制副本"""
+    match = DATA_URL_PATTERN.match(value)
+    if match:
+        value = value[match.end():]
+    value = ''.join(value.split())
+    chunk_size -= chunk_size % 4
+    try:
+        for start in range(0, len(value), chunk_size):
+            yield base64.b64decode(value[start:start + chunk_size], validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise BlobError(f'图片编码错误: {e}')
+
+
+class BlobStore:
+    """
+    本地内容寻址存储
+    - 文件名为内容的SHA256，路径 <root>/<前2位>/<3-4位>/<digest>，相同内容只存一份
+    - 流式写入临时文件并计算摘要，完成后原子改名；内容不可变，可长期缓存
+    - 缩略图为 <digest>_<size>，由原图确定性生成；需要Pillow，未安装时不提供缩略图（不输出缩略图地址）
+    """
+
+    def __init__(self, root, thumbnail_sizes: Iterable[int] = (), max_size: int = 5 * 1024 * 1024):
+        self.root = str(root)
+        self.thumbnail_sizes = tuple(thumbnail_sizes)
+        if self.thumbnail_sizes and not pillow_available():
+            logger.warning('未安装Pillow，已禁用头像缩略图（THUMBNAIL_SIZES=%s）', self.thumbnail_sizes)
+            self.thumbnail_sizes = ()
+        self.max_size = max_size
+
+    def path(self, digest: str, size: Optional[int] = None) -> str:
+        name = digest if size is None else f'{digest}_{size}'
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    def exists(self, digest: str, size: Optional[int] = None) -> bool:
+        return os.path.exists(self.path(digest, size))
+
+    def _checked(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """逐块校验大小，结束时校验文件头，内容原样产出"""
+        size = 0
+        head = b''
+        for chunk in chunks:
+            if len(head) < 16:
+                head += chunk[:16 - len(head)]
+            size += len(chunk)
+            if size > self.max_size:
+                raise BlobError(f'图片不能超过 {self.max_size // 1024} KB')
+            yield chunk
+        if sniff_content_type(head) is None:
+            raise BlobError('仅支持PNG、JPEG、GIF、WEBP图片')
+
+    def check(self, chunks: Iterable[bytes]) -> None:
+        """只校验内容（不写入），不合法时抛出BlobError"""
+        for _ in self._checked(chunks):
+            pass
+
+    def save(self, chunks: Iterable[bytes]) -> str:
+        """流式保存图片，返回SHA256摘要"""
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        hasher = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self._checked(chunks):
+                    hasher.update(chunk)
+                    f.write(chunk)
+
+            digest = hasher.hexdigest()
+            path = self.path(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.make_thumbnails(digest)
+        return digest
+
+    def make_thumbnails(self, digest: str) -> None:
+        """生成缺失的缩略图，原图无法解码时跳过"""
+        missing = [size for size in self.thumbnail_sizes if not self.exists(digest, size)]
+        if not missing:
+            return
+        from PIL import Image
+
+        try:
+            with Image.open(self.path(digest)) as image:
+                image_format = image.format if image.format in ('JPEG', 'PNG', 'WEBP') else 'PNG'
+                for size in missing:
+                    thumbnail = image.copy()
+                    thumbnail.thumbnail((size, size))
+                    self._write_thumbnail(thumbnail, image_format, self.path(digest, size))
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning('生成缩略图失败 %s: %s', digest, e)
+
+    @staticmethod
+    def _write_thumbnail(thumbnail, image_format: str, path: str) -> None:
+        # 唯一的临时文件，并发生成同一缩略图的请求互不覆盖，完成后原子改名
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                thumbnail.save(f, format=image_format)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, digest: str, size: Optional[int] = None):
+        """
+        打开原图或缩略图；缩略图缺失时尝试补生成，仍不存在则抛出FileNotFoundError，
+        不能用原图代替（缩略图地址带长期缓存）
+        """
+        if size is not None and size in self.thumbnail_sizes and not self.exists(digest, size):
+            if self.exists(digest):
+                self.make_thumbnails(digest)
+        return open(self.path(digest, size), 'rb')
+
+
+_blob_config = getattr(settings, 'BLOB_STORE', {})
+icon_store = BlobStore(
+    root=_blob_config.get('ROOT', os.path.join(settings.BASE_DIR, 'blobs')),
+    thumbnail_sizes=_blob_config.get('THUMBNAIL_SIZES', ()),
+    max_size=_blob_config.get('MAX_SIZE', 5 * 1024 * 1024),
+)
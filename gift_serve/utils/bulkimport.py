@@ -0,0 +1,136 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from utils.counting import count_cache
+
+
+def iter_rows(path, fmt=None):
+    """流式读取CSV（首行为表头）或NDJSON（每行一个JSON对象），逐行返回dict"""
+    if fmt is None:
+        fmt = 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        elif fmt == 'ndjson':
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise CommandError(f'不支持的文件格式: {fmt}')
+
+
+def iter_batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class ImportCheckpoint:
+    """断点文件，记录已处理的行数；中断后重新执行会跳过这些行"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self) -> int:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return int(json.load(f)['rows'])
+        except FileNotFoundError:
+            return 0
+
+    def save(self, rows: int) -> None:
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'rows': rows}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkImportCommand(BaseCommand):
+    """
+    批量导入命令基类
+    - 流式读取文件，按批校验和写入，每批一个事务
+    - 每批提交后写断点，支持中断后续传
+    - 子类实现 import_batch(rows) -> (导入数, 拒绝数)
+    - 耗时的准备步骤（密码哈希、预留ID等）放在 prepare_batch(rows) 中，在事务外执行，
+      其返回值传给import_batch；这样批次事务只包含写入，不会长时间持有锁
+    """
+
+    default_batch_size = 1000
+    # 批量写入不触发信号，每批提交后手动使这些模型的分页计数失效
+    count_models = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV或NDJSON文件路径')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='文件格式，默认按扩展名判断')
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size, help='每批行数')
+        parser.add_argument('--checkpoint', help='断点文件路径，默认为 <path>.checkpoint')
+        parser.add_argument('--restart', action='store_true', help='忽略已有断点，从头导入')
+
+    def handle(self, *args, **options):
+        self.options = options
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'文件不存在: {path}')
+
+        checkpoint = ImportCheckpoint(options['checkpoint'] or f'{path}.checkpoint')
+        if options['restart']:
+            checkpoint.clear()
+        skipped = checkpoint.load()
+        if skipped:
+            self.stdout.write(f'从断点继续，跳过前 {skipped} 行')
+
+        self.prepare()
+        rows = itertools.islice(iter_rows(path, options['format']), skipped, None)
+        processed, imported, rejected = skipped, 0, 0
+        started = time.monotonic()
+
+        for batch in iter_batches(rows, options['batch_size']):
+            prepared = self.prepare_batch(batch)
+            with transaction.atomic():
+                batch_imported, batch_rejected = self.import_batch(prepared)
+            processed += len(batch)
+            imported += batch_imported
+            rejected += batch_rejected
+            checkpoint.save(processed)
+            count_cache.bump(*self.count_models)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'已处理 {processed} 行，导入 {imported}，拒绝 {rejected}，'
+                f'{(processed - skipped) / elapsed if elapsed else 0:.0f} 行/秒'
+            )
+
+        checkpoint.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'导入完成：处理 {processed - skipped} 行，导入 {imported}，拒绝 {rejected}，'
+            f'耗时 {time.monotonic() - started:.1f} 秒'
+        ))
+
+    def prepare(self):
+        """导入开始前的准备（如预加载映射表）"""
+
+    def prepare_batch(self, rows):
+        """在批次事务之外执行，返回值作为import_batch的参数"""
+        return rows
+
+    def import_batch(self, rows):
+        raise NotImplementedError
+
+    def reject(self, row, reason):
+        """输出被拒绝的行（verbosity>=2时）"""
+        if self.options.get('verbosity', 1) >= 2:
+            self.stderr.write(f'拒绝: {reason} {row}')
@@ -0,0 +1,198 @@
+import hashlib
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+
+class CountCache:
+    """
+    分页总数缓存
+    - 键为去掉排序后的查询SQL及参数的摘要，相同过滤条件共用一个计数
+    - 每个模型一个代数，post_save/post_delete提交后递增，旧代数的计数随之失效
+    - 无过滤条件的大表直接使用数据库统计信息中的估算行数；
+      只带管理器基础过滤条件的查询（如User.live）也可估算，管理器需声明estimate_complement
+    """
+
+    def __init__(self, timeout: int = 30, estimate_threshold: Optional[int] = 100000,
+                 estimate_timeout: int = 300):
+        self.timeout = timeout
+        self.estimate_threshold = estimate_threshold
+        self.estimate_timeout = estimate_timeout
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def generation_key(model) -> str:
+        return f'count_generation_{model._meta.label_lower}'
+
+    @staticmethod
+    def query_key(queryset) -> str:
+        # 只取主键列，使only()/defer()不同但过滤条件相同的查询共用一个计数
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        digest = hashlib.sha1(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+        return f'count_{queryset.model._meta.label_lower}_{digest}'
+
+    def count(self, queryset) -> Tuple[int, bool]:
+        """返回(总数, 是否为估算值)"""
+        estimate = self.estimate(queryset)
+        if estimate is not None:
+            return estimate, True
+        try:
+            key = self.query_key(queryset)
+        except EmptyResultSet:
+            return 0, False
+
+        generation_key = self.generation_key(queryset.model)
+        try:
+            cached = cache.get_many([generation_key, key])
+        except Exception:
+            return queryset.count(), False
+        generation = cached.get(generation_key, 0)
+        total = self._cached_total(cached.get(key), generation)
+        if total is None:
+            total = queryset.count()
+            self._store(key, generation, total)
+        return total, False
+
+    async def acount(self, queryset) -> Tuple[int, bool]:
+        """count的异步版本"""
+        estimate = await sync_to_async(self.estimate)(queryset)
+        if estimate is not None:
+            return estimate, True
+        try:
+            key = self.query_key(queryset)
+        except EmptyResultSet:
+            return 0, False
+
+        generation_key = self.generation_key(queryset.model)
+        try:
+            cached = await cache.aget_many([generation_key, key])
+        except Exception:
+            return await queryset.acount(), False
+        generation = cached.get(generation_key, 0)
+        total = self._cached_total(cached.get(key), generation)
+        if total is None:
+            total = await queryset.acount()
+            await sync_to_async(self._store)(key, generation, total)
+        return total, False
+
+    def _cached_total(self, entry, generation) -> Optional[int]:
+        # 代数在计数之前读取，计数期间发生的写入会让这次写入的缓存立即过期
+        if entry is not None and entry[0] == generation:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def _store(self, key, generation, total) -> None:
+        try:
+            cache.set(key, (generation, total), self.timeout)
+        except Exception:
+            pass
+
+    def estimate(self, queryset) -> Optional[int]:
+        """
+        无过滤条件（或只有管理器的基础过滤条件）时返回估算行数；
+        有其他过滤条件、小表或不支持的数据库返回None
+        """
+        query = queryset.query
+        if self.estimate_threshold is None or query.distinct or query.is_sliced:
+            return None
+        manager = None
+        if query.where:
+            manager = self._base_filter_manager(queryset)
+            if manager is None:
+                return None
+
+        model = queryset.model
+        key = f'count_estimate_{model._meta.label_lower}'
+        if manager is not None:
+            key = f'{key}_{manager.name}'
+        try:
+            rows = cache.get(key)
+        except Exception:
+            rows = None
+        if rows is None:
+            rows = self._table_rows(queryset.db, model._meta.db_table)
+            if manager is not None and rows >= 0:
+                # 表行数减去管理器过滤掉的行（如已删除的用户，数量远小于全表且有索引）
+                excluded = model._base_manager.using(queryset.db).filter(manager.estimate_complement).count()
+                rows = max(rows - excluded, 0)
+            try:
+                cache.set(key, rows, self.estimate_timeout)
+            except Exception:
+                pass
+        return rows if rows >= self.estimate_threshold else None
+
+    def _base_filter_manager(self, queryset):
+        """查询的过滤条件恰好是某个声明了estimate_complement的管理器的基础过滤条件时返回该管理器"""
+        try:
+            key = self.query_key(queryset)
+        except EmptyResultSet:
+            return None
+        for manager in queryset.model._meta.managers:
+            if getattr(manager, 'estimate_complement', None) is None:
+                continue
+            try:
+                if self.query_key(manager.db_manager(queryset.db).get_queryset()) == key:
+                    return manager
+            except EmptyResultSet:
+                continue
+        return None
+
+    @staticmethod
+    def _table_rows(using, table) -> int:
+        """读取数据库统计信息中的表行数，无法获取时返回-1"""
+        connection = connections[using]
+        if connection.vendor == 'mysql':
+            sql = ('SELECT TABLE_ROWS FROM information_schema.TABLES '
+                   'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s')
+        elif connection.vendor == 'postgresql':
+            sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        else:
+            return -1
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] is not None else -1
+
+    def bump(self, *models) -> None:
+        """使模型的所有缓存计数失效（bulk_create/update等不触发信号的写入需手动调用）"""
+        for model in models:
+            key = self.generation_key(model)
+            try:
+                cache.add(key, 0, None)
+                cache.incr(key)
+            except Exception:
+                pass
+
+    def track(self, *models) -> None:
+        """模型保存或删除后自动失效计数"""
+        for model in models:
+            label = model._meta.label_lower
+            post_save.connect(self._on_change, sender=model, weak=False, dispatch_uid=f'count_cache_save_{label}')
+            post_delete.connect(self._on_change, sender=model, weak=False, dispatch_uid=f'count_cache_delete_{label}')
+
+    def _on_change(self, sender, **kwargs):
+        transaction.on_commit(lambda: self.bump(sender))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_count_config = getattr(settings, 'COUNT_CACHE', {})
+count_cache = CountCache(
+    timeout=_count_config.get('TIMEOUT', 30),
+    estimate_threshold=_count_config.get('ESTIMATE_THRESHOLD', 100000),
+    estimate_timeout=_count_config.get('ESTIMATE_TIMEOUT', 300),
+)
@@ -1,9 +1,68 @@
 # utils/encrypt.py
 import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher, check_password, get_hasher, identify_hasher, make_password
+)
+from django.utils.crypto import constant_time_compare
+
+
+class PasswordHashBusy(Exception):
+    """密码哈希线程池排队已满"""
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    迭代次数可配置的PBKDF2哈希器（PASSWORD_HASH_CONFIG['ITERATIONS']）
+    调整迭代次数后，旧哈希会在下次登录成功时自动重新计算
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_CONFIG['ITERATIONS']
+
 
+class PasswordHashPool:
+    """
+    有界的密码哈希线程池
+    - hashlib.pbkdf2_hmac计算时释放GIL，哈希在独立线程中并行执行
+    - 排队数超过max_pending时立即拒绝，登录洪峰不会拖垮同一worker上的其他接口
+    """
 
+    def __init__(self, max_workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
 
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashBusy('密码校验请求过多，请稍后重试')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        future = self.submit(fn, *args)
+        try:
+            return future.result(settings.PASSWORD_HASH_CONFIG.get('TIMEOUT'))
+        except FutureTimeoutError:
+            # 排队太久按繁忙处理；还没开始执行的任务直接取消
+            future.cancel()
+            raise PasswordHashBusy('密码校验超时，请稍后重试')
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_CONFIG.get('MAX_WORKERS', 4),
+    max_pending=settings.PASSWORD_HASH_CONFIG.get('MAX_PENDING', 32),
+)
 
 
 class PasswordEncryptor:
@@ -12,11 +71,37 @@ class PasswordEncryptor:
     @staticmethod
     def set_password(password, salt=None):
         """
-        MD5加密密码
+        加密密码（使用PASSWORD_HASHERS中的首选哈希器，在哈希线程池中执行）
         :param password: 明文密码
-        :param salt: 盐值，增强安全性
+        :param salt: 盐值，默认随机生成
         :return: 加密后的密码
         """
+        return password_hash_pool.run(make_password, password, salt)
+
+    @staticmethod
+    def set_passwords(passwords, max_workers=None, iterations=None):
+        """
+        批量加密密码（离线批量导入使用，独立线程池并行计算，不占用请求的排队名额）
+        :param passwords: 明文密码列表
+        :param max_workers: 线程数，默认为CPU核数
+        :param iterations: 临时使用的迭代次数，低于配置值的哈希会在用户登录时自动升级
+        :return: 与输入顺序一致的加密密码列表
+        """
+        hash_one = make_password
+        if iterations:
+            hasher = get_hasher()
+
+            def hash_one(password):
+                return hasher.encode(password, hasher.salt(), iterations)
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(hash_one, passwords))
+
+    @staticmethod
+    def legacy_md5(password, salt=None):
+        """
+        旧版加盐MD5，仅用于校验历史数据
+        """
         if salt is None:
             salt = settings.SECRET_KEY  # 使用Django的SECRET_KEY作为盐值[11](@ref)
 
@@ -26,24 +111,49 @@ class PasswordEncryptor:
         md5_hash.update(salted_password.encode('utf-8'))
         return md5_hash.hexdigest()
 
+    @staticmethod
+    def is_legacy(encrypted_password):
+        """是否为旧版MD5哈希（32位十六进制，无算法前缀）"""
+        return bool(encrypted_password) and len(encrypted_password) == 32 and '$' not in encrypted_password
+
+    @staticmethod
+    def _check(input_password, encrypted_password):
+        if PasswordEncryptor.is_legacy(encrypted_password):
+            return constant_time_compare(PasswordEncryptor.legacy_md5(input_password), encrypted_password)
+        return check_password(input_password, encrypted_password)
+
+    @staticmethod
     def check_password(input_password, encrypted_password):
         """
-        校验密码工具方法
+        校验密码工具方法（在哈希线程池中执行）
         :param input_password: 用户输入的明文密码
         :param encrypted_password: 数据库中存储的加密密码
         :return: Boolean
         """
-        # 对输入密码进行相同的 MD5 加密
-        input_encrypted = PasswordEncryptor.set_password(input_password, salt=None)
-        # 比较加密后的密码
-        return input_encrypted == encrypted_password
+        if not encrypted_password:
+            return False
+        return password_hash_pool.run(PasswordEncryptor._check, input_password, encrypted_password)
+
+    @staticmethod
+    def needs_rehash(encrypted_password):
+        """旧版MD5或哈希参数已调整时需要重新计算"""
+        if PasswordEncryptor.is_legacy(encrypted_password):
+            return True
+        try:
+            hasher = identify_hasher(encrypted_password)
+        except ValueError:
+            return True
+        return hasher.algorithm != get_hasher().algorithm or hasher.must_update(encrypted_password)
+
     @staticmethod
     def verify_password(input_password, encrypted_password, salt=None):
         """
         验证密码
         :param input_password: 输入的密码
         :param encrypted_password: 加密后的密码
-        :param salt: 盐值
+        :param salt: 盐值（仅旧版MD5哈希使用）
         :return: 是否匹配
         """
-        return PasswordEncryptor.set_password(input_password, salt) == encrypted_password
\ No newline at end of file
+        if salt is not None:
+            return constant_time_compare(PasswordEncryptor.legacy_md5(input_password, salt), encrypted_password)
+        return PasswordEncryptor.check_password(input_password, encrypted_password)
@@ -0,0 +1,104 @@
+import re
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+
+FIELDS_QUERY_PARAM = 'fields'
+EXCLUDE_QUERY_PARAM = 'exclude'
+_DISPLAY_METHOD = re.compile(r'get_(\w+)_display')
+
+
+def _split(value: Optional[str]) -> Optional[Set[str]]:
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(',')}
+    names.discard('')
+    return names or None
+
+
+def parse_fieldset(request) -> Tuple[Optional[Set[str]], Set[str]]:
+    """读取 ?fields=a,b / ?exclude=c 参数，返回(保留字段或None, 排除字段)"""
+    if request is None:
+        return None, set()
+    params = getattr(request, 'query_params', None) or request.GET
+    return _split(params.get(FIELDS_QUERY_PARAM)), _split(params.get(EXCLUDE_QUERY_PARAM)) or set()
+
+
+def select_fields(names: Iterable[str], fields: Optional[Set[str]], exclude: Set[str]) -> Set[str]:
+    names = set(names)
+    if fields is not None:
+        names &= fields
+    return names - exclude
+
+
+def trim_data(data: Dict, request) -> Dict:
+    """按请求参数裁剪已序列化的字典（如缓存中的数据）"""
+    fields, exclude = parse_fieldset(request)
+    if fields is None and not exclude:
+        return data
+    keep = select_fields(data, fields, exclude)
+    return {key: value for key, value in data.items() if key in keep}
+
+
+class SparseFieldsMixin:
+    """
+    序列化器按 fields / exclude 裁剪输出字段
+    - 字段来源：构造参数 fields=/exclude=，或context中request的查询参数
+    - 只在输出时生效，传入data（写操作校验）时不裁剪
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+        if 'data' in kwargs:
+            return
+        if fields is None and exclude is None:
+            fields, exclude = parse_fieldset(self.context.get('request'))
+        if fields is None and not exclude:
+            return
+        keep = select_fields(self.fields, set(fields) if fields is not None else None, set(exclude or ()))
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+def project_queryset(queryset, serializer_class, request, extra: Iterable[str] = ()):
+    """
+    按请求裁剪后的序列化器字段对查询做only()，只读取输出需要的列
+    extra为额外需要的字段（如游标分页的排序键）；无法判断字段来源时不裁剪
+    """
+    fields, exclude = parse_fieldset(request)
+    if fields is None and not exclude:
+        return queryset
+
+    select_related = queryset.query.select_related
+    if select_related is True:
+        return queryset
+    serializer = serializer_class(context={'request': request})
+    model = queryset.model
+    columns = {model._meta.pk.name, *(name.lstrip('-') for name in extra)}
+    # select_related的外键列不能被延迟加载
+    if select_related:
+        columns.update(select_related)
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return queryset
+        parts = field.source.split('.')
+        name = parts[0]
+        display = _DISPLAY_METHOD.fullmatch(name)
+        if display:
+            name = display.group(1)
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return queryset
+        if not model_field.concrete:
+            return queryset
+        columns.add(name)
+        # 已select_related的关联，只读取关联表中用到的列
+        if len(parts) > 1 and model_field.is_relation and select_related and name in select_related:
+            columns.add(f'{name}__{parts[1]}')
+    return queryset.only(*columns)
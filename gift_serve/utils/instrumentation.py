@@ -0,0 +1,156 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django_redis.client import DefaultClient
+
+# 当前请求的采样记录，未采样的请求为None；contextvars会随sync_to_async传递到同步线程
+_current_record = contextvars.ContextVar('request_record', default=None)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class RequestRecord:
+    """单个请求的结构化耗时记录（毫秒）"""
+
+    __slots__ = ('method', 'path', 'status', 'user_id', 'auth_ms', 'ratelimit_ms', 'view_ms',
+                 'db_ms', 'db_queries', 'cache_ms', 'cache_calls', 'total_ms')
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.status = None
+        self.user_id = None
+        self.auth_ms = 0.0
+        self.ratelimit_ms = 0.0
+        self.view_ms = 0.0
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.cache_ms = 0.0
+        self.cache_calls = 0
+        self.total_ms = 0.0
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        for name in ('auth_ms', 'ratelimit_ms', 'view_ms', 'db_ms', 'cache_ms', 'total_ms'):
+            data[name] = round(data[name], 3)
+        return data
+
+
+def should_sample() -> bool:
+    rate = settings.REQUEST_METRICS.get('SAMPLE_RATE', 0.0)
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def start_record(request):
+    """按采样率为请求创建记录，返回(record, contextvar token)"""
+    if not should_sample():
+        return None, None
+    record = RequestRecord(request.method, request.path_info)
+    return record, _current_record.set(record)
+
+
+def finish_record(record, reset_token, response, elapsed_ms):
+    """补全记录并写入日志队列"""
+    _current_record.reset(reset_token)
+    record.total_ms = elapsed_ms
+    record.status = getattr(response, 'status_code', None)
+    get_metrics_logger().info(json.dumps(record.to_dict(), ensure_ascii=False))
+
+
+def current_record():
+    return _current_record.get()
+
+
+@contextmanager
+def timed(field):
+    """累计代码块耗时到当前请求记录的指定字段（未采样时几乎无开销）"""
+    record = _current_record.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(record, field, getattr(record, field) + (time.perf_counter() - start) * 1000)
+
+
+def _db_execute_wrapper(execute, sql, params, many, context):
+    record = _current_record.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.db_ms += (time.perf_counter() - start) * 1000
+        record.db_queries += 1
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_execute_wrapper)
+
+
+connection_created.connect(_install_db_wrapper)
+
+
+def _timed_cache_call(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        record = _current_record.get()
+        if record is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            record.cache_ms += (time.perf_counter() - start) * 1000
+            record.cache_calls += 1
+    return wrapper
+
+
+class InstrumentedRedisClient(DefaultClient):
+    """统计缓存耗时的django_redis客户端"""
+
+
+for _name in ('get', 'set', 'add', 'delete', 'delete_many', 'get_many', 'set_many',
+              'incr', 'decr', 'has_key', 'touch', 'expire', 'ttl'):
+    setattr(InstrumentedRedisClient, _name, _timed_cache_call(getattr(DefaultClient, _name)))
+
+
+def get_metrics_logger():
+    """
+    请求指标日志记录器
+    通过QueueHandler写入内存队列，由后台线程输出，请求线程不会阻塞在stdout上
+    """
+    global _listener
+    logger = logging.getLogger(settings.REQUEST_METRICS.get('LOGGER', 'gift.metrics'))
+    if _listener is not None or logger.handlers:
+        return logger
+
+    with _listener_lock:
+        if _listener is None and not logger.handlers:
+            log_queue = queue.SimpleQueue()
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+            _listener.start()
+            atexit.register(_listener.stop)
+            logger.addHandler(logging.handlers.QueueHandler(log_queue))
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
@@ -1,9 +1,222 @@
+from django.core import signing
+from django.core.paginator import EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-class StandardPagination(PageNumberPagination):
+from utils.counting import count_cache
+
+
+def validate_page_number(number):
+    """只校验页码下界，不依赖总数"""
+    try:
+        number = int(number)
+    except (TypeError, ValueError):
+        raise PageNotAnInteger('页码必须为整数')
+    if number < 1:
+        raise EmptyPage('页码不能小于1')
+    return number
+
+
+class CachedCountPaginator(Paginator):
+    """
+    总数通过count_cache获取（缓存或估算）
+    估算总数可能偏小，因此不以估算的总页数拒绝页码
+    """
+    count_estimated = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return len(self.object_list)
+        total, self.count_estimated = count_cache.count(self.object_list)
+        return total
+
+    def validate_number(self, number):
+        # 先触发计数，确定总数是否为估算值
+        if self.count and self.count_estimated:
+            return validate_page_number(number)
+        return super().validate_number(number)
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+
+class UncountedPaginator(Paginator):
+    """不统计总数的分页器，多取一行判断是否有下一页"""
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        return validate_page_number(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        return self.page_from_rows(number, list(self.page_slice(number)))
+
+    def page_slice(self, number):
+        bottom = (number - 1) * self.per_page
+        return self.object_list[bottom:bottom + self.per_page + 1]
+
+    def page_from_rows(self, number, rows):
+        if not rows and number > 1:
+            raise EmptyPage('该页没有结果')
+        return UncountedPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+
+class KeysetPaginationMixin:
+    """
+    游标（keyset）分页，按视图的 cursor_ordering 排序，例如 ('-create_time', '-user_id')
+    - 请求携带 cursor 参数或 pagination=cursor 时启用，否则仍为页码分页
+    - 游标经过签名，客户端无法伪造；任意深度的翻页都只按索引读取一页数据，不需要OFFSET和COUNT
+    - 排序字段的最后一个必须唯一（通常为主键）
+    """
+    cursor_query_param = 'cursor'
+    cursor_mode_query_param = 'pagination'
+    cursor_salt = 'utils.pagination.cursor'
+    # 游标模式下的分页信息，页码模式下为None
+    cursor_page = None
+
+    def use_cursor(self, request, view):
+        if not getattr(view, 'cursor_ordering', None):
+            return False
+        params = request.query_params
+        return self.cursor_query_param in params or params.get(self.cursor_mode_query_param) == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.use_cursor(request, view):
+            return super().paginate_queryset(queryset, request, view)
+        queryset, page_size, reverse, has_cursor = self.get_cursor_queryset(queryset, request, view)
+        return self.finish_cursor_page(list(queryset), request, view, page_size, reverse, has_cursor)
+
+    async def apaginate_cursor(self, queryset, request, view):
+        """游标分页的异步版本"""
+        queryset, page_size, reverse, has_cursor = self.get_cursor_queryset(queryset, request, view)
+        rows = [obj async for obj in queryset]
+        return self.finish_cursor_page(rows, request, view, page_size, reverse, has_cursor)
+
+    def get_cursor_queryset(self, queryset, request, view):
+        """根据游标构造查询，多取一行用于判断是否还有下一页"""
+        ordering = list(view.cursor_ordering)
+        page_size = self.get_page_size(request) or self.page_size
+        token = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if token:
+            values, reverse = self.decode_cursor(token, queryset.model, ordering)
+            queryset = queryset.filter(self.keyset_filter(ordering, values, reverse))
+        if reverse:
+            ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in ordering]
+        return queryset.order_by(*ordering)[:page_size + 1], page_size, reverse, bool(token)
+
+    def finish_cursor_page(self, rows, request, view, page_size, reverse, has_cursor):
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # 正向翻页：带游标说明前面还有数据；反向翻页：一定是从后面的页翻回来的
+        has_next = has_more if not reverse else True
+        has_previous = has_cursor if not reverse else has_more
+        ordering = view.cursor_ordering
+        self.cursor_page = {
+            'page_size': page_size,
+            'has_next': bool(rows) and has_next,
+            'has_previous': bool(rows) and has_previous,
+            'next_cursor': self.encode_cursor(rows[-1], ordering, False) if rows and has_next else None,
+            'previous_cursor': self.encode_cursor(rows[0], ordering, True) if rows and has_previous else None,
+        }
+        self.request = request
+        return rows
+
+    @staticmethod
+    def keyset_filter(ordering, values, reverse):
+        """
+        生成 (a, b) < (x, y) 形式的条件：a < x OR (a = x AND b < y)
+        降序字段取 lt，升序取 gt，反向翻页时取反
+        """
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            branch = Q(**{f'{name}__{"lt" if descending else "gt"}': values[i]})
+            for prev_field, prev_value in zip(ordering[:i], values[:i]):
+                branch &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= branch
+        return condition
+
+    def encode_cursor(self, obj, ordering, reverse):
+        values = []
+        for field in ordering:
+            value = getattr(obj, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return signing.dumps({'v': values, 'r': reverse}, salt=self.cursor_salt, compress=True)
+
+    def decode_cursor(self, token, model, ordering):
+        try:
+            data = signing.loads(token, salt=self.cursor_salt)
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(ordering, data['v'])
+            ]
+        except Exception:
+            raise NotFound('无效的分页游标')
+        if len(values) != len(ordering):
+            raise NotFound('无效的分页游标')
+        return values, bool(data.get('r'))
+
+    def get_cursor_link(self, token):
+        if token is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+
+class CountPaginationMixin:
+    """
+    页码分页的总数处理
+    - 默认通过count_cache获取总数，避免每次请求都执行COUNT(*)
+    - 请求携带 count=false 时不统计总数，总数和总页数返回None
+    """
+    count_query_param = 'count'
+    django_paginator_class = CachedCountPaginator
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() not in ('false', '0')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_count(request):
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = UncountedPaginator(queryset, page_size)
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.request = request
+        return list(self.page)
+
+    def is_count_estimated(self):
+        if getattr(self, 'cursor_page', None) is not None:
+            return False
+        return getattr(self.page.paginator, 'count_estimated', False)
+
+
+class StandardPagination(KeysetPaginationMixin, CountPaginationMixin, PageNumberPagination):
     """
-    标准分页器 - 支持页码分页
+    标准分页器 - 支持页码分页，视图声明cursor_ordering后可选游标分页
     """
     page_size = 20  # 默认每页显示数量
     page_size_query_param = 'page_size'  # 每页数量参数
@@ -14,25 +227,82 @@ class StandardPagination(PageNumberPagination):
         """
         自定义分页响应格式
         """
-        return Response({
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        """
+        分页响应体（同步视图和异步视图共用）
+        """
+        if self.cursor_page is not None:
+            # 游标模式保持相同结构，总数和页码不计算
+            pagination = {
+                'total_count': None,
+                'total_estimated': False,
+                'total_pages': None,
+                'current_page': None,
+                'page_size': self.cursor_page['page_size'],
+                'next': self.get_cursor_link(self.cursor_page['next_cursor']),
+                'previous': self.get_cursor_link(self.cursor_page['previous_cursor']),
+            }
+        else:
+            pagination = {
+                'total_count': self.page.paginator.count,
+                'total_estimated': self.is_count_estimated(),
+                'total_pages': self.page.paginator.num_pages,
+                'current_page': self.page.number,
+                'page_size': self.page_size,
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+            }
+        return {
             'code': 200,
             'message': '获取成功',
             'data': {
                 'list': data,
-                'pagination': {
-                    'total_count': self.page.paginator.count,
-                    'total_pages': self.page.paginator.num_pages,
-                    'current_page': self.page.number,
-                    'page_size': self.page_size,
-                    'next': self.get_next_link(),
-                    'previous': self.get_previous_link(),
-                }
+                'pagination': pagination
             }
-        })
+        }
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        异步分页，使用异步ORM和count_cache计数、取数
+        request为DRF的Request包装，仅用于读取分页参数和生成链接
+        """
+        if self.use_cursor(request, view):
+            return await self.apaginate_cursor(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        if not self.wants_count(request):
+            paginator = UncountedPaginator(queryset, page_size)
+            page_number = request.query_params.get(self.page_query_param) or 1
+            try:
+                number = paginator.validate_number(page_number)
+                rows = [obj async for obj in paginator.page_slice(number)]
+                self.page = paginator.page_from_rows(number, rows)
+            except InvalidPage as exc:
+                raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+            self.request = request
+            return list(self.page)
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count, paginator.count_estimated = await count_cache.acount(queryset)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        self.page.object_list = [obj async for obj in self.page.object_list]
+        self.request = request
+        return list(self.page)
+
 
 class LargeResultsPagination(StandardPagination):
     """
     大数据集分页器
     """
     page_size = 100
-    max_page_size = 500
\ No newline at end of file
+    max_page_size = 500
@@ -0,0 +1,23 @@
+import re
+from typing import Optional
+
+# 大陆手机号（规范形式：11位数字，不带国家码）
+PHONE_PATTERN = re.compile(r'^1[3-9]\d{9}$')
+_SEPARATORS = re.compile(r'[\s\-().]')
+
+
+def normalize_phone(value) -> Optional[str]:
+    """
+    将手机号规范化为11位数字：去掉空格、横线、括号，以及 +86 / 0086 / 86 国家码
+    无法识别为大陆手机号时返回None
+    """
+    if value is None:
+        return None
+    digits = _SEPARATORS.sub('', str(value))
+    if digits.startswith('+86'):
+        digits = digits[3:]
+    elif digits.startswith('0086'):
+        digits = digits[4:]
+    elif digits.startswith('86') and len(digits) == 13:
+        digits = digits[2:]
+    return digits if PHONE_PATTERN.match(digits) else None
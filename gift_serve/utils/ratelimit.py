@@ -0,0 +1,178 @@
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django_redis import get_redis_connection
+
+from utils.routes import PathMatcher, white_path_regex
+
+# 令牌桶脚本：一次调用同时检查多个桶（客户端、用户），全部有令牌才放行并各扣一个
+# KEYS: 桶的键；ARGV: 每个桶依次为 rate（每秒补充令牌数）, burst（桶容量）
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local allowed = 1
+local retry_after = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 't', 'ts')
+    local current = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    current = math.min(burst, current + math.max(0, now - ts) / 1000 * rate)
+    if current < 1 then
+        allowed = 0
+        retry_after = math.max(retry_after, (1 - current) / rate)
+    end
+    tokens[i] = current
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local current = tokens[i]
+    if allowed == 1 then
+        current = current - 1
+    end
+    redis.call('HSET', key, 't', tostring(current), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {allowed, tostring(retry_after)}
+"""
+
+Bucket = Tuple[str, float, float]
+
+
+class LocalTokenBuckets:
+    """进程内令牌桶，Redis不可用时兜底（限额按单进程计算）"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, buckets: List[Bucket]) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.max_keys:
+                self._buckets.clear()
+            states = []
+            retry_after = 0.0
+            for key, rate, burst in buckets:
+                tokens, ts = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - ts) * rate)
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+                states.append((key, tokens))
+            allowed = retry_after == 0.0
+            for key, tokens in states:
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed, retry_after
+
+
+class RateLimiter:
+    """
+    基于Redis令牌桶的限流器
+    - 客户端桶在JWT认证之前检查，未认证的请求（包括伪造Token的请求）同样计数；用户桶在认证之后检查
+    - 每次检查只执行一次EVALSHA
+    - Redis异常时退回进程内令牌桶，并在退避时间内不再访问Redis（熔断），
+      避免Redis故障期间每个请求都先等一次失败的连接；连续失败时退避时间翻倍，最长max_backoff秒
+    """
+
+    def __init__(self, config):
+        self.enabled = config.get('ENABLED', True)
+        self.trust_forwarded = config.get('TRUST_FORWARDED', False)
+        self.default_rule = config.get('DEFAULT')
+        routes = config.get('ROUTES', [])
+        for path, rule in [('DEFAULT', self.default_rule), *routes]:
+            self.validate_rule(path, rule)
+        self.rules = [rule for _, rule in routes]
+        self.matcher = PathMatcher(white_path_regex(path) for path, _ in routes)
+        self.backoff = config.get('REDIS_BACKOFF', 1.0)
+        self.max_backoff = config.get('REDIS_MAX_BACKOFF', 30.0)
+        self._script = None
+        self._local = LocalTokenBuckets()
+        self._failures = 0
+        self._retry_at = 0.0
+        self.redis_calls = 0
+        self.local_calls = 0
+
+    @staticmethod
+    def validate_rule(path, rule) -> None:
+        """rate为0时补充令牌的等待时间无穷大，burst小于1时桶里永远没有令牌，启动时即报错"""
+        if not rule:
+            return
+        try:
+            rate, burst = float(rule['rate']), float(rule['burst'])
+        except (KeyError, TypeError, ValueError):
+            raise ImproperlyConfigured(f'RATE_LIMITS规则 {path} 需要数值型的rate和burst')
+        if not rate > 0 or not burst >= 1:
+            raise ImproperlyConfigured(f'RATE_LIMITS规则 {path} 的rate必须大于0，burst不能小于1')
+
+    def get_rule(self, path: str) -> Tuple[str, Optional[dict]]:
+        """返回(规则标识, 规则)，规则为None表示不限流"""
+        index = self.matcher.find(path)
+        if index is None:
+            return 'default', self.default_rule
+        return str(index), self.rules[index]
+
+    def client_ip(self, request) -> str:
+        if self.trust_forwarded:
+            forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+    def get_buckets(self, request, scope: str) -> List[Bucket]:
+        """scope为ip时返回客户端桶，为user时返回已认证用户的桶（未认证时为空）"""
+        rule_id, rule = self.get_rule(request.path_info)
+        if not self.enabled or not rule:
+            return []
+        if scope == 'ip':
+            client = self.client_ip(request)
+        else:
+            client = getattr(request, 'user_id', None)
+            if client is None:
+                return []
+        return [(f'ratelimit:{rule_id}:{scope}:{client}', float(rule['rate']), float(rule['burst']))]
+
+    def allow(self, buckets: List[Bucket]) -> Tuple[bool, float]:
+        """返回(是否放行, 建议重试等待秒数)"""
+        if not buckets:
+            return True, 0.0
+        if time.monotonic() < self._retry_at:
+            self.local_calls += 1
+            return self._local.allow(buckets)
+        try:
+            if self._script is None:
+                self._script = get_redis_connection('default').register_script(TOKEN_BUCKET_SCRIPT)
+            args = []
+            for _, rate, burst in buckets:
+                args.extend((rate, burst))
+            allowed, retry_after = self._script(keys=[key for key, _, _ in buckets], args=args)
+        except Exception:
+            self._trip()
+            self.local_calls += 1
+            return self._local.allow(buckets)
+        self._failures = 0
+        self.redis_calls += 1
+        return bool(allowed), float(retry_after)
+
+    def _trip(self) -> None:
+        """Redis调用失败，退避一段时间后再尝试"""
+        self._failures += 1
+        delay = min(self.max_backoff, self.backoff * 2 ** min(self._failures - 1, 16))
+        self._retry_at = time.monotonic() + delay
+
+    def stats(self) -> dict:
+        return {
+            'redis_calls': self.redis_calls,
+            'local_calls': self.local_calls,
+            'circuit_open': time.monotonic() < self._retry_at,
+            'consecutive_failures': self._failures,
+        }
+
+
+rate_limiter = RateLimiter(getattr(settings, 'RATE_LIMITS', {}))
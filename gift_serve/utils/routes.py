@@ -0,0 +1,82 @@
+import re
+from typing import Iterable, List, Optional
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+_NAMED_GROUP = re.compile(r'\(\?P<\w+>')
+
+
+def auth_exempt(view):
+    """
+    标记视图无需Token认证，支持函数视图和类视图
+    URLconf加载后由认证中间件统一收集，编译进白名单匹配器
+    """
+    view.auth_exempt = True
+    return view
+
+
+def _is_auth_exempt(callback) -> bool:
+    if getattr(callback, 'auth_exempt', False):
+        return True
+    return getattr(getattr(callback, 'view_class', None), 'auth_exempt', False)
+
+
+def white_path_regex(white_path: str) -> str:
+    """
+    将配置中的白名单路径转换为正则（前缀匹配）
+    - '*' 匹配任意字符
+    - 以'/'结尾的路径同时匹配去掉结尾'/'的路径
+    """
+    body = '.*'.join(re.escape(part) for part in white_path.split('*'))
+    if white_path.endswith('/'):
+        body = body[:-1] + r'(?:/|\Z)'
+    return body
+
+
+def collect_exempt_patterns(urlconf=None) -> List[str]:
+    """遍历URLconf，收集被auth_exempt标记的视图对应的路径正则"""
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            part = pattern.pattern.regex.pattern.lstrip('^')
+            # 多个分支合并为一个正则时不允许重复的分组名
+            part = _NAMED_GROUP.sub('(?:', part)
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, prefix + part)
+            elif isinstance(pattern, URLPattern) and _is_auth_exempt(pattern.callback):
+                yield prefix + part
+
+    return list(walk(get_resolver(urlconf).url_patterns, '/'))
+
+
+class PathMatcher:
+    """
+    将多个路径正则预编译为单个分支正则，一次匹配完成判断
+    每个分支使用命名分组，find可返回命中的是第几个模式
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = list(patterns)
+        self.patterns = patterns
+        self._regex = re.compile(
+            '|'.join(f'(?P<p{i}>{p})' for i, p in enumerate(patterns))
+        ) if patterns else None
+
+    def match(self, path: str) -> bool:
+        return self._regex is not None and self._regex.match(path) is not None
+
+    def find(self, path: str) -> Optional[int]:
+        """返回第一个命中的模式下标，未命中返回None"""
+        if self._regex is None:
+            return None
+        matched = self._regex.match(path)
+        if matched is None:
+            return None
+        return int(matched.lastgroup[1:])
+
+
+def build_white_list_matcher(white_list: Iterable[str], urlconf: Optional[str] = None) -> PathMatcher:
+    """合并配置白名单与auth_exempt视图，生成白名单匹配器"""
+    patterns = [white_path_regex(p) for p in white_list]
+    patterns.extend(collect_exempt_patterns(urlconf))
+    return PathMatcher(patterns)
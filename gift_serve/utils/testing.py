@@ -0,0 +1,16 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+
+
+def uses_redis(alias: str = 'default') -> bool:
+    """缓存后端是否为django-redis（有序集合、Lua脚本等需要真实的Redis）"""
+    return settings.CACHES[alias]['BACKEND'] == 'django_redis.cache.RedisCache'
+
+
+# 依赖Redis专有命令的用例，locmem等缓存后端下跳过
+requires_redis = skipUnless(uses_redis(), '需要django-redis缓存后端')
+
+# 依赖行锁保证并发正确性的用例，sqlite等不支持SELECT ... FOR UPDATE的数据库下跳过
+requires_row_locks = skipUnless(connection.features.has_select_for_update, '数据库不支持SELECT ... FOR UPDATE')
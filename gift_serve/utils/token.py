@@ -1,21 +1,26 @@
 import jwt
 import datetime
+import secrets
 from django.conf import settings
 from django.core.cache import cache
 from django.http import JsonResponse
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils.token_cache import verified_token_cache, revoked_jti_filter, user_epoch_cache
 
 
 class TokenManager:
     """JWT Token管理器"""
 
     @staticmethod
-    def create_token(user_id: int, username: str, token_type: str = 'access') -> str:
+    def create_token(user_id: int, username: str, token_type: str = 'access', token_version: int = 0) -> str:
         """创建JWT Token"""
         payload = {
             'user_id': user_id,
             'username': username,
             'type': token_type,
+            'jti': secrets.token_urlsafe(9),
+            'ver': token_version,
             'exp': datetime.datetime.utcnow() + (
                 settings.JWT_CONFIG['ACCESS_TOKEN_LIFETIME'] if token_type == 'access'
                 else settings.JWT_CONFIG['REFRESH_TOKEN_LIFETIME']
@@ -30,21 +35,54 @@ class TokenManager:
         )
         return token
 
+    @staticmethod
+    def decode_token(token: str) -> Dict:
+        """校验签名和过期时间，失败时抛出jwt异常"""
+        return jwt.decode(
+            token,
+            settings.JWT_CONFIG['SECRET_KEY'],
+            algorithms=[settings.JWT_CONFIG['ALGORITHM']]
+        )
+
     @staticmethod
     def verify_token(token: str) -> Tuple[bool, Dict]:
-        """验证Token有效性"""
+        """验证Token有效性（优先命中进程内已验证缓存）"""
+        cached = verified_token_cache.get(token)
+        if cached is not None:
+            return TokenManager.check_token_version(cached)
+
+        generation = verified_token_cache.generation
         try:
-            payload = jwt.decode(
-                token,
-                settings.JWT_CONFIG['SECRET_KEY'],
-                algorithms=[settings.JWT_CONFIG['ALGORITHM']]
-            )
+            payload = TokenManager.decode_token(token)
             # 检查Token是否在黑名单中
-            if TokenManager.is_blacklisted(token):
-                print("==============")
+            if TokenManager.is_blacklisted(token, payload):
+                return False, {'error': 'Token已失效', 'code': 401}
+
+            verified_token_cache.set(token, payload, generation)
+            return TokenManager.check_token_version(payload)
+
+        except jwt.ExpiredSignatureError:
+            return False, {'error': 'Token已过期', 'code': 401}
+        except jwt.InvalidTokenError:
+            return False, {'error': '无效的Token', 'code': 401}
+        except Exception as e:
+            return False, {'error': f'Token验证异常: {str(e)}', 'code': 500}
+
+    @staticmethod
+    async def averify_token(token: str) -> Tuple[bool, Dict]:
+        """verify_token的异步版本，供ASGI下的原生异步中间件使用"""
+        cached = await verified_token_cache.aget(token)
+        if cached is not None:
+            return await TokenManager.acheck_token_version(cached)
+
+        generation = verified_token_cache.generation
+        try:
+            payload = TokenManager.decode_token(token)
+            if await TokenManager.ais_blacklisted(token, payload):
                 return False, {'error': 'Token已失效', 'code': 401}
 
-            return True, payload
+            verified_token_cache.set(token, payload, generation)
+            return await TokenManager.acheck_token_version(payload)
 
         except jwt.ExpiredSignatureError:
             return False, {'error': 'Token已过期', 'code': 401}
@@ -54,10 +92,65 @@ class TokenManager:
             return False, {'error': f'Token验证异常: {str(e)}', 'code': 500}
 
     @staticmethod
-    def is_blacklisted(token: str) -> bool:
-        """检查Token是否在黑名单中"""
+    def check_token_version(payload: Dict) -> Tuple[bool, Dict]:
+        """校验Token版本号与用户当前版本号一致，用户已删除则拒绝"""
+        try:
+            epoch = user_epoch_cache.get(payload['user_id'])
+        except Exception as e:
+            return False, {'error': f'Token验证异常: {str(e)}', 'code': 500}
+        return TokenManager._compare_version(payload, epoch)
+
+    @staticmethod
+    async def acheck_token_version(payload: Dict) -> Tuple[bool, Dict]:
+        """check_token_version的异步版本"""
+        try:
+            epoch = await user_epoch_cache.aget(payload['user_id'])
+        except Exception as e:
+            return False, {'error': f'Token验证异常: {str(e)}', 'code': 500}
+        return TokenManager._compare_version(payload, epoch)
+
+    @staticmethod
+    def _compare_version(payload: Dict, epoch: int) -> Tuple[bool, Dict]:
+        if epoch == user_epoch_cache.DELETED:
+            return False, {'error': '用户不存在或已被删除', 'code': 401}
+        if payload.get('ver', 0) < epoch:
+            return False, {'error': 'Token已失效', 'code': 401}
+        return True, payload
+
+    @staticmethod
+    def revoke_user_tokens(user_id: int, deleted: bool = False) -> None:
+        """使用户已签发的所有Token失效（修改密码、删除用户、全部登出）"""
+        user_epoch_cache.bump(user_id, deleted=deleted)
+        verified_token_cache.publish_revocation(user_id)
+
+    @staticmethod
+    def revoke_users_tokens(user_ids: Iterable[int], deleted: bool = False) -> None:
+        """revoke_user_tokens的批量版本"""
+        user_ids = list(user_ids)
+        user_epoch_cache.bump_many(user_ids, deleted=deleted)
+        verified_token_cache.publish_revocations(user_ids)
+
+    @staticmethod
+    def is_blacklisted(token: str, payload: Dict) -> bool:
+        """检查Token是否在黑名单中（本地过滤器判定未撤销时不访问Redis）"""
+        jti = payload.get('jti')
+        if jti:
+            if not revoked_jti_filter.might_contain(jti):
+                return False
+            return cache.get(f'blacklist_jti_{jti}') is not None
+        # 兼容未携带jti的旧Token
         return cache.get(f'blacklist_{token}') is not None
 
+    @staticmethod
+    async def ais_blacklisted(token: str, payload: Dict) -> bool:
+        """is_blacklisted的异步版本"""
+        jti = payload.get('jti')
+        if jti:
+            if not await revoked_jti_filter.amight_contain(jti):
+                return False
+            return await cache.aget(f'blacklist_jti_{jti}') is not None
+        return await cache.aget(f'blacklist_{token}') is not None
+
     @staticmethod
     def add_to_blacklist(token: str, payload: Dict) -> bool:
         """将Token加入黑名单"""
@@ -67,12 +160,29 @@ class TokenManager:
                 # 计算剩余过期时间
                 expire_seconds = exp_timestamp - int(datetime.datetime.utcnow().timestamp())
                 if expire_seconds > 0:
-                    cache.set(f'blacklist_{token}', 'blacklisted', expire_seconds)
+                    jti = payload.get('jti')
+                    if jti:
+                        cache.set(f'blacklist_jti_{jti}', 1, expire_seconds)
+                        revoked_jti_filter.publish(jti, exp_timestamp)
+                    else:
+                        cache.set(f'blacklist_{token}', 'blacklisted', expire_seconds)
+                    # 本进程立即失效，其他进程在下次同步时移除该用户的缓存条目
+                    verified_token_cache.invalidate(token)
+                    verified_token_cache.publish_revocation(payload.get('user_id'), jti or None)
                     return True
             return False
         except Exception:
             return False
 
+    @staticmethod
+    def cache_stats() -> Dict:
+        """已验证Token缓存及黑名单过滤器的命中统计"""
+        return {
+            'verified_cache': verified_token_cache.stats(),
+            'blacklist_filter': revoked_jti_filter.stats(),
+            'user_epoch_cache': user_epoch_cache.stats(),
+        }
+
     @staticmethod
     def refresh_token(refresh_token: str) -> Tuple[bool, Dict]:
         """刷新Token"""
@@ -84,7 +194,8 @@ class TokenManager:
         new_access_token = TokenManager.create_token(
             payload['user_id'],
             payload['username'],
-            'access'
+            'access',
+            payload.get('ver', 0)
         )
 
         return True, {
@@ -98,7 +209,6 @@ class TokenManager:
         """从请求中获取Token（支持Header和URL参数）"""
         # 从Authorization头获取
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        print("auth_header==={}".format(auth_header))
         if auth_header.startswith('Bearer '):
             return auth_header[7:]
 
@@ -0,0 +1,553 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django_redis import get_redis_connection
+
+from utils.bloom import BloomFilter
+
+# 跨进程撤销日志：序号计数器 + 最近的撤销事件列表（每条为 "序号 类型 user_id jti"）
+REVOCATION_SEQ_KEY = 'token_revocation_seq'
+REVOCATION_LOG_KEY = 'token_revocation_log'
+# 已撤销jti集合（Redis有序集合，score为Token过期时间戳）
+REVOKED_JTI_SET_KEY = 'token_blacklist_jti'
+
+# 事件类型：单个Token登出 / 用户全部Token失效 / 全部进程清空本地缓存（如更换签名密钥）
+EVENT_TOKEN = 'token'
+EVENT_USER = 'user'
+EVENT_FLUSH = 'flush'
+
+# 追加事件并裁剪日志，序号与事件在同一脚本中写入，读者不会看到序号有而事件无
+_PUBLISH_SCRIPT = """
+local seq = 0
+for i = 2, #ARGV do
+    seq = redis.call('INCR', KEYS[1])
+    redis.call('RPUSH', KEYS[2], seq .. ' ' .. ARGV[i])
+end
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[1]), -1)
+return seq
+"""
+# 返回 [当前序号, 序号大于ARGV[1]的事件...]，只读取新增的部分
+_FETCH_SCRIPT = """
+local seq = tonumber(redis.call('GET', KEYS[1]) or '0')
+local since = tonumber(ARGV[1])
+if seq <= since then
+    return {seq}
+end
+local events = redis.call('LRANGE', KEYS[2], since - seq, -1)
+table.insert(events, 1, seq)
+return events
+"""
+
+Event = Tuple[str, Optional[int], Optional[str]]
+
+
+def _parse_event(raw) -> Tuple[int, Event]:
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    seq, kind, user_id, jti = raw.split(' ')
+    return int(seq), (kind, None if user_id == '-' else int(user_id), None if jti == '-' else jti)
+
+
+class VerifiedTokenCache:
+    """
+    已验证Token的进程内LRU缓存
+    - 以Token的SHA256摘要为键，过期时间与Token的exp一致
+    - 命中时跳过jwt.decode和Redis黑名单查询（用户Token版本号仍会校验）
+    - 每隔sync_interval秒从Redis撤销日志读取新增的事件，只移除被撤销用户的条目；
+      其他进程的撤销最多延迟sync_interval秒生效
+    - 日志被裁剪导致事件缺失、Redis不可用或收到flush事件时才清空整个缓存
+    """
+
+    def __init__(self, max_size: int = 10000, sync_interval: float = 1.0, log_size: int = 10000):
+        self.max_size = max_size
+        self.sync_interval = sync_interval
+        self.log_size = log_size
+        self._entries = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self._remote_seq = None
+        self._next_sync = 0.0
+        self._listeners = []
+        # 每次移除条目时递增，用于丢弃移除前开始验证的结果
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        """获取已验证的payload，未命中或已过期返回None"""
+        self._sync()
+        return self._lookup(token)
+
+    async def aget(self, token: str) -> Optional[Dict]:
+        """get的异步版本"""
+        await self._async_sync()
+        return self._lookup(token)
+
+    def _lookup(self, token: str) -> Optional[Dict]:
+        key = self.digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                exp, payload = entry
+                if exp > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(payload)
+                self._discard(key)
+            self.misses += 1
+        return None
+
+    def set(self, token: str, payload: Dict, generation: int) -> None:
+        """
+        缓存验证通过的payload
+        :param generation: 开始验证前读取的generation，期间有条目被移除则不写入
+        """
+        exp = payload.get('exp')
+        if not exp or self.max_size <= 0:
+            return
+        key = self.digest(token)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (exp, dict(payload))
+            self._entries.move_to_end(key)
+            self._by_user.setdefault(payload.get('user_id'), set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: bytes) -> None:
+        """移除条目及其用户索引（调用方持有锁）"""
+        _, payload = self._entries.pop(key)
+        user_id = payload.get('user_id')
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def invalidate(self, token: str) -> None:
+        """移除单个Token"""
+        key = self.digest(token)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self.generation += 1
+
+    def evict_user(self, user_id: int) -> None:
+        """移除某个用户的全部条目"""
+        with self._lock:
+            for key in self._by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        """清空本地缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'flushes': self.flushes,
+            'revocation_seq': self._remote_seq,
+        }
+
+    def subscribe(self, listener) -> None:
+        """
+        注册撤销事件的接收者
+        listener需实现 revoke(user_id, jti)（jti为None表示该用户的全部Token）和 flush()
+        """
+        self._listeners.append(listener)
+
+    def _flush(self) -> None:
+        self.flushes += 1
+        self.clear()
+        for listener in self._listeners:
+            listener.flush()
+
+    def _revoke(self, user_id: int, jti: Optional[str]) -> None:
+        self.evict_user(user_id)
+        for listener in self._listeners:
+            listener.revoke(user_id, jti)
+
+    def _sync_due(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_sync:
+            return False
+        self._next_sync = now + self.sync_interval
+        return True
+
+    def _fetch(self) -> List:
+        since = self._remote_seq if self._remote_seq is not None else 0
+        script = get_redis_connection('default').register_script(_FETCH_SCRIPT)
+        return script(keys=[REVOCATION_SEQ_KEY, REVOCATION_LOG_KEY], args=[since])
+
+    def _sync(self) -> None:
+        """定期读取撤销日志中的新事件"""
+        if not self._sync_due():
+            return
+        try:
+            reply = self._fetch()
+        except Exception:
+            # Redis不可用时无法感知撤销，直接放弃本地缓存
+            self._remote_seq = None
+            self._flush()
+            return
+        self._apply(reply)
+
+    async def _async_sync(self) -> None:
+        if not self._sync_due():
+            return
+        try:
+            reply = await sync_to_async(self._fetch, thread_sensitive=False)()
+        except Exception:
+            self._remote_seq = None
+            self._flush()
+            return
+        self._apply(reply)
+
+    def _apply(self, reply: List) -> None:
+        seq = int(reply[0])
+        since = self._remote_seq
+        self._remote_seq = seq
+        if since is None or seq < since:
+            # 首次同步（本地还没有可能过期的数据）或Redis数据被重置
+            if since is not None:
+                self._flush()
+            return
+        if seq == since:
+            return
+
+        events = dict(_parse_event(raw) for raw in reply[1:])
+        if any(expected not in events for expected in range(since + 1, seq + 1)):
+            # 日志已被裁剪，缺失的事件无法逐条处理
+            self._flush()
+            return
+        for expected in range(since + 1, seq + 1):
+            kind, user_id, jti = events[expected]
+            if kind == EVENT_FLUSH:
+                self._flush()
+            elif user_id is not None:
+                self._revoke(user_id, jti)
+
+    def _publish(self, events: List[str]) -> None:
+        if len(events) > self.log_size:
+            events = [f'{EVENT_FLUSH} - -']
+        script = get_redis_connection('default').register_script(_PUBLISH_SCRIPT)
+        script(keys=[REVOCATION_SEQ_KEY, REVOCATION_LOG_KEY], args=[self.log_size, *events])
+
+    def publish_revocation(self, user_id: int, jti: Optional[str] = None) -> None:
+        """通知所有进程：jti为空时该用户的全部Token失效，否则只是该jti被撤销"""
+        self.publish_revocations([user_id], jti)
+
+    def publish_revocations(self, user_ids: Iterable[int], jti: Optional[str] = None) -> None:
+        """publish_revocation的批量版本，一次Redis调用"""
+        kind = EVENT_TOKEN if jti else EVENT_USER
+        events = [f'{kind} {user_id} {jti or "-"}' for user_id in user_ids]
+        if not events:
+            return
+        try:
+            self._publish(events)
+        except Exception:
+            pass
+
+    def publish_flush(self) -> None:
+        """通知所有进程清空本地缓存（更换签名密钥等全局失效的场景）"""
+        try:
+            self._publish([f'{EVENT_FLUSH} - -'])
+        except Exception:
+            pass
+
+
+class RevokedJtiFilter:
+    """
+    已撤销jti的进程内布隆过滤器
+    - 首次使用时从Redis有序集合构建，之后撤销日志中的jti逐个加入
+    - 收到flush事件或元素数超过容量时标记为过期，下次查询前重建
+    - 过滤器判定不存在的jti一定未被撤销，直接放行，无需访问Redis
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._filter = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self.skipped = 0  # 本地直接放行次数
+        self.lookups = 0  # 需要查询Redis的次数
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def revoke(self, user_id: int, jti: Optional[str]) -> None:
+        """撤销事件：把jti加入本地过滤器"""
+        bloom = self._filter
+        if jti and bloom is not None:
+            bloom.add(jti)
+            if bloom.count > bloom.capacity:
+                # 超过容量后误判率上升，重建时会剔除已过期的jti
+                self.mark_stale()
+
+    def flush(self) -> None:
+        self.mark_stale()
+
+    def might_contain(self, jti: str) -> bool:
+        """返回False表示一定未被撤销"""
+        if self._stale:
+            self._rebuild()
+        return self._check(jti)
+
+    async def amight_contain(self, jti: str) -> bool:
+        """might_contain的异步版本，重建过滤器时不阻塞事件循环"""
+        if self._stale:
+            await sync_to_async(self._rebuild, thread_sensitive=False)()
+        return self._check(jti)
+
+    def _check(self, jti: str) -> bool:
+        bloom = self._filter
+        if bloom is None or jti in bloom:
+            self.lookups += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def publish(self, jti: str, exp_timestamp: int) -> None:
+        """登记已撤销的jti，并加入本地过滤器"""
+        get_redis_connection('default').zadd(REVOKED_JTI_SET_KEY, {jti: exp_timestamp})
+        self.revoke(None, jti)
+
+    def stats(self) -> Dict:
+        total = self.skipped + self.lookups
+        return {
+            'items': self._filter.count if self._filter is not None else None,
+            'skipped': self.skipped,
+            'lookups': self.lookups,
+            'skip_rate': self.skipped / total if total else 0.0,
+        }
+
+    def _rebuild(self) -> None:
+        with self._lock:
+            if not self._stale:
+                return
+            self._stale = False
+            try:
+                conn = get_redis_connection('default')
+                conn.zremrangebyscore(REVOKED_JTI_SET_KEY, '-inf', int(time.time()))
+                members = conn.zrange(REVOKED_JTI_SET_KEY, 0, -1)
+            except Exception:
+                # 无法加载时全部回退到Redis查询
+                self._filter = None
+                return
+            bloom = BloomFilter(max(self.capacity, len(members) * 2), self.error_rate)
+            bloom.update(m.decode('utf-8') if isinstance(m, bytes) else m for m in members)
+            self._filter = bloom
+
+
+class UserEpochCache:
+    """
+    用户Token版本号（epoch）的进程内缓存
+    - 本地未命中时批量从Redis读取，Redis未命中再一次性查询数据库
+    - 已删除或不存在的用户记为DELETED，其Token直接拒绝，无需每次查库
+    - 撤销日志中的用户事件只移除该用户的本地条目，flush事件清空本地缓存（之后按需加载）
+    - 其他进程递增版本号后，本进程最多在VERIFIED_CACHE_SYNC_INTERVAL秒内仍使用旧值
+    - Redis中的值只由add（加载，不覆盖已有值）和incr（递增）写入，
+      并发加载读到的旧版本号不会覆盖递增后的值
+    """
+
+    DELETED = -1
+
+    def __init__(self, max_size: int = 50000, ttl: float = 60, remote_ttl: int = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.remote_ttl = remote_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(user_id: int) -> str:
+        return f'user_token_epoch_{user_id}'
+
+    def revoke(self, user_id: int, jti: Optional[str]) -> None:
+        """撤销事件：用户的Token版本号变化（单个jti的撤销不影响版本号）"""
+        if jti is None:
+            with self._lock:
+                self._entries.pop(user_id, None)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, user_id: int) -> int:
+        """获取用户当前的Token版本号"""
+        epoch = self._lookup(user_id)
+        if epoch is None:
+            epoch = self.load_many([user_id])[user_id]
+        return epoch
+
+    async def aget(self, user_id: int) -> int:
+        """get的异步版本"""
+        epoch = self._lookup(user_id)
+        if epoch is None:
+            epoch = (await self.aload_many([user_id]))[user_id]
+        return epoch
+
+    def _lookup(self, user_id: int) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _user_queryset(user_ids):
+        from apps.user.models import User
+
+        return User.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'token_version', 'is_deleted'
+        )
+
+    def _rows_to_epochs(self, missing, rows) -> Dict[int, int]:
+        loaded = dict.fromkeys(missing, self.DELETED)
+        for user_id, token_version, is_deleted in rows:
+            loaded[user_id] = self.DELETED if is_deleted else token_version
+        return loaded
+
+    def load_many(self, user_ids: Iterable[int]) -> Dict[int, int]:
+        """批量加载用户的Token版本号并写入本地缓存"""
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        epochs = {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+        missing = [user_id for user_id in keys.values() if user_id not in epochs]
+        if missing:
+            loaded = self._rows_to_epochs(missing, self._user_queryset(missing))
+            # 只在Redis没有值时写入；已被其他进程写入（可能刚递增过）时以Redis为准
+            lost = [user_id for user_id, epoch in loaded.items()
+                    if not cache.add(self.key(user_id), epoch, self.remote_ttl)]
+            if lost:
+                current = cache.get_many([self.key(user_id) for user_id in lost])
+                loaded.update({keys[k]: v for k, v in current.items()})
+            epochs.update(loaded)
+        self._store(epochs)
+        return epochs
+
+    async def aload_many(self, user_ids: Iterable[int]) -> Dict[int, int]:
+        """load_many的异步版本（异步缓存接口 + 异步ORM）"""
+        keys = {self.key(user_id): user_id for user_id in user_ids}
+        epochs = {keys[k]: v for k, v in (await cache.aget_many(list(keys))).items()}
+        missing = [user_id for user_id in keys.values() if user_id not in epochs]
+        if missing:
+            rows = [row async for row in self._user_queryset(missing)]
+            loaded = self._rows_to_epochs(missing, rows)
+            lost = [user_id for user_id, epoch in loaded.items()
+                    if not await cache.aadd(self.key(user_id), epoch, self.remote_ttl)]
+            if lost:
+                current = await cache.aget_many([self.key(user_id) for user_id in lost])
+                loaded.update({keys[k]: v for k, v in current.items()})
+            epochs.update(loaded)
+        self._store(epochs)
+        return epochs
+
+    def _store(self, epochs: Dict[int, int]) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for user_id, epoch in epochs.items():
+                self._entries[user_id] = (epoch, expires_at)
+                self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def bump(self, user_id: int, deleted: bool = False) -> None:
+        """递增用户Token版本号，使其已签发的Token全部失效"""
+        self.bump_many([user_id], deleted=deleted)
+
+    def bump_many(self, user_ids: Iterable[int], deleted: bool = False) -> None:
+        """
+        批量递增Token版本号：一条UPDATE，Redis中已有的值原子递增
+        Redis写入在UPDATE的事务内完成：事务提交前其他进程只能读到旧版本号，
+        它们add的旧值会被这里的incr递增；同一用户的并发递增由行锁串行化
+        """
+        from apps.user.models import User
+
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        with transaction.atomic():
+            User.objects.filter(user_id__in=user_ids).update(token_version=F('token_version') + 1)
+            if deleted:
+                # 删除标记是常量而不是读取到的版本号，直接覆盖
+                cache.set_many({self.key(user_id): self.DELETED for user_id in user_ids}, self.remote_ttl)
+            else:
+                versions = dict(
+                    User.objects.filter(user_id__in=user_ids).values_list('user_id', 'token_version')
+                )
+                for user_id, version in versions.items():
+                    self._advance(user_id, version)
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def _advance(self, user_id: int, version: int) -> None:
+        """把Redis中的版本号推进到version（数据库中递增后的值）"""
+        key = self.key(user_id)
+        try:
+            epoch = cache.incr(key)
+        except ValueError:
+            # Redis中没有该用户；并发加载抢先add了旧值时再递增
+            if cache.add(key, version, self.remote_ttl):
+                return
+            epoch = cache.incr(key)
+        if epoch == self.DELETED + 1:
+            # 原值是删除标记（用户被恢复），补齐到数据库中的版本号
+            cache.incr(key, version)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+verified_token_cache = VerifiedTokenCache(
+    max_size=settings.JWT_CONFIG.get('VERIFIED_CACHE_SIZE', 10000),
+    sync_interval=settings.JWT_CONFIG.get('VERIFIED_CACHE_SYNC_INTERVAL', 1.0),
+    log_size=settings.JWT_CONFIG.get('REVOCATION_LOG_SIZE', 10000),
+)
+
+revoked_jti_filter = RevokedJtiFilter(
+    capacity=settings.JWT_CONFIG.get('BLACKLIST_FILTER_CAPACITY', 100000),
+    error_rate=settings.JWT_CONFIG.get('BLACKLIST_FILTER_ERROR_RATE', 0.01),
+)
+verified_token_cache.subscribe(revoked_jti_filter)
+
+user_epoch_cache = UserEpochCache(
+    max_size=settings.JWT_CONFIG.get('USER_EPOCH_CACHE_SIZE', 50000),
+    ttl=settings.JWT_CONFIG.get('USER_EPOCH_CACHE_TTL', 60),
+)
+verified_token_cache.subscribe(user_epoch_cache)
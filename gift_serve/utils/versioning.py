@@ -0,0 +1,57 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+class ChangeVersion:
+    """
+    跨进程共享的数据版本号（Redis）
+    - 数据写入并提交后递增，各进程发现版本变化时刷新本地的内存结构
+    - 本地记住读到的版本check_interval秒，期间读取不访问Redis
+    """
+
+    def __init__(self, key: str, check_interval: float = 1.0):
+        self.key = key
+        self.check_interval = check_interval
+        self._value = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self.check_interval:
+            return self._value
+        try:
+            value = cache.get(self.key, 0)
+        except Exception:
+            # Redis不可用时沿用上次读到的版本
+            value = self._value if self._value is not None else 0
+        with self._lock:
+            self._value, self._checked_at = value, now
+        return value
+
+    def bump(self) -> None:
+        """递增版本号（bulk_create/update等不触发信号的写入需手动调用）"""
+        try:
+            cache.add(self.key, 0, None)
+            cache.incr(self.key)
+        except Exception:
+            pass
+        with self._lock:
+            # 本进程立即看到新版本
+            self._value = None
+
+    def track(self, *models) -> None:
+        """模型保存或删除并提交后递增版本号"""
+        for model in models:
+            label = model._meta.label_lower
+            post_save.connect(self._on_change, sender=model, weak=False,
+                              dispatch_uid=f'{self.key}_save_{label}')
+            post_delete.connect(self._on_change, sender=model, weak=False,
+                                dispatch_uid=f'{self.key}_delete_{label}')
+
+    def _on_change(self, sender, **kwargs):
+        transaction.on_commit(self.bump)